@@ -1,146 +1,141 @@
-import google.generativeai as genai
 import os
 from config import GEMINI_API_KEY
 from datetime import datetime, timezone
 import logging
+import time
 import traceback
+from ai.cache import prompt_cache, response_token_count, estimate_tokens
+from ai.scheduler import gemini_scheduler, PRIORITY_INTERACTIVE
+from ai.parser import InsightsParser, parse_insights
+from ai.backends import get_backend
+from ai.prompts import build_insights_prompt, log_prompt_call
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+# Configure the LLM backend selected by LLM_BACKEND
 try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    # Use the correct model from the article
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-    logger.info("Successfully configured Gemini model")
+    backend = get_backend(GEMINI_API_KEY)
+    model = backend.model(MODEL_NAME)
+    logger.info(f"Successfully configured {backend.name} model")
 except Exception as e:
     logger.error(f"Error configuring Gemini: {str(e)}")
     logger.error(traceback.format_exc())
 
-def get_adk_insights(developer_data):
-    """Get insights using Gemini"""
+def _build_insights_prompt(developer_data):
+    """Format the insights prompt based on developer data"""
+    return build_insights_prompt(developer_data)
+
+def get_adk_insights(developer_data, priority=PRIORITY_INTERACTIVE):
+    """Get insights using Gemini
+
+    priority is the scheduler class for the call; nightly precomputation
+    uses PRIORITY_BACKGROUND.
+    """
     try:
         logger.info(f"Generating insights for developer: {developer_data.get('name')}")
         
-        # Format the prompt based on developer data
-        prompt = f"""
-        As an expert developer productivity analyst, analyze the following developer profile and provide actionable insights.
-        
-        Developer Profile:
-        Name: {developer_data.get('name', 'Unknown')}
-        Role: {developer_data.get('role', 'Unknown')}
-        Recent Activity: {developer_data.get('recent_activity', [])}
-        Skills: {developer_data.get('skills', [])}
-        
-        Please provide a detailed analysis in the following HTML format:
-
-        <div class="insights-container">
-            <div class="section">
-                <h6>Current Productivity Analysis</h6>
-                <div class="content">
-                    <h6>Key Strengths</h6>
-                    <ul>
-                        <li>Strength 1 with detailed explanation</li>
-                        <li>Strength 2 with detailed explanation</li>
-                    </ul>
-                    <h6>Recent Achievements</h6>
-                    <ul>
-                        <li>Achievement 1 with impact</li>
-                        <li>Achievement 2 with impact</li>
-                    </ul>
-                </div>
-            </div>
-
-            <div class="section">
-                <h6>Areas for Improvement</h6>
-                <div class="content">
-                    <div class="improvement-item">
-                        <h6>Area 1</h6>
-                        <p>Detailed explanation of why this area needs attention</p>
-                        <p>Impact of improvement</p>
-                    </div>
-                    <div class="improvement-item">
-                        <h6>Area 2</h6>
-                        <p>Detailed explanation of why this area needs attention</p>
-                        <p>Impact of improvement</p>
-                    </div>
-                </div>
-            </div>
-
-            <div class="section">
-                <h6>Specific Recommendations</h6>
-                <div class="content">
-                    <div class="recommendation">
-                        <h6>Recommendation 1</h6>
-                        <p>Detailed steps to implement</p>
-                        <ul>
-                            <li>Step 1</li>
-                            <li>Step 2</li>
-                        </ul>
-                    </div>
-                    <div class="recommendation">
-                        <h6>Recommendation 2</h6>
-                        <p>Detailed steps to implement</p>
-                        <ul>
-                            <li>Step 1</li>
-                            <li>Step 2</li>
-                        </ul>
-                    </div>
-                </div>
-            </div>
-
-            <div class="section">
-                <h6>Learning Resources</h6>
-                <div class="content">
-                    <div class="resource-category">
-                        <h6>Courses & Tutorials</h6>
-                        <ul>
-                            <li>Resource 1 with link</li>
-                            <li>Resource 2 with link</li>
-                        </ul>
-                    </div>
-                    <div class="resource-category">
-                        <h6>Communities & Forums</h6>
-                        <ul>
-                            <li>Community 1 with link</li>
-                            <li>Community 2 with link</li>
-                        </ul>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        Please analyze the developer profile and provide insights following this exact HTML structure. Use only h6 tags for all headings. Ensure all content is properly formatted with appropriate HTML tags and no special characters or emojis. Include specific, actionable recommendations and real examples where possible.
-        """
+        prompt = _build_insights_prompt(developer_data)
         
-        logger.info("Sending prompt to Gemini")
-        # Get response from Gemini with basic configuration
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-        )
-        logger.info("Received response from Gemini")
+        cache_key = prompt_cache.make_key(prompt, MODEL_NAME, GENERATION_CONFIG)
+        cached = prompt_cache.get(cache_key)
+        if cached:
+            logger.info("Serving insights from prompt cache")
+            return cached
         
-        if not response or not response.text:
-            logger.error("Empty response from Gemini")
-            raise Exception("Empty response from Gemini")
+        estimated_tokens = estimate_tokens(prompt) + GENERATION_CONFIG['max_output_tokens']
+        with gemini_scheduler.slot(estimated_tokens, priority) as slot:
+            logger.info("Sending prompt to Gemini")
+            # Get response from Gemini with basic configuration
+            started = time.monotonic()
+            response = model.generate_content(
+                prompt,
+                generation_config=GENERATION_CONFIG
+            )
+            latency = time.monotonic() - started
+            log_prompt_call('insights', prompt, response, latency)
             
-        return {
+            if not response or not response.text:
+                logger.error("Empty response from Gemini")
+                raise Exception("Empty response from Gemini")
+            slot.record(response_token_count(response, prompt, response.text))
+            
+        result = {
             'insights': response.text,
+            'sections': parse_insights(response.text),
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
+        prompt_cache.put(cache_key, result,
+                         tokens=response_token_count(response, prompt, response.text),
+                         latency_seconds=latency)
+        return result
         
     except Exception as e:
         logger.error(f"Error getting insights: {str(e)}")
         logger.error(traceback.format_exc())
         return {
             'insights': f"Unable to generate insights at this time. Error: {str(e)}",
+            'error': str(e),
             'timestamp': datetime.now(timezone.utc).isoformat()
-        } 
\ No newline at end of file
+        } 
+
+def stream_adk_insights(developer_data):
+    """Stream insights from Gemini as they are generated
+
+    Yields {'chunk': text, 'sections': [...]} as soon as the model produces
+    text, where sections lists the insight sections completed by that chunk.
+    The assembled result is cached like get_adk_insights, and a cache hit is
+    yielded as a single event.
+    """
+    logger.info(f"Streaming insights for developer: {developer_data.get('name')}")
+    prompt = _build_insights_prompt(developer_data)
+    cache_key = prompt_cache.make_key(prompt, MODEL_NAME, GENERATION_CONFIG)
+    cached = prompt_cache.get(cache_key)
+    if cached:
+        logger.info("Serving insights from prompt cache")
+        yield {'chunk': cached['insights'], 'sections': cached.get('sections') or parse_insights(cached['insights'])}
+        return
+
+    parser = InsightsParser()
+    estimated_tokens = estimate_tokens(prompt) + GENERATION_CONFIG['max_output_tokens']
+    with gemini_scheduler.slot(estimated_tokens, PRIORITY_INTERACTIVE) as slot:
+        started = time.monotonic()
+        response = model.generate_content(
+            prompt,
+            generation_config=GENERATION_CONFIG,
+            stream=True
+        )
+        parts = []
+        for chunk in response:
+            text = getattr(chunk, 'text', '')
+            if text:
+                parts.append(text)
+                yield {'chunk': text, 'sections': parser.feed(text)}
+        latency = time.monotonic() - started
+        log_prompt_call('streamed insights', prompt, response, latency)
+        slot.record(response_token_count(response, prompt, ''.join(parts)))
+
+    remaining = parser.close()
+    if remaining:
+        yield {'chunk': '', 'sections': remaining}
+
+    insights = ''.join(parts)
+    if not insights:
+        logger.error("Empty response from Gemini")
+        raise Exception("Empty response from Gemini")
+    prompt_cache.put(cache_key, {
+        'insights': insights,
+        'sections': parser.sections,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }, tokens=response_token_count(response, prompt, insights), latency_seconds=latency)
+    logger.info("Finished streaming insights from Gemini")
@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import google.generativeai as genai
+
+from ai.cache import estimate_tokens
+from config import LLM_BACKEND
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DEVELOPER_ID = re.compile(r'<developer id="([^"]+)">')
+
+class StubBackendError(Exception):
+    """Simulated Gemini API failure raised by the stub backend"""
+
+class GeminiBackend:
+    """google.generativeai behind the backend interface"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str):
+        genai.configure(api_key=api_key)
+
+    def model(self, model_name: str):
+        """Get a model exposing generate_content(contents, generation_config=None, stream=False)"""
+        return genai.GenerativeModel(model_name)
+
+    def upload_file(self, path: str, mime_type: Optional[str] = None):
+        return genai.upload_file(path, mime_type=mime_type)
+
+    def get_file(self, name: str):
+        return genai.get_file(name)
+
+class _StubResponse:
+    """Stand-in for a Gemini response; iterating it yields streamed chunks"""
+
+    def __init__(self, text: str, chunks: List[str], prompt_tokens: int, chunk_delay: float):
+        self.text = text
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(text),
+            total_token_count=prompt_tokens + estimate_tokens(text)
+        )
+
+    def __iter__(self) -> Iterator[SimpleNamespace]:
+        for chunk in self._chunks:
+            time.sleep(self._chunk_delay)
+            yield SimpleNamespace(text=chunk)
+
+class _StubModel:
+    def __init__(self, backend: 'StubBackend', model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        return self.backend.generate(self.model_name, contents, stream=stream)
+
+class StubBackend:
+    """Deterministic local stand-in for Gemini, for load tests without network access
+
+    Responses are HTML in the formats the prompts ask for, chosen from the
+    prompt itself: batched recommendations answer every <developer id>,
+    insight prompts get the four insight sections and image prompts get a
+    short analysis. Text depends only on the prompt and the seed, so the
+    prompt cache behaves as it would against the real API.
+
+    Latency is log-normal around latency_ms (time to first token), plus
+    chunk_delay_ms per streamed chunk, and failure_rate of calls raise
+    StubBackendError. Latency and failures come from one seeded generator,
+    so a run with the same seed and call order is reproducible.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency_ms: float = 800, latency_sigma: float = 0.5,
+                 failure_rate: float = 0.0, chunk_delay_ms: float = 40,
+                 chunk_chars: int = 80, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.chunk_delay_ms = chunk_delay_ms
+        self.chunk_chars = chunk_chars
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+
+    @classmethod
+    def from_env(cls) -> 'StubBackend':
+        """Configure the stub from LLM_STUB_* environment variables"""
+        return cls(
+            latency_ms=float(os.getenv('LLM_STUB_LATENCY_MS', '800')),
+            latency_sigma=float(os.getenv('LLM_STUB_LATENCY_SIGMA', '0.5')),
+            failure_rate=float(os.getenv('LLM_STUB_FAILURE_RATE', '0')),
+            chunk_delay_ms=float(os.getenv('LLM_STUB_CHUNK_DELAY_MS', '40')),
+            chunk_chars=int(os.getenv('LLM_STUB_CHUNK_CHARS', '80')),
+            seed=int(os.getenv('LLM_STUB_SEED', '0'))
+        )
+
+    def model(self, model_name: str) -> _StubModel:
+        return _StubModel(self, model_name)
+
+    def upload_file(self, path: str, mime_type: Optional[str] = None):
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        return SimpleNamespace(name=f"files/stub-{digest[:16]}", uri=f"stub://files/{digest[:16]}",
+                               mime_type=mime_type, expiration_time=None)
+
+    def get_file(self, name: str):
+        return SimpleNamespace(name=name, uri=f"stub://{name}", mime_type=None, expiration_time=None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': self.name, 'calls': self._calls, 'failures': self._failures}
+
+    def generate(self, model_name: str, contents, stream: bool = False) -> _StubResponse:
+        """Simulate one generate_content call"""
+        prompt = self._prompt_text(contents)
+        with self._lock:
+            self._calls += 1
+            failed = self._random.random() < self.failure_rate
+            latency = self._random.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000.0
+            if failed:
+                self._failures += 1
+
+        time.sleep(latency)
+        if failed:
+            raise StubBackendError("429 Resource has been exhausted (simulated by the stub backend)")
+
+        text = self._respond(prompt, contents)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        if not stream:
+            # A non-streamed call pays for the whole generation up front
+            time.sleep(len(chunks) * self.chunk_delay_ms / 1000.0)
+        return _StubResponse(text, chunks, estimate_tokens(prompt), self.chunk_delay_ms / 1000.0)
+
+    @staticmethod
+    def _prompt_text(contents) -> str:
+        if isinstance(contents, str):
+            return contents
+        return ' '.join(part for part in contents if isinstance(part, str))
+
+    def _respond(self, prompt: str, contents) -> str:
+        rng = random.Random(f"{self.seed}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}")
+        if not isinstance(contents, str):
+            return self._image_analysis(rng)
+        developer_ids = _DEVELOPER_ID.findall(prompt)
+        if developer_ids:
+            return ''.join(
+                f'<div class="developer-recommendations" data-developer="{developer_id}">'
+                f'{self._recommendations(rng)}</div>\n'
+                for developer_id in developer_ids
+            )
+        if 'insights-container' in prompt:
+            return self._insights(rng)
+        return f'<div class="recommendations-container">{self._recommendations(rng)}</div>'
+
+    @staticmethod
+    def _recommendations(rng: random.Random) -> str:
+        topics = rng.sample(_RECOMMENDATION_TOPICS, 3)
+        return ''.join(
+            f"""
+    <div class="recommendation">
+        <h6>{title}</h6>
+        <p>{description}</p>
+        <ul>
+            {''.join(f'<li>{step}</li>' for step in steps)}
+        </ul>
+    </div>"""
+            for title, description, steps in topics
+        )
+
+    @staticmethod
+    def _insights(rng: random.Random) -> str:
+        sections = []
+        for title, items in _INSIGHT_SECTIONS:
+            body = ''.join(
+                f"<h6>{heading}</h6><ul>{''.join(f'<li>{point}</li>' for point in rng.sample(points, 2))}</ul>"
+                for heading, points in items
+            )
+            sections.append(f'<div class="section"><h6>{title}</h6><div class="content">{body}</div></div>')
+        return f'<div class="insights-container">{"".join(sections)}</div>'
+
+    @staticmethod
+    def _image_analysis(rng: random.Random) -> str:
+        return (
+            f"The image shows a {rng.choice(['dashboard', 'chart', 'diagram', 'screenshot'])} "
+            f"with {rng.randint(2, 6)} distinct regions. "
+            f"The most prominent element is a {rng.choice(['bar chart', 'line graph', 'table', 'status panel'])}."
+        )
+
+_RECOMMENDATION_TOPICS = [
+    ("Reduce merge request size",
+     "Smaller merge requests are reviewed faster and merged with fewer conflicts.",
+     ["Split features behind flags", "Aim for under 400 changed lines"]),
+    ("Protect focus time",
+     "Long uninterrupted blocks raise throughput on complex tasks.",
+     ["Block two mornings a week", "Batch notifications"]),
+    ("Improve pipeline reliability",
+     "Flaky pipelines slow every merge and erode trust in CI.",
+     ["Quarantine flaky tests", "Track the failure rate weekly"]),
+    ("Share review load",
+     "Spreading reviews keeps knowledge distributed across the team.",
+     ["Review two merge requests a day", "Pair on unfamiliar areas"]),
+    ("Document recent decisions",
+     "Short design notes save onboarding time for the rest of the team.",
+     ["Write an ADR for the last big change", "Link it from the README"]),
+    ("Close stale issues",
+     "A smaller backlog makes priorities clearer.",
+     ["Triage issues older than 90 days", "Label what remains"])
+]
+
+_INSIGHT_SECTIONS = [
+    ("Current Productivity Analysis", [
+        ("Key Strengths", ["Consistent commit cadence", "Fast review turnaround", "Clear commit messages"]),
+        ("Recent Achievements", ["Shipped a feature end to end", "Reduced pipeline time", "Closed long-standing issues"])
+    ]),
+    ("Growth Opportunities", [
+        ("Technical Skills", ["Deepen testing practice", "Learn the deployment tooling", "Profile hot paths"]),
+        ("Process Improvements", ["Smaller merge requests", "Earlier design reviews", "Regular backlog grooming"])
+    ]),
+    ("Action Items", [
+        ("Short-term Goals", ["Pair on one review a day", "Automate a manual step", "Fix one flaky test"]),
+        ("Long-term Goals", ["Own a component", "Mentor a new teammate", "Present at a team demo"])
+    ]),
+    ("Team Impact", [
+        ("Collaboration", ["Active in code reviews", "Helps unblock teammates", "Shares context in threads"]),
+        ("Knowledge Sharing", ["Writes useful docs", "Runs short walkthroughs", "Answers questions quickly"])
+    ])
+]
+
+_backends: Dict[str, Any] = {}
+_backends_lock = threading.Lock()
+
+def get_backend(api_key: str = '', name: Optional[str] = None):
+    """Get the shared LLM backend selected by LLM_BACKEND ('gemini' or 'stub')"""
+    name = (name or LLM_BACKEND).lower()
+    with _backends_lock:
+        if name == 'stub':
+            if 'stub' not in _backends:
+                logger.info("Using the stub LLM backend")
+                _backends['stub'] = StubBackend.from_env()
+            return _backends['stub']
+        if name != 'gemini':
+            raise ValueError(f"Unknown LLM backend: {name}")
+        # genai.configure is process-wide, so a new key reconfigures it
+        return GeminiBackend(api_key)
@@ -0,0 +1,142 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for Gemini text (about four characters per token)"""
+    return max(1, len(text or '') // 4)
+
+def response_token_count(response, prompt: str, text: str) -> int:
+    """Total tokens used by a Gemini call, from usage metadata when available"""
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None) if usage else None
+    if total:
+        return int(total)
+    return estimate_tokens(prompt) + estimate_tokens(text)
+
+class PromptCache:
+    """Content-addressed cache for Gemini results
+
+    Entries are keyed by a hash of the normalized prompt, the model name and
+    the generation parameters, so identical inputs are answered without a
+    model call. The in-memory tier is an LRU bounded by max_entries; when a
+    MongoDB manager is attached, entries are also shared across processes.
+    Values are copied on put and get, so callers never share a cached object.
+    """
+
+    def __init__(self, ttl_seconds: int = 6 * 3600, max_entries: int = 512, mongo_manager=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.mongo_manager = mongo_manager
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._tokens_saved = 0
+        self._latency_saved = 0.0
+
+    def attach_mongo(self, mongo_manager):
+        """Back the cache with MongoDB"""
+        self.mongo_manager = mongo_manager
+
+    @staticmethod
+    def make_key(prompt: Any, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Hash a prompt and its model parameters into a cache key"""
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt, sort_keys=True, default=str)
+        normalized = _WHITESPACE.sub(' ', prompt).strip()
+        material = json.dumps({
+            'prompt': normalized,
+            'model': model_name,
+            'config': generation_config or {}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a copy of a cached value, or None on a miss or expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['expires_at'] <= now:
+                del self._entries[key]
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.mongo_manager:
+            entry = self.mongo_manager.get_llm_cache_entry(key)
+            if entry:
+                # MongoDB returns naive UTC datetimes
+                entry['expires_at'] = entry['expires_at'].replace(tzinfo=timezone.utc).timestamp()
+                self._store(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._tokens_saved += entry.get('tokens', 0)
+            self._latency_saved += entry.get('latency_seconds', 0.0)
+        return copy.deepcopy(entry['value'])
+
+    def put(self, key: str, value: Any, tokens: int = 0, latency_seconds: float = 0.0):
+        """Cache a value together with the cost it took to produce"""
+        expires_at = time.time() + self.ttl_seconds
+        entry = {
+            'value': copy.deepcopy(value),
+            'tokens': tokens,
+            'latency_seconds': latency_seconds,
+            'expires_at': expires_at
+        }
+        self._store(key, entry)
+        if self.mongo_manager:
+            self.mongo_manager.save_llm_cache_entry(key, {
+                **entry,
+                'expires_at': datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio and the tokens and latency saved by cache hits"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'tokens_saved': self._tokens_saved,
+                'latency_saved_seconds': round(self._latency_saved, 3)
+            }
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, entry: Dict[str, Any]):
+        """Insert into the in-memory LRU, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Shared cache for all Gemini callers in this process
+prompt_cache = PromptCache(
+    ttl_seconds=int(os.getenv('AI_CACHE_TTL_SECONDS', str(6 * 3600))),
+    max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', '512'))
+)
@@ -0,0 +1,85 @@
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from utils.data_generator import get_recommendations as get_rule_recommendations
+from utils.jobs import JOB_DONE
+from utils.precompute import staleness_reason
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default latency budget for recommendation requests
+RECOMMENDATION_BUDGET_SECONDS = float(os.getenv('RECOMMENDATION_BUDGET_MS', '800')) / 1000.0
+
+def is_fresh_result(result: Optional[Dict[str, Any]], max_age_seconds: float) -> bool:
+    """Whether a stored AI result is recent enough to serve without regenerating"""
+    try:
+        generated_at = datetime.fromisoformat(result['timestamp'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    if generated_at.tzinfo is None:
+        generated_at = generated_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - generated_at).total_seconds() < max_age_seconds
+
+class RecommendationEngine:
+    """Recommendations within a per-request latency budget
+
+    A fresh Gemini result, or a stored one whose activity snapshot still
+    matches the developer's metrics, is served directly. Otherwise Gemini
+    generation is queued and awaited for at most the budget; if it has not
+    finished, the rule-based recommender answers instead, together with the
+    job id the client polls to upgrade to the Gemini result once it lands.
+    generate(user_id, gitlab_metrics) receives the request's metrics, so the
+    budget goes to the model rather than to refetching GitLab.
+    """
+
+    def __init__(self, job_queue, generate: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+                 budget_seconds: float = 0.8, max_age_seconds: float = 3600):
+        self.job_queue = job_queue
+        self.generate = generate
+        self.budget_seconds = budget_seconds
+        self.max_age_seconds = max_age_seconds
+
+    def get_recommendations(self, user_id: str, gitlab_metrics: Dict[str, Any],
+                            stored: Optional[Dict[str, Any]] = None,
+                            budget_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Get the best recommendations available within the latency budget"""
+        key = f"recommendations:{user_id}"
+        latest = self.job_queue.latest_result(key)
+        if (latest and time.time() - latest['finished_at'] < self.max_age_seconds
+                and latest['result'].get('recommendations')):
+            return self._gemini(latest['result'])
+        # Stored results stay current while activity has not materially changed
+        fresh = stored and stored.get('recommendations') and (
+            is_fresh_result(stored, self.max_age_seconds) or not staleness_reason(stored, gitlab_metrics))
+        if fresh and not self.job_queue.is_active(key):
+            return self._gemini(stored)
+
+        budget = self.budget_seconds if budget_seconds is None else budget_seconds
+        job_id = self.job_queue.submit('recommendations', key, self.generate, user_id, gitlab_metrics)
+        job = self.job_queue.wait(job_id, timeout=budget) if budget > 0 else None
+        if job and job['status'] == JOB_DONE and job['result'].get('recommendations'):
+            return self._gemini(job['result'])
+
+        # Prefer an older Gemini result over the rules while the new one is generated
+        previous = latest['result'] if latest else stored
+        if previous and previous.get('recommendations'):
+            return {**self._gemini(previous), 'status': 'stale', 'job_id': job_id}
+
+        logger.info(f"Gemini missed the {budget:.2f}s budget for {user_id}, serving rule-based recommendations")
+        return {
+            'recommendations': get_rule_recommendations(user_id, gitlab_metrics),
+            'source': 'rules',
+            'status': 'pending',
+            'job_id': job_id,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+
+    @staticmethod
+    def _gemini(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Tag a Gemini result as final"""
+        return {**result, 'source': 'gemini', 'status': 'done'}
@@ -0,0 +1,229 @@
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+# Tags whose text content is captured as one unit
+_CAPTURED_TAGS = ('h6', 'p', 'li')
+
+def _clean(text: str) -> str:
+    """Collapse whitespace inside captured text"""
+    return ' '.join(text.split())
+
+class _StructuredParser(HTMLParser):
+    """Incremental, event-based parser for the h6/p/li HTML Gemini returns
+
+    Chunks of any size can be fed as they stream in. Elements may span lines
+    and contain inline markup; their text is delivered to on_heading,
+    on_paragraph and on_list_item once the closing tag (or the next captured
+    element) is seen.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._capture_tag: Optional[str] = None
+        self._capture_text: List[str] = []
+        self._div_stack: List[Dict[str, Optional[str]]] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _CAPTURED_TAGS:
+            # An unclosed element ends where the next one starts
+            self._finish_capture()
+            self._capture_tag = tag
+            self._capture_text = []
+        elif tag == 'div':
+            attributes = dict(attrs)
+            self._div_stack.append(attributes)
+            self.on_div_start(attributes)
+
+    def handle_endtag(self, tag):
+        if tag == self._capture_tag:
+            self._finish_capture()
+        elif tag == 'div' and self._div_stack:
+            self._finish_capture()
+            self.on_div_end(self._div_stack.pop())
+
+    def handle_data(self, data):
+        if self._capture_tag:
+            self._capture_text.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_capture()
+
+    def _finish_capture(self):
+        tag, text = self._capture_tag, _clean(''.join(self._capture_text))
+        self._capture_tag = None
+        self._capture_text = []
+        if not tag or not text:
+            return
+        if tag == 'h6':
+            self.on_heading(text)
+        elif tag == 'p':
+            self.on_paragraph(text)
+        else:
+            self.on_list_item(text)
+
+    def on_div_start(self, attributes):
+        pass
+
+    def on_div_end(self, attributes):
+        pass
+
+    def on_heading(self, text):
+        pass
+
+    def on_paragraph(self, text):
+        pass
+
+    def on_list_item(self, text):
+        pass
+
+class RecommendationParser(_StructuredParser):
+    """Turn recommendation HTML into {'title', 'description', 'steps'} objects
+
+    Each h6 starts a recommendation; paragraphs form its description and list
+    items its steps. When the response is split into
+    <div data-developer="..."> sections (batched sync), recommendations are
+    grouped by that developer id. feed() returns the recommendations completed
+    so far, so callers can render them while the response streams.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.groups: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self._group: Optional[str] = None
+        self._current: Optional[Dict[str, Any]] = None
+        self._completed: List[Dict[str, Any]] = []
+
+    def feed(self, data):
+        super().feed(data)
+        return self._drain()
+
+    def close(self):
+        super().close()
+        self._flush()
+        return self._drain()
+
+    def recommendations(self, developer: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recommendations parsed for a developer section (None for ungrouped text)"""
+        return self.groups.get(developer, [])
+
+    def on_div_start(self, attributes):
+        if attributes.get('data-developer'):
+            self._flush()
+            self._group = attributes['data-developer']
+
+    def on_div_end(self, attributes):
+        if attributes.get('data-developer'):
+            self._flush()
+            self._group = None
+
+    def on_heading(self, text):
+        self._flush()
+        self._current = {'title': text, 'description': '', 'steps': []}
+
+    def on_paragraph(self, text):
+        if self._current:
+            description = self._current['description']
+            self._current['description'] = f"{description} {text}" if description else text
+
+    def on_list_item(self, text):
+        if self._current:
+            self._current['steps'].append(text)
+
+    def _flush(self):
+        if self._current:
+            self.groups.setdefault(self._group, []).append(self._current)
+            self._completed.append(self._current)
+            self._current = None
+
+    def _drain(self):
+        completed, self._completed = self._completed, []
+        return completed
+
+class InsightsParser(_StructuredParser):
+    """Turn ADK insights HTML into sections of headed items
+
+    Every <div class="section"> becomes {'title', 'items'}; its first h6 is
+    the title and each later h6 opens an item with 'heading', 'paragraphs'
+    and 'points'. feed() returns the sections completed so far.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.sections: List[Dict[str, Any]] = []
+        self._section: Optional[Dict[str, Any]] = None
+        self._item: Optional[Dict[str, Any]] = None
+        self._completed: List[Dict[str, Any]] = []
+
+    def feed(self, data):
+        super().feed(data)
+        return self._drain()
+
+    def close(self):
+        super().close()
+        self._end_section()
+        return self._drain()
+
+    def on_div_start(self, attributes):
+        if 'section' in (attributes.get('class') or '').split():
+            self._end_section()
+            self._section = {'title': '', 'items': []}
+
+    def on_div_end(self, attributes):
+        if 'section' in (attributes.get('class') or '').split():
+            self._end_section()
+
+    def on_heading(self, text):
+        if self._section is None:
+            self._section = {'title': text, 'items': []}
+        elif not self._section['title'] and not self._section['items']:
+            self._section['title'] = text
+        else:
+            self._item = {'heading': text, 'paragraphs': [], 'points': []}
+            self._section['items'].append(self._item)
+
+    def on_paragraph(self, text):
+        self._ensure_item()['paragraphs'].append(text)
+
+    def on_list_item(self, text):
+        self._ensure_item()['points'].append(text)
+
+    def _ensure_item(self):
+        if self._section is None:
+            self._section = {'title': '', 'items': []}
+        if self._item is None:
+            self._item = {'heading': None, 'paragraphs': [], 'points': []}
+            self._section['items'].append(self._item)
+        return self._item
+
+    def _end_section(self):
+        if self._section and (self._section['title'] or self._section['items']):
+            self.sections.append(self._section)
+            self._completed.append(self._section)
+        self._section = None
+        self._item = None
+
+    def _drain(self):
+        completed, self._completed = self._completed, []
+        return completed
+
+def parse_recommendations(text: str) -> List[Dict[str, Any]]:
+    """Parse a complete recommendation response"""
+    parser = RecommendationParser()
+    parser.feed(text)
+    parser.close()
+    return [rec for group in parser.groups.values() for rec in group]
+
+def parse_recommendations_by_developer(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse a batched response into recommendations per developer id"""
+    parser = RecommendationParser()
+    parser.feed(text)
+    parser.close()
+    return {developer: recs for developer, recs in parser.groups.items() if developer is not None}
+
+def parse_insights(text: str) -> List[Dict[str, Any]]:
+    """Parse a complete ADK insights response"""
+    parser = InsightsParser()
+    parser.feed(text)
+    parser.close()
+    return parser.sections
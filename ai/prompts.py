@@ -0,0 +1,278 @@
+import logging
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from ai.cache import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Token budget for a whole single-developer prompt (template plus profile)
+PROMPT_TOKEN_BUDGET = int(os.getenv('GEMINI_PROMPT_TOKEN_BUDGET', '1200'))
+# Token budget for one developer profile inside a batched prompt
+PROFILE_TOKEN_BUDGET = int(os.getenv('GEMINI_PROFILE_TOKEN_BUDGET', '250'))
+# Profiles never shrink below this, even when the template alone is near the budget
+MIN_PROFILE_TOKENS = 40
+
+MAX_ACTIVITY_ITEMS = 5
+MAX_SKILLS = 10
+MAX_ACTION_CHARS = 80
+
+# Metrics summarized into the profile, in priority order
+PROFILE_METRICS = (
+    ('commits_this_week', 'commits this week'),
+    ('merge_requests_merged', 'MRs merged'),
+    ('merge_requests_open', 'MRs open'),
+    ('issues_closed', 'issues closed'),
+    ('issues_assigned', 'issues open'),
+    ('avg_merge_time_hours', 'avg merge time (h)'),
+    ('pipeline_success_rate', 'pipeline success rate'),
+    ('code_review_participation', 'reviews')
+)
+
+class PromptTemplate:
+    """Prompt text compiled once at import, with a single {profile} slot
+
+    Indentation is stripped from the static text (it is pure token cost),
+    which is then split around the slot so render() is one concatenation.
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        lines = [line.strip() for line in text.strip().splitlines()]
+        compact = '\n'.join(line for i, line in enumerate(lines) if line or (i and lines[i - 1]))
+        self.head, _, self.tail = compact.partition('{profile}')
+        self.static_tokens = estimate_tokens(self.head + self.tail)
+
+    def profile_budget(self, token_budget: int) -> int:
+        """Tokens left for the profile once the static text is paid for"""
+        return max(MIN_PROFILE_TOKENS, token_budget - self.static_tokens)
+
+    def render(self, profile: str) -> str:
+        return f"{self.head}{profile}{self.tail}"
+
+def _format_number(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip('0').rstrip('.')
+    return str(value)
+
+def _format_activity_item(item: Dict[str, Any]) -> str:
+    action = str(item.get('action', '')).strip()
+    if len(action) > MAX_ACTION_CHARS:
+        action = action[:MAX_ACTION_CHARS - 3].rstrip() + '...'
+    # ISO timestamps are cut to the date; relative ones ("2 hours ago") are kept
+    timestamp = str(item.get('timestamp', ''))
+    when = timestamp[:10] if timestamp[:4].isdigit() else timestamp
+    return f"- {when} {action}" if when else f"- {action}"
+
+def summarize_activity(recent_activity: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Compact aggregates of recent activity: counts per type and newest items"""
+    items = [item for item in (recent_activity or []) if isinstance(item, dict)]
+    counts = Counter(item.get('type', 'other') for item in items)
+    newest = sorted(items, key=lambda item: str(item.get('timestamp', '')), reverse=True)
+    return {
+        'counts': dict(counts),
+        'items': [_format_activity_item(item) for item in newest[:MAX_ACTIVITY_ITEMS]]
+    }
+
+def format_profile(developer_data: Dict[str, Any], token_budget: int = PROFILE_TOKEN_BUDGET) -> str:
+    """Render a developer profile as compact lines within token_budget
+
+    Lines are added in priority order (identity, metrics, activity counts,
+    skills, then recent items newest first) and lower-priority lines are
+    dropped once the budget is reached.
+    """
+    lines = [
+        f"Name: {developer_data.get('name', 'Unknown')}",
+        f"Role: {developer_data.get('role', 'Unknown')}"
+    ]
+    if developer_data.get('team'):
+        lines.append(f"Team: {developer_data['team']}")
+
+    optional = []
+    metrics = developer_data.get('metrics') or {}
+    metric_parts = [
+        f"{label} {_format_number(metrics[key])}"
+        for key, label in PROFILE_METRICS if metrics.get(key) is not None
+    ]
+    if metric_parts:
+        optional.append(f"Metrics: {', '.join(metric_parts)}")
+
+    activity = summarize_activity(developer_data.get('recent_activity'))
+    if activity['counts']:
+        counts = ', '.join(f"{count} {kind.replace('_', ' ')}" for kind, count in sorted(activity['counts'].items()))
+        optional.append(f"Recent activity: {counts}")
+
+    skills = [str(skill) for skill in (developer_data.get('skills') or [])][:MAX_SKILLS]
+    if skills:
+        optional.append(f"Skills: {', '.join(skills)}")
+    optional.extend(activity['items'])
+
+    used = estimate_tokens('\n'.join(lines))
+    for line in optional:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return '\n'.join(lines)
+
+def log_prompt_call(kind: str, prompt: str, response, latency_seconds: float):
+    """Log prompt size against latency for one Gemini call"""
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None) if usage else None
+    source = 'reported' if prompt_tokens else 'estimated'
+    logger.info(
+        f"Gemini {kind} call: {prompt_tokens or estimate_tokens(prompt)} prompt tokens ({source}), "
+        f"{len(prompt)} chars, {latency_seconds:.2f}s"
+    )
+
+_FORMAT_INSTRUCTIONS = """<div class="recommendation">
+        <h6>Recommendation Title</h6>
+        <p>Detailed explanation of the recommendation and why it's important.</p>
+        <ul>
+            <li>Step 1 to implement</li>
+            <li>Step 2 to implement</li>
+        </ul>
+    </div>"""
+
+RECOMMENDATIONS_PROMPT = PromptTemplate('recommendations', f"""
+    As an expert developer productivity analyst, analyze the following developer profile and provide actionable recommendations.
+
+    Developer Profile:
+    {{profile}}
+
+    Please provide specific, actionable recommendations in the following format:
+
+    <div class="recommendations-container">
+    {_FORMAT_INSTRUCTIONS}
+    </div>
+
+    Format each recommendation with proper HTML tags and ensure the content is clear and actionable.
+""")
+
+BATCH_RECOMMENDATIONS_PROMPT = PromptTemplate('batch recommendations', f"""
+    As an expert developer productivity analyst, analyze each of the following developer profiles and provide actionable recommendations for every developer.
+
+    Developer Profiles:
+    {{profile}}
+
+    Answer every developer in a separate section, using the developer id exactly as given, in the following format:
+
+    <div class="developer-recommendations" data-developer="DEVELOPER_ID">
+    {_FORMAT_INSTRUCTIONS}
+    </div>
+
+    Format each recommendation with proper HTML tags and ensure the content is clear and actionable.
+""")
+
+INSIGHTS_PROMPT = PromptTemplate('insights', """
+    As an expert developer productivity analyst, analyze the following developer profile and provide actionable insights.
+
+    Developer Profile:
+    {profile}
+
+    Please provide a detailed analysis in the following HTML format:
+
+    <div class="insights-container">
+        <div class="section">
+            <h6>Current Productivity Analysis</h6>
+            <div class="content">
+                <h6>Key Strengths</h6>
+                <ul>
+                    <li>Strength 1 with detailed explanation</li>
+                    <li>Strength 2 with detailed explanation</li>
+                </ul>
+                <h6>Recent Achievements</h6>
+                <ul>
+                    <li>Achievement 1 with impact</li>
+                    <li>Achievement 2 with impact</li>
+                </ul>
+            </div>
+        </div>
+
+        <div class="section">
+            <h6>Areas for Improvement</h6>
+            <div class="content">
+                <div class="improvement-item">
+                    <h6>Area 1</h6>
+                    <p>Detailed explanation of why this area needs attention</p>
+                    <p>Impact of improvement</p>
+                </div>
+                <div class="improvement-item">
+                    <h6>Area 2</h6>
+                    <p>Detailed explanation of why this area needs attention</p>
+                    <p>Impact of improvement</p>
+                </div>
+            </div>
+        </div>
+
+        <div class="section">
+            <h6>Specific Recommendations</h6>
+            <div class="content">
+                <div class="recommendation">
+                    <h6>Recommendation 1</h6>
+                    <p>Detailed steps to implement</p>
+                    <ul>
+                        <li>Step 1</li>
+                        <li>Step 2</li>
+                    </ul>
+                </div>
+                <div class="recommendation">
+                    <h6>Recommendation 2</h6>
+                    <p>Detailed steps to implement</p>
+                    <ul>
+                        <li>Step 1</li>
+                        <li>Step 2</li>
+                    </ul>
+                </div>
+            </div>
+        </div>
+
+        <div class="section">
+            <h6>Learning Resources</h6>
+            <div class="content">
+                <div class="resource-category">
+                    <h6>Courses & Tutorials</h6>
+                    <ul>
+                        <li>Resource 1 with link</li>
+                        <li>Resource 2 with link</li>
+                    </ul>
+                </div>
+                <div class="resource-category">
+                    <h6>Communities & Forums</h6>
+                    <ul>
+                        <li>Community 1 with link</li>
+                        <li>Community 2 with link</li>
+                    </ul>
+                </div>
+            </div>
+        </div>
+    </div>
+
+    Please analyze the developer profile and provide insights following this exact HTML structure. Use only h6 tags for all headings. Ensure all content is properly formatted with appropriate HTML tags and no special characters or emojis. Include specific, actionable recommendations and real examples where possible.
+""")
+
+def build_recommendations_prompt(developer_data: Dict[str, Any], token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Prompt for one developer's recommendations"""
+    profile = format_profile(developer_data, RECOMMENDATIONS_PROMPT.profile_budget(token_budget))
+    return RECOMMENDATIONS_PROMPT.render(profile)
+
+def build_insights_prompt(developer_data: Dict[str, Any], token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Prompt for one developer's ADK insights"""
+    profile = format_profile(developer_data, INSIGHTS_PROMPT.profile_budget(token_budget))
+    return INSIGHTS_PROMPT.render(profile)
+
+def format_developer_section(user_id: str, developer_data: Dict[str, Any],
+                             token_budget: int = PROFILE_TOKEN_BUDGET) -> str:
+    """One developer's profile inside a batched prompt"""
+    return f'<developer id="{user_id}">\n{format_profile(developer_data, token_budget)}\n</developer>\n'
+
+def build_batch_prompt(developers: Dict[str, Dict[str, Any]]) -> str:
+    """Prompt covering several developer profiles"""
+    return BATCH_RECOMMENDATIONS_PROMPT.render(''.join(
+        format_developer_section(user_id, developer_data)
+        for user_id, developer_data in developers.items()
+    ))
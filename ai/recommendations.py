@@ -1,20 +1,53 @@
 import os
 import logging
-import google.generativeai as genai
 from datetime import datetime, timezone
+import time
 import traceback
+from ai.cache import prompt_cache, response_token_count, estimate_tokens
+from ai.scheduler import gemini_scheduler, PRIORITY_INTERACTIVE
+from ai.parser import parse_recommendations, parse_recommendations_by_developer
+from ai.uploads import image_uploads
+from ai.backends import get_backend
+from ai.prompts import build_recommendations_prompt, build_batch_prompt, format_developer_section, log_prompt_call
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+# Token budget for one batched request (prompt plus expected output)
+BATCH_TOKEN_BUDGET = int(os.getenv('GEMINI_BATCH_TOKEN_BUDGET', '8000'))
+# Expected output tokens for one developer's recommendations
+BATCH_OUTPUT_TOKENS_PER_DEVELOPER = 600
+# Gemini's output ceiling for a single request
+MAX_OUTPUT_TOKENS = 8192
+
+# Tokens Gemini charges for one image input
+IMAGE_TOKENS = 258
+
 class GeminiRecommendations:
-    def __init__(self, api_key):
-        """Initialize Gemini API with the provided API key"""
+    def __init__(self, api_key, cache=prompt_cache, priority=PRIORITY_INTERACTIVE, uploads=image_uploads, backend=None):
+        """Initialize Gemini API with the provided API key
+
+        priority is the scheduler class for this client's calls; the sync job
+        uses PRIORITY_BACKGROUND so dashboard requests are served first.
+        backend defaults to the one selected by LLM_BACKEND.
+        """
+        self.cache = cache
+        self.priority = priority
+        self.uploads = uploads
         try:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            logger.info("Successfully configured Gemini model")
+            self.backend = backend or get_backend(api_key)
+            self.model = self.backend.model(MODEL_NAME)
+            logger.info(f"Successfully configured {self.backend.name} model")
         except Exception as e:
             logger.error(f"Error configuring Gemini: {str(e)}")
             logger.error(traceback.format_exc())
@@ -25,75 +58,41 @@ class GeminiRecommendations:
         try:
             logger.info(f"Generating recommendations for developer: {developer_data.get('name', 'Unknown')}")
             
-            # Format the prompt based on developer data
-            prompt = f"""
-            As an expert developer productivity analyst, analyze the following developer profile and provide actionable recommendations.
-            
-            Developer Profile:
-            Name: {developer_data.get('name', 'Unknown')}
-            Role: {developer_data.get('role', 'Unknown')}
-            Recent Activity: {developer_data.get('recent_activity', [])}
-            Skills: {developer_data.get('skills', [])}
-            
-            Please provide specific, actionable recommendations in the following format:
-            
-            <div class="recommendations-container">
-                <div class="recommendation">
-                    <h6>Recommendation Title</h6>
-                    <p>Detailed explanation of the recommendation and why it's important.</p>
-                    <ul>
-                        <li>Step 1 to implement</li>
-                        <li>Step 2 to implement</li>
-                    </ul>
-                </div>
-            </div>
-            
-            Format each recommendation with proper HTML tags and ensure the content is clear and actionable.
-            """
-            
-            logger.info("Sending prompt to Gemini")
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.7,
-                    "top_p": 0.8,
-                    "top_k": 40,
-                    "max_output_tokens": 2048,
-                }
-            )
-            logger.info("Received response from Gemini")
-            
-            if not response or not response.text:
-                logger.error("Empty response from Gemini")
-                raise Exception("Empty response from Gemini")
+            prompt = self._build_prompt(developer_data)
+            
+            cache_key = self.cache.make_key(prompt, MODEL_NAME, GENERATION_CONFIG)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info("Serving recommendations from prompt cache")
+                return cached
+            
+            estimated_tokens = estimate_tokens(prompt) + GENERATION_CONFIG['max_output_tokens']
+            with gemini_scheduler.slot(estimated_tokens, self.priority) as slot:
+                logger.info("Sending prompt to Gemini")
+                started = time.monotonic()
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=GENERATION_CONFIG
+                )
+                latency = time.monotonic() - started
+                log_prompt_call('recommendations', prompt, response, latency)
+                
+                if not response or not response.text:
+                    logger.error("Empty response from Gemini")
+                    raise Exception("Empty response from Gemini")
+                slot.record(response_token_count(response, prompt, response.text))
             
             # Parse the response into structured recommendations
-            recommendations = []
-            current_recommendation = None
-            
-            for line in response.text.split('\n'):
-                if line.strip().startswith('<h6>'):
-                    if current_recommendation:
-                        recommendations.append(current_recommendation)
-                    current_recommendation = {
-                        'title': line.strip().replace('<h6>', '').replace('</h6>', ''),
-                        'description': '',
-                        'steps': []
-                    }
-                elif line.strip().startswith('<p>'):
-                    if current_recommendation:
-                        current_recommendation['description'] = line.strip().replace('<p>', '').replace('</p>', '')
-                elif line.strip().startswith('<li>'):
-                    if current_recommendation:
-                        current_recommendation['steps'].append(line.strip().replace('<li>', '').replace('</li>', ''))
+            recommendations = parse_recommendations(response.text)
             
-            if current_recommendation:
-                recommendations.append(current_recommendation)
-            
-            return {
+            result = {
                 'recommendations': recommendations,
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
+            self.cache.put(cache_key, result,
+                           tokens=response_token_count(response, prompt, response.text),
+                           latency_seconds=latency)
+            return result
             
         except Exception as e:
             logger.error(f"Error getting recommendations: {str(e)}")
@@ -104,25 +103,147 @@ class GeminiRecommendations:
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
 
+    def get_batch_recommendations(self, developers, token_budget=BATCH_TOKEN_BUDGET):
+        """Get recommendations for several developers in as few Gemini calls as possible
+
+        developers maps user_id to a developer profile. Profiles are packed
+        into batched requests sized to token_budget, and each result is cached
+        under that developer's single-request prompt. Developers missing from a
+        batched response fall back to get_recommendations.
+        """
+        results = {}
+        pending = {}
+        for user_id, developer_data in developers.items():
+            cache_key = self.cache.make_key(self._build_prompt(developer_data), MODEL_NAME, GENERATION_CONFIG)
+            cached = self.cache.get(cache_key)
+            if cached:
+                results[user_id] = cached
+            else:
+                pending[user_id] = developer_data
+        
+        batches = self._plan_batches(pending, token_budget)
+        logger.info(f"Generating recommendations for {len(pending)} developers in {len(batches)} batched requests")
+        for batch in batches:
+            results.update(self._generate_batch(batch))
+        
+        for user_id, developer_data in pending.items():
+            if not results.get(user_id, {}).get('recommendations'):
+                logger.warning(f"Batched response had no recommendations for {user_id}, requesting individually")
+                results[user_id] = self.get_recommendations(developer_data)
+        
+        return results
+
+    def _plan_batches(self, developers, token_budget):
+        """Split developers into batches whose prompt and expected output fit the token budget"""
+        header_tokens = estimate_tokens(self._build_batch_prompt({}))
+        batches = []
+        current = {}
+        used = header_tokens
+        for user_id, developer_data in developers.items():
+            cost = estimate_tokens(self._format_developer_section(user_id, developer_data)) + BATCH_OUTPUT_TOKENS_PER_DEVELOPER
+            output_full = (len(current) + 1) * BATCH_OUTPUT_TOKENS_PER_DEVELOPER > MAX_OUTPUT_TOKENS
+            if current and (used + cost > token_budget or output_full):
+                batches.append(current)
+                current = {}
+                used = header_tokens
+            current[user_id] = developer_data
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _generate_batch(self, batch):
+        """Send one batched request and split the response per developer"""
+        prompt = self._build_batch_prompt(batch)
+        generation_config = dict(
+            GENERATION_CONFIG,
+            max_output_tokens=min(MAX_OUTPUT_TOKENS, BATCH_OUTPUT_TOKENS_PER_DEVELOPER * len(batch) + 256)
+        )
+        try:
+            estimated_tokens = estimate_tokens(prompt) + generation_config['max_output_tokens']
+            with gemini_scheduler.slot(estimated_tokens, self.priority) as slot:
+                logger.info(f"Sending batched prompt to Gemini for {len(batch)} developers")
+                started = time.monotonic()
+                response = self.model.generate_content(prompt, generation_config=generation_config)
+                latency = time.monotonic() - started
+                log_prompt_call('batch recommendations', prompt, response, latency)
+                if not response or not response.text:
+                    raise Exception("Empty response from Gemini")
+                slot.record(response_token_count(response, prompt, response.text))
+        except Exception as e:
+            logger.error(f"Error getting batched recommendations: {str(e)}")
+            logger.error(traceback.format_exc())
+            return {}
+        
+        sections = parse_recommendations_by_developer(response.text)
+        timestamp = datetime.now(timezone.utc).isoformat()
+        tokens_per_developer = response_token_count(response, prompt, response.text) // len(batch)
+        results = {}
+        for user_id, developer_data in batch.items():
+            if user_id not in sections:
+                continue
+            result = {
+                'recommendations': sections[user_id],
+                'timestamp': timestamp
+            }
+            if result['recommendations']:
+                cache_key = self.cache.make_key(self._build_prompt(developer_data), MODEL_NAME, GENERATION_CONFIG)
+                self.cache.put(cache_key, result,
+                               tokens=tokens_per_developer,
+                               latency_seconds=latency / len(batch))
+            results[user_id] = result
+        return results
+
+    def _format_developer_section(self, user_id, developer_data):
+        """Format one developer profile for a batched prompt"""
+        return format_developer_section(user_id, developer_data)
+
+    def _build_batch_prompt(self, batch):
+        """Format a prompt covering several developer profiles"""
+        return build_batch_prompt(batch)
+
+    def _build_prompt(self, developer_data):
+        """Format the prompt based on developer data"""
+        return build_recommendations_prompt(developer_data)
+
     def analyze_image_with_gemini(self, image_path, prompt):
-        """Analyze an image using Gemini Vision"""
+        """Analyze an image using Gemini Vision
+
+        Results are cached per (image content hash, prompt), and the image is
+        uploaded only when no unexpired remote copy of the same content exists.
+        """
         try:
             logger.info(f"Analyzing image: {image_path}")
             
-            # Load and process the image
-            image = genai.upload_file(image_path)
+            content_hash = self.uploads.content_hash(image_path)
+            cache_key = self.cache.make_key({'image': content_hash, 'prompt': prompt}, MODEL_NAME)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info("Serving image analysis from prompt cache")
+                return cached
             
-            # Generate content with the image
-            response = self.model.generate_content([prompt, image])
+            # Reuse or upload the downscaled image
+            image = self.uploads.get_file(image_path, self.backend, content_hash)
             
-            if not response or not response.text:
-                logger.error("Empty response from Gemini Vision")
-                raise Exception("Empty response from Gemini Vision")
-            
-            return {
+            # Generate content with the image
+            estimated_tokens = estimate_tokens(prompt) + IMAGE_TOKENS + GENERATION_CONFIG['max_output_tokens']
+            with gemini_scheduler.slot(estimated_tokens, self.priority) as slot:
+                started = time.monotonic()
+                response = self.model.generate_content([prompt, image])
+                latency = time.monotonic() - started
+                
+                if not response or not response.text:
+                    logger.error("Empty response from Gemini Vision")
+                    raise Exception("Empty response from Gemini Vision")
+                tokens = response_token_count(response, prompt, response.text) + IMAGE_TOKENS
+                slot.record(tokens)
+            
+            result = {
                 'response': response.text,
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
+            self.cache.put(cache_key, result, tokens=tokens, latency_seconds=latency)
+            return result
             
         except Exception as e:
             logger.error(f"Error analyzing image: {str(e)}")
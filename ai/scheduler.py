@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+class QueueFullError(Exception):
+    """Raised when too many Gemini calls are already waiting for quota"""
+
+class SchedulerTimeout(Exception):
+    """Raised when a Gemini call waited longer than its allowed queueing delay"""
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_second up to capacity"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        """Add the tokens accrued since the last refill"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 when available now)"""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate_per_second)
+
+    def take(self, amount: float):
+        """Remove tokens; the level may go negative when actual usage exceeds the estimate"""
+        self.level -= amount
+
+class _Slot:
+    """A granted Gemini call; record() settles the token estimate with actual usage"""
+
+    def __init__(self, scheduler: 'GeminiScheduler', estimated_tokens: int):
+        self.scheduler = scheduler
+        self.estimated_tokens = estimated_tokens
+
+    def record(self, actual_tokens: int):
+        self.scheduler._settle(self.estimated_tokens, actual_tokens)
+        self.estimated_tokens = actual_tokens
+
+class GeminiScheduler:
+    """Shared client-side rate limiter for all Gemini traffic
+
+    Calls wait in a bounded priority queue until both the request bucket and
+    the token bucket have room, so bursts queue locally instead of hitting
+    the API quota and coming back as 429s. Interactive dashboard calls are
+    always served before background sync calls.
+    """
+
+    def __init__(self, requests_per_minute: float = 15, tokens_per_minute: float = 1_000_000,
+                 max_queue: int = 64, max_wait_seconds: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute / 60.0, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stats = {
+            name: {'granted': 0, 'rejected': 0, 'timed_out': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    @contextmanager
+    def slot(self, estimated_tokens: int, priority: int = PRIORITY_INTERACTIVE,
+             max_wait_seconds: Optional[float] = None):
+        """Wait for quota, then yield a slot whose record() reports actual token usage"""
+        self.acquire(estimated_tokens, priority, max_wait_seconds)
+        yield _Slot(self, estimated_tokens)
+
+    def acquire(self, estimated_tokens: int, priority: int = PRIORITY_INTERACTIVE,
+                max_wait_seconds: Optional[float] = None):
+        """Block until a call of estimated_tokens may be sent"""
+        stats = self._stats[PRIORITY_NAMES[priority]]
+        max_wait = self.max_wait_seconds if max_wait_seconds is None else max_wait_seconds
+        started = time.monotonic()
+        deadline = started + max_wait
+
+        with self._condition:
+            if len(self._waiters) >= self.max_queue:
+                stats['rejected'] += 1
+                raise QueueFullError(f"{len(self._waiters)} Gemini calls already waiting for quota")
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    if self._waiters[0] == entry:
+                        wait = max(self.requests.time_until(1), self.tokens.time_until(estimated_tokens))
+                        if wait == 0:
+                            self.requests.take(1)
+                            self.tokens.take(min(estimated_tokens, self.tokens.capacity))
+                            break
+                    else:
+                        wait = deadline - now
+                    if now >= deadline:
+                        stats['timed_out'] += 1
+                        raise SchedulerTimeout(f"Waited {now - started:.1f}s for Gemini quota")
+                    self._condition.wait(min(wait, deadline - now))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+        waited = time.monotonic() - started
+        with self._condition:
+            stats['granted'] += 1
+            stats['total_wait'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+        if waited > 1.0:
+            logger.info(f"Gemini call waited {waited:.2f}s for quota ({PRIORITY_NAMES[priority]})")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queueing delay and admission counters per priority class"""
+        with self._condition:
+            result = {'queue_depth': len(self._waiters)}
+            for name, stats in self._stats.items():
+                granted = stats['granted']
+                result[name] = {
+                    'granted': granted,
+                    'rejected': stats['rejected'],
+                    'timed_out': stats['timed_out'],
+                    'avg_wait_seconds': round(stats['total_wait'] / granted, 4) if granted else 0.0,
+                    'max_wait_seconds': round(stats['max_wait'], 4)
+                }
+            return result
+
+    def _settle(self, estimated_tokens: int, actual_tokens: int):
+        """Charge or refund the difference between estimated and actual tokens"""
+        with self._condition:
+            self.tokens.refill(time.monotonic())
+            self.tokens.take(actual_tokens - estimated_tokens)
+            self._condition.notify_all()
+
+# Shared scheduler for all Gemini callers in this process
+gemini_scheduler = GeminiScheduler(
+    requests_per_minute=float(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '15')),
+    tokens_per_minute=float(os.getenv('GEMINI_TOKENS_PER_MINUTE', '1000000')),
+    max_queue=int(os.getenv('GEMINI_MAX_QUEUE', '64')),
+    max_wait_seconds=float(os.getenv('GEMINI_MAX_WAIT_SECONDS', '30'))
+)
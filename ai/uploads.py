@@ -0,0 +1,196 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+# Pillow is optional; without it images are uploaded as they are
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Gemini deletes uploaded files after 48 hours
+FILE_RETENTION_SECONDS = 48 * 3600
+# Upload again this long before the remote copy expires
+EXPIRY_MARGIN_SECONDS = 3600
+
+MAX_IMAGE_DIMENSION = int(os.getenv('GEMINI_IMAGE_MAX_DIMENSION', '1024'))
+JPEG_QUALITY = int(os.getenv('GEMINI_IMAGE_JPEG_QUALITY', '85'))
+
+def file_content_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def downscale_image(path: str, max_dimension: int = MAX_IMAGE_DIMENSION,
+                    quality: int = JPEG_QUALITY) -> Optional[Tuple[bytes, str, str]]:
+    """Shrink an image to max_dimension and re-encode it for upload
+
+    Returns (data, mime_type, suffix), or None when Pillow is missing or the
+    re-encoded image would not be smaller than the original file.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            image.thumbnail((max_dimension, max_dimension))
+            buffer = io.BytesIO()
+            if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+                # Keep transparency; JPEG would flatten it
+                image.save(buffer, format='PNG', optimize=True)
+                mime_type, suffix = 'image/png', '.png'
+            else:
+                image.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
+                mime_type, suffix = 'image/jpeg', '.jpg'
+    except Exception as e:
+        logger.warning(f"Could not downscale {path}, uploading original: {str(e)}")
+        return None
+    data = buffer.getvalue()
+    if len(data) >= os.path.getsize(path):
+        return None
+    return data, mime_type, suffix
+
+class ImageUploadCache:
+    """Index of images already uploaded to Gemini, keyed by content hash
+
+    An image is hashed (memoized by path, size and mtime), downscaled and
+    uploaded once; later requests for the same content reuse the remote file
+    handle until shortly before Gemini expires it. Handles are mirrored to
+    MongoDB when a manager is attached, so other processes can reuse them.
+    """
+
+    def __init__(self, mongo_manager=None, max_dimension: int = MAX_IMAGE_DIMENSION,
+                 quality: int = JPEG_QUALITY):
+        self.mongo_manager = mongo_manager
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._upload_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._uploads = 0
+        self._reused = 0
+        self._bytes_saved = 0
+
+    def attach_mongo(self, mongo_manager):
+        """Share file handles through MongoDB"""
+        self.mongo_manager = mongo_manager
+
+    def content_hash(self, path: str) -> str:
+        """Content hash of a file, re-read only when the file changes"""
+        stat = os.stat(path)
+        signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(signature)
+        if cached:
+            return cached
+        content_hash = file_content_hash(path)
+        with self._lock:
+            self._hashes[signature] = content_hash
+        return content_hash
+
+    def get_file(self, path: str, backend, content_hash: Optional[str] = None):
+        """Get a file handle for an image from backend, uploading it only if needed"""
+        content_hash = content_hash or self.content_hash(path)
+        handle = self._lookup(content_hash, backend)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            upload_lock = self._upload_locks.setdefault(content_hash, threading.Lock())
+        with upload_lock:
+            # Another thread may have uploaded it while we waited
+            handle = self._lookup(content_hash, backend)
+            if handle is None:
+                handle = self._upload(path, content_hash, backend)
+        return handle
+
+    def stats(self) -> Dict[str, Any]:
+        """Upload counters"""
+        with self._lock:
+            return {
+                'files': len(self._files),
+                'uploads': self._uploads,
+                'reused': self._reused,
+                'bytes_saved_by_downscaling': self._bytes_saved
+            }
+
+    def _lookup(self, content_hash: str, backend):
+        """Find an unexpired handle in memory, then in MongoDB"""
+        now = time.time()
+        with self._lock:
+            record = self._files.get(content_hash)
+            if record and record['expires_at'] - EXPIRY_MARGIN_SECONDS > now:
+                self._reused += 1
+                return record['handle']
+
+        if not self.mongo_manager:
+            return None
+        stored = self.mongo_manager.get_uploaded_file(content_hash)
+        if not stored:
+            return None
+        # MongoDB returns naive UTC datetimes
+        expires_at = stored['expires_at'].replace(tzinfo=timezone.utc).timestamp()
+        if expires_at - EXPIRY_MARGIN_SECONDS <= now:
+            return None
+        try:
+            handle = backend.get_file(stored['name'])
+        except Exception as e:
+            logger.warning(f"Stored Gemini file {stored['name']} is unavailable: {str(e)}")
+            return None
+        with self._lock:
+            self._files[content_hash] = {'handle': handle, 'expires_at': expires_at}
+            self._reused += 1
+        return handle
+
+    def _upload(self, path: str, content_hash: str, backend):
+        """Downscale and upload an image, then remember its handle"""
+        original_size = os.path.getsize(path)
+        prepared = downscale_image(path, self.max_dimension, self.quality)
+        if prepared is None:
+            handle = backend.upload_file(path)
+            uploaded_size = original_size
+        else:
+            data, mime_type, suffix = prepared
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                tmp.write(data)
+            try:
+                handle = backend.upload_file(tmp.name, mime_type=mime_type)
+            finally:
+                os.remove(tmp.name)
+            uploaded_size = len(data)
+        logger.info(f"Uploaded {path} to Gemini ({uploaded_size} of {original_size} bytes)")
+
+        expiration = getattr(handle, 'expiration_time', None)
+        if isinstance(expiration, datetime):
+            if expiration.tzinfo is None:
+                expiration = expiration.replace(tzinfo=timezone.utc)
+        else:
+            expiration = datetime.now(timezone.utc) + timedelta(seconds=FILE_RETENTION_SECONDS)
+
+        with self._lock:
+            self._files[content_hash] = {'handle': handle, 'expires_at': expiration.timestamp()}
+            self._uploads += 1
+            self._bytes_saved += original_size - uploaded_size
+        if self.mongo_manager:
+            self.mongo_manager.save_uploaded_file(content_hash, {
+                'name': handle.name,
+                'uri': getattr(handle, 'uri', None),
+                'expires_at': expiration
+            })
+        return handle
+
+# Shared upload index for all Gemini callers in this process
+image_uploads = ImageUploadCache()
@@ -1,9 +1,24 @@
 from .gitlab_integration import GitLabIntegration
-from datetime import datetime, timedelta
+from .project_collector import (DEFAULT_PIPELINE_SUCCESS_RATE, DEFAULT_REVIEW_PARTICIPATION, language_breakdown,
+                                pipeline_success_rate, review_participation)
+from utils.activity_metrics import COMMIT, MERGE_REQUEST, ISSUE, ActivityRecords, aggregate
+from utils.rolling_metrics import rolling_metrics
+from utils.event_arrays import EventArrays, DEFAULT_WINDOWS, activity_stats
+from datetime import datetime, timedelta, timezone
+from itertools import dropwhile, islice
+import base64
+import json
 import logging
 import os
 import requests
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+HISTORY_KINDS = ('commits', 'merge_requests', 'issues')
+# Projects listed on the dashboard
+PROJECTS_SHOWN = 5
+# Most recently touched projects whose data feeds a developer's pipeline, review and language metrics
+PROJECTS_COLLECTED = int(os.getenv('GITLAB_PROJECTS_PER_DEVELOPER', '5'))
 
 class GitLabAPI:
     def __init__(self):
@@ -15,10 +30,28 @@ class GitLabAPI:
         self.headers = {
             'PRIVATE-TOKEN': self.access_token
         }
+        # Raw historical items per username, sorted newest first at ingestion. The lists are
+        # never mutated once indexed, so readers can iterate them lazily; writers swap in new ones
+        self._history_index: Dict[str, Dict[str, List[Dict]]] = {}
+        self._history_lock = threading.Lock()
+        # Usernames by GitLab user id, for webhooks that only carry ids
+        self._usernames: Dict[Any, str] = {}
+        # Incrementally maintained activity counts, rebuilt on every full fetch
+        self.rolling_metrics = rolling_metrics
+        # Per-project pipelines, commits, MRs and languages, shared by developers on a project
+        self.projects = self.gitlab.projects
         logging.info(f"Initialized with base URL: {self.base_url}")
         
-    def get_developer_metrics(self, username: str) -> Dict[str, Any]:
-        """Get comprehensive metrics for a developer"""
+    def get_developer_metrics(self, username: str, include_history: bool = True,
+                              history_limit: Optional[int] = None, collect_projects: bool = False) -> Dict[str, Any]:
+        """Get comprehensive metrics for a developer
+
+        Historical lists are only formatted when include_history is set, and
+        history_limit caps each list to its newest entries. Pipeline, review
+        and language metrics use the last collected project data; only the
+        sync job sets collect_projects to wait for fresh data, other callers
+        get whatever is cached and a background refresh of the rest.
+        """
         try:
             # Get user details
             user = self._get_user_details(username)
@@ -26,7 +59,7 @@ class GitLabAPI:
                 return self._get_mock_metrics(username)
 
             # Get historical data (last 3 months)
-            end_date = datetime.now()
+            end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=90)
             
             # Get historical commits
@@ -38,35 +71,174 @@ class GitLabAPI:
             # Get historical issues
             issues = self._get_historical_issues(user['id'], start_date, end_date)
             
-            # Calculate metrics
+            with self._history_lock:
+                self._history_index[username] = {
+                    'commits': commits,
+                    'merge_requests': merge_requests,
+                    'issues': issues
+                }
+
+            # Only the projects the developer recently worked or reviewed in
+            reviewed = self._get_reviewed_merge_requests(user['id'], start_date, end_date)
+            project_ids = self._touched_project_ids(commits, merge_requests, issues, reviewed)
+            if collect_projects:
+                project_data = self.projects.collect(project_ids)
+            else:
+                project_data = self.projects.cached(project_ids)
+                self.projects.refresh(project_ids)
+            
+            # Calculate metrics, parsing each item's timestamps once
+            records = (ActivityRecords(COMMIT, commits), ActivityRecords(MERGE_REQUEST, merge_requests),
+                       ActivityRecords(ISSUE, issues))
+            activity = aggregate(*records, end_date)
+            self.rolling_metrics.rebuild(username, *records, now=end_date)
             metrics = {
-                'commits_this_week': len([c for c in commits if (end_date - datetime.fromisoformat(c['created_at'].replace('Z', '+00:00'))).days <= 7]),
-                'merge_requests_open': len([mr for mr in merge_requests if mr['state'] == 'opened']),
-                'merge_requests_merged': len([mr for mr in merge_requests if mr['state'] == 'merged']),
-                'issues_assigned': len([i for i in issues if i['state'] == 'opened']),
-                'issues_closed': len([i for i in issues if i['state'] == 'closed']),
-                'productivity_score': self._calculate_productivity_score(commits, merge_requests, issues),
-                'collaboration_score': self._calculate_collaboration_score(merge_requests, issues),
-                'pipeline_success_rate': self._calculate_pipeline_success_rate(user['id']),
+                'commits_this_week': activity['commits_this_week'],
+                'merge_requests_open': activity['merge_requests_open'],
+                'merge_requests_merged': activity['merge_requests_merged'],
+                'issues_assigned': activity['issues_assigned'],
+                'issues_closed': activity['issues_closed'],
+                'productivity_score': activity['productivity_score'],
+                'collaboration_score': activity['collaboration_score'],
+                'pipeline_success_rate': self._calculate_pipeline_success_rate(username, project_data),
                 'gitlab_projects': self._get_user_projects(user['id']),
-                'recent_activity': self._get_recent_activity(commits, merge_requests, issues),
-                'weekly_contribution_trend': self._calculate_weekly_trend(commits, merge_requests, issues),
-                'language_breakdown': self._get_language_breakdown(user['id']),
-                'lines_of_code': self._calculate_lines_of_code(commits),
-                'avg_merge_time_hours': self._calculate_avg_merge_time(merge_requests),
-                'code_review_participation': self._calculate_review_participation(user['id']),
-                'historical_data': {
-                    'commits': self._format_historical_data(commits),
-                    'merge_requests': self._format_historical_data(merge_requests),
-                    'issues': self._format_historical_data(issues)
-                }
+                'recent_activity': activity['recent_activity'],
+                'weekly_contribution_trend': activity['weekly_contribution_trend'],
+                'language_breakdown': self._get_language_breakdown(project_data),
+                'lines_of_code': activity['lines_of_code'],
+                'avg_merge_time_hours': activity['avg_merge_time_hours'],
+                'code_review_participation': self._calculate_review_participation(user['id'], project_data)
             }
             
+            if include_history:
+                metrics['historical_data'] = {
+                    'commits': self._format_historical_data(commits, history_limit),
+                    'merge_requests': self._format_historical_data(merge_requests, history_limit),
+                    'issues': self._format_historical_data(issues, history_limit)
+                }
+            
             return metrics
         except Exception as e:
             logging.error(f"Error getting metrics for {username}: {str(e)}")
             return self._get_mock_metrics(username)
 
+    def get_live_metrics(self, username: str) -> Optional[Dict[str, Any]]:
+        """This week's commits, weekly trend and activity scores from the incremental state
+
+        Constant time whatever the history length; None until the developer's
+        metrics were fetched in full once.
+        """
+        return self.rolling_metrics.read(username)
+
+    def get_historical_page(self, username: str, kind: str, cursor: Optional[str] = None,
+                            limit: int = 50, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get one page of formatted historical items for a developer
+
+        Pages are keyed by an opaque cursor naming the last item of the previous
+        page, so new activity arriving between requests does not shift pages.
+        """
+        if kind not in HISTORY_KINDS:
+            raise ValueError(f"Unknown history kind: {kind}")
+        items = self._get_history_items(username, kind)
+        if cursor:
+            after = self._decode_cursor(cursor)
+            items = dropwhile(lambda item: self._history_key(item) >= after, items)
+        page = list(islice(items, limit + 1))
+        next_cursor = self._encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return {
+            'items': [self._project_fields(self._format_historical_item(item), fields) for item in page[:limit]],
+            'next_cursor': next_cursor
+        }
+
+    def _get_history_items(self, username: str, kind: str) -> List[Dict]:
+        """Get raw historical items, fetching only the requested kind when not indexed"""
+        with self._history_lock:
+            indexed = self._history_index.get(username, {})
+            if kind in indexed:
+                return indexed[kind]
+        user = self._get_user_details(username)
+        if not user:
+            return []
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=90)
+        fetchers = {
+            'commits': self._get_historical_commits,
+            'merge_requests': self._get_historical_merge_requests,
+            'issues': self._get_historical_issues
+        }
+        items = fetchers[kind](user['id'], start_date, end_date)
+        with self._history_lock:
+            self._history_index.setdefault(username, {})[kind] = items
+        return items
+
+    def get_activity_arrays(self, username: str) -> EventArrays:
+        """A developer's historical items as NumPy event arrays"""
+        items = [self._get_history_items(username, kind) for kind in HISTORY_KINDS]
+        return EventArrays.from_items(*items, owner=username)
+
+    def get_team_activity(self, usernames: List[str], windows=DEFAULT_WINDOWS,
+                          utc_offset_seconds: int = 0) -> Dict[str, Any]:
+        """Trends, activity histograms and merge-time percentiles for several developers at once"""
+        arrays = {username: self.get_activity_arrays(username) for username in usernames}
+        return activity_stats(arrays, windows=windows, utc_offset_seconds=utc_offset_seconds)
+
+    def record_history_item(self, username: str, kind: str, item: Dict) -> Optional[Dict]:
+        """Insert or replace one raw item in an indexed history, keeping it newest first
+
+        Used for webhook events; returns the item it replaced, None when it
+        is new or the developer's history of that kind is not indexed.
+        """
+        with self._history_lock:
+            indexed = self._history_index.get(username, {})
+            if indexed.get(kind) is None:
+                return None
+            # Copy on write: requests may be iterating the current list
+            items = list(indexed[kind])
+            previous = None
+            for i, existing in enumerate(items):
+                if existing.get('id') == item.get('id'):
+                    previous = items.pop(i)
+                    break
+            key = self._history_key(item)
+            position = next((i for i, existing in enumerate(items) if self._history_key(existing) < key), len(items))
+            items.insert(position, item)
+            indexed[kind] = items
+            return previous
+
+    def username_for_id(self, user_id: Any) -> Optional[str]:
+        """Username of a GitLab user id seen in an earlier user lookup"""
+        return self._usernames.get(user_id)
+
+    @staticmethod
+    def _history_key(item: Dict) -> Tuple[str, str]:
+        """Sort key for historical items (newest first when reversed)"""
+        return (item.get('created_at') or '', str(item.get('id', '')))
+
+    def _sort_newest_first(self, items: List[Dict]) -> List[Dict]:
+        """Sort items once at ingestion so pages and formatting can stream them"""
+        items.sort(key=self._history_key, reverse=True)
+        return items
+
+    def _encode_cursor(self, item: Dict) -> str:
+        """Encode the position after an item as an opaque cursor"""
+        raw = json.dumps(list(self._history_key(item))).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def _decode_cursor(self, cursor: str) -> Tuple[str, str]:
+        """Decode a cursor produced by _encode_cursor"""
+        try:
+            created_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return (str(created_at), str(item_id))
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _project_fields(item: Dict, fields: Optional[List[str]]) -> Dict:
+        """Keep only the requested fields of a formatted item"""
+        if not fields:
+            return item
+        return {k: v for k, v in item.items() if k in fields}
+
     def _get_historical_commits(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
         """Get historical commits for a user"""
         commits = []
@@ -90,7 +262,7 @@ class GitLabAPI:
                 break
             commits.extend(data)
             page += 1
-        return commits
+        return self._sort_newest_first(commits)
 
     def _get_historical_merge_requests(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
         """Get historical merge requests for a user"""
@@ -115,7 +287,7 @@ class GitLabAPI:
                 break
             merge_requests.extend(data)
             page += 1
-        return merge_requests
+        return self._sort_newest_first(merge_requests)
 
     def _get_historical_issues(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
         """Get historical issues for a user"""
@@ -140,23 +312,94 @@ class GitLabAPI:
                 break
             issues.extend(data)
             page += 1
-        return issues
+        return self._sort_newest_first(issues)
+
+    def get_duration_items(self, username: str) -> Dict[str, List[Dict]]:
+        """Get the last 90 days of a developer's MRs, reviewed MRs and pipelines for duration sketches"""
+        user = self._get_user_details(username)
+        if not user:
+            return {}
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=90)
+        reviewed = self._get_reviewed_merge_requests(user['id'], start_date, end_date)
+        return {
+            'merge_requests': self._get_history_items(username, 'merge_requests'),
+            'reviewed_merge_requests': reviewed,
+            'pipelines': self._get_user_pipelines(username, reviewed)
+        }
+
+    def _get_all_pages(self, path: str, params: Dict[str, Any]) -> List[Dict]:
+        """Get every page of a GitLab list endpoint"""
+        items = []
+        page = 1
+        while True:
+            response = requests.get(
+                f"{self.base_url}{path}",
+                headers=self.headers,
+                params={**params, 'per_page': 100, 'page': page}
+            )
+            if response.status_code != 200:
+                break
+            data = response.json()
+            if not data:
+                break
+            items.extend(data)
+            page += 1
+        return items
+
+    def _get_reviewed_merge_requests(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Get merge requests a user was reviewer on"""
+        return self._get_all_pages('/merge_requests', {
+            'reviewer_id': user_id,
+            'scope': 'all',
+            'created_after': start_date.isoformat(),
+            'created_before': end_date.isoformat()
+        })
+
+    def _get_user_pipelines(self, username: str, reviewed: List[Dict]) -> List[Dict]:
+        """Get pipelines a user triggered in the projects they touched over the collector's 90-day window"""
+        project_ids = self._touched_project_ids(*(self._get_history_items(username, kind) for kind in HISTORY_KINDS),
+                                                reviewed)
+        project_data = self.projects.collect(project_ids)
+        return [pipeline for data in project_data.values() for pipeline in data['pipelines']
+                if (pipeline.get('user') or {}).get('username') == username]
+
+    @staticmethod
+    def _touched_project_ids(*item_lists: List[Dict]) -> List[int]:
+        """Ids of the projects in the given activity, most recent first, capped at PROJECTS_COLLECTED"""
+        newest = {}
+        for items in item_lists:
+            for item in items:
+                project_id = item.get('project_id')
+                if project_id is not None:
+                    stamp = item.get('created_at') or ''
+                    newest[project_id] = max(newest.get(project_id, ''), stamp)
+        return sorted(newest, key=newest.get, reverse=True)[:PROJECTS_COLLECTED]
 
-    def _format_historical_data(self, items: List[Dict]) -> List[Dict]:
-        """Format historical data for display"""
-        formatted_items = []
+    def _format_historical_data(self, items: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+        """Format historical data for display
+
+        Items are already sorted newest first at ingestion, so only the
+        requested prefix is formatted.
+        """
+        return list(islice(self._iter_historical_data(items), limit))
+
+    def _iter_historical_data(self, items: List[Dict]) -> Iterator[Dict]:
+        """Lazily format historical items in their stored order"""
         for item in items:
-            formatted_item = {
-                'id': item.get('id'),
-                'title': item.get('title', ''),
-                'created_at': item.get('created_at', ''),
-                'state': item.get('state', ''),
-                'type': 'commit' if 'commit' in item else 'merge_request' if 'merge_request' in item else 'issue',
-                'description': item.get('description', '')[:100] + '...' if item.get('description') else '',
-                'url': item.get('web_url', '')
-            }
-            formatted_items.append(formatted_item)
-        return sorted(formatted_items, key=lambda x: x['created_at'], reverse=True)
+            yield self._format_historical_item(item)
+
+    def _format_historical_item(self, item: Dict) -> Dict:
+        """Format a single historical item for display"""
+        return {
+            'id': item.get('id'),
+            'title': item.get('title', ''),
+            'created_at': item.get('created_at', ''),
+            'state': item.get('state', ''),
+            'type': 'commit' if 'commit' in item else 'merge_request' if 'merge_request' in item else 'issue',
+            'description': item.get('description', '')[:100] + '...' if item.get('description') else '',
+            'url': item.get('web_url', '')
+        }
 
     def _is_this_week(self, date_str):
         """Check if date is within this week"""
@@ -277,7 +520,7 @@ class GitLabAPI:
         users = ['dev1', 'dev2', 'dev3', 'dev4']
         
         for user in users:
-            team_data[user] = self.get_developer_metrics(user)
+            team_data[user] = self.get_developer_metrics(user, include_history=False)
         
         return team_data
 
@@ -333,6 +576,8 @@ class GitLabAPI:
             )
             if response.status_code == 200:
                 users = response.json()
+                if users:
+                    self._usernames[users[0].get('id')] = username
                 return users[0] if users else None
             return None
         except Exception as e:
@@ -340,12 +585,12 @@ class GitLabAPI:
             return None
 
     def _get_user_projects(self, user_id: int) -> List[Dict]:
-        """Get user's projects from GitLab"""
+        """Get the user's first projects from GitLab, for display"""
         try:
             response = requests.get(
                 f"{self.base_url}/users/{user_id}/projects",
                 headers=self.headers,
-                params={'per_page': 5}
+                params={'per_page': PROJECTS_SHOWN}
             )
             if response.status_code == 200:
                 return response.json()
@@ -375,23 +620,15 @@ class GitLabAPI:
             logging.error(f"Error calculating collaboration score: {str(e)}")
             return 5.0
 
-    def _calculate_pipeline_success_rate(self, user_id: int) -> float:
-        """Calculate pipeline success rate"""
+    def _calculate_pipeline_success_rate(self, username: str, project_data: Dict[int, Dict]) -> float:
+        """Calculate the success rate of the user's finished pipelines across the projects they touched"""
         try:
-            response = requests.get(
-                f"{self.base_url}/users/{user_id}/pipelines",
-                headers=self.headers,
-                params={'per_page': 100}
-            )
-            if response.status_code == 200:
-                pipelines = response.json()
-                successful = len([p for p in pipelines if p['status'] == 'success'])
-                total = len(pipelines)
-                return successful / total if total > 0 else 0.85
-            return 0.85
+            rate = pipeline_success_rate(
+                (pipeline for data in project_data.values() for pipeline in data['pipelines']), username)
+            return rate if rate is not None else DEFAULT_PIPELINE_SUCCESS_RATE
         except Exception as e:
             logging.error(f"Error calculating pipeline success rate: {str(e)}")
-            return 0.85
+            return DEFAULT_PIPELINE_SUCCESS_RATE
 
     def _get_recent_activity(self, commits: List[Dict], merge_requests: List[Dict], issues: List[Dict]) -> List[Dict]:
         """Get recent activity from all sources"""
@@ -427,7 +664,7 @@ class GitLabAPI:
         """Calculate weekly contribution trend"""
         try:
             trend = [0] * 7
-            today = datetime.now()
+            today = datetime.now(timezone.utc)
             
             # Process commits
             for commit in commits:
@@ -455,28 +692,10 @@ class GitLabAPI:
             logging.error(f"Error calculating weekly trend: {str(e)}")
             return [0] * 7
 
-    def _get_language_breakdown(self, user_id: int) -> Dict[str, int]:
+    def _get_language_breakdown(self, project_data: Dict[int, Dict]) -> Dict[str, int]:
         """Get language breakdown from user's projects"""
         try:
-            projects = self._get_user_projects(user_id)
-            languages = {}
-            
-            for project in projects:
-                response = requests.get(
-                    f"{self.base_url}/projects/{project['id']}/languages",
-                    headers=self.headers
-                )
-                if response.status_code == 200:
-                    project_languages = response.json()
-                    for lang, percentage in project_languages.items():
-                        languages[lang] = languages.get(lang, 0) + percentage
-            
-            # Normalize percentages
-            total = sum(languages.values())
-            if total > 0:
-                languages = {k: int((v / total) * 100) for k, v in languages.items()}
-            
-            return languages
+            return language_breakdown(data['languages'] for data in project_data.values())
         except Exception as e:
             logging.error(f"Error getting language breakdown: {str(e)}")
             return {'Python': 45, 'JavaScript': 30, 'TypeScript': 25}
@@ -508,20 +727,12 @@ class GitLabAPI:
             logging.error(f"Error calculating average merge time: {str(e)}")
             return 24.0
 
-    def _calculate_review_participation(self, user_id: int) -> float:
-        """Calculate code review participation rate"""
+    def _calculate_review_participation(self, user_id: int, project_data: Dict[int, Dict]) -> float:
+        """Calculate the share of MRs the user was asked to review (or approved) that they approved"""
         try:
-            response = requests.get(
-                f"{self.base_url}/users/{user_id}/merge_requests",
-                headers=self.headers,
-                params={'scope': 'assigned_to_me'}
-            )
-            if response.status_code == 200:
-                mrs = response.json()
-                reviewed = len([mr for mr in mrs if mr.get('reviewed', False)])
-                total = len(mrs)
-                return reviewed / total if total > 0 else 0.75
-            return 0.75
+            rate = review_participation(
+                (mr for data in project_data.values() for mr in data['merge_requests']), user_id)
+            return rate if rate is not None else DEFAULT_REVIEW_PARTICIPATION
         except Exception as e:
             logging.error(f"Error calculating review participation: {str(e)}")
-            return 0.75
+            return DEFAULT_REVIEW_PARTICIPATION
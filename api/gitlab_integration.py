@@ -3,6 +3,11 @@ import os
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from .project_collector import ProjectCollector
+
+# Personal projects whose recent pipelines and commits are listed
+RECENT_PROJECTS = 5
+
 class GitLabIntegration:
     def __init__(self, access_token: str = None):
         """Initialize with GitLab personal access token"""
@@ -13,6 +18,7 @@ class GitLabIntegration:
         self.headers = {
             "PRIVATE-TOKEN": self.access_token
         }
+        self.projects = ProjectCollector(self.base_url, self.headers)
     
     def get_personal_projects(self) -> List[Dict]:
         """Fetch all personal projects from GitLab"""
@@ -76,12 +82,13 @@ class GitLabIntegration:
         if project_id:
             url = f"{self.base_url}/projects/{project_id}/pipelines"
         else:
-            # Get pipelines from all user projects
-            projects = self.get_personal_projects()
+            # Get pipelines from the first projects, fetched concurrently
+            projects = self.get_personal_projects()[:RECENT_PROJECTS]
+            project_data = self.projects.collect(project['id'] for project in projects)
             all_pipelines = []
-            for project in projects[:5]:  # Limit to first 5 projects
-                project_pipelines = self._get_project_pipelines(project['id'])
-                all_pipelines.extend(project_pipelines)
+            for project_id, data in project_data.items():
+                recent = sorted(data['pipelines'], key=lambda x: x.get('updated_at') or '', reverse=True)[:10]
+                all_pipelines.extend({**pipeline, 'project_id': project_id} for pipeline in recent)
             return all_pipelines
             
         params = {
@@ -98,26 +105,6 @@ class GitLabIntegration:
             print(f"Error fetching pipelines: {e}")
             return []
 
-    def _get_project_pipelines(self, project_id: int) -> List[Dict]:
-        """Get pipelines for a specific project"""
-        url = f"{self.base_url}/projects/{project_id}/pipelines"
-        params = {
-            "per_page": 10,
-            "order_by": "updated_at",
-            "sort": "desc"
-        }
-        
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            pipelines = response.json()
-            # Add project_id to each pipeline for reference
-            for pipeline in pipelines:
-                pipeline['project_id'] = project_id
-            return pipelines
-        except requests.exceptions.RequestException:
-            return []
-
     def get_pipeline_jobs(self, project_id: int, pipeline_id: int) -> List[Dict]:
         """Fetch jobs for a specific pipeline"""
         url = f"{self.base_url}/projects/{project_id}/pipelines/{pipeline_id}/jobs"
@@ -135,12 +122,11 @@ class GitLabIntegration:
         if project_id:
             url = f"{self.base_url}/projects/{project_id}/repository/commits"
         else:
-            # Get commits from all user projects
-            projects = self.get_personal_projects()
+            # Get commits from the first projects, fetched concurrently
+            projects = self.get_personal_projects()[:RECENT_PROJECTS]
             all_commits = []
-            for project in projects[:5]:  # Limit to first 5 projects
-                project_commits = self._get_project_commits(project['id'], since)
-                all_commits.extend(project_commits)
+            for project_id, commits in self.projects.commits((project['id'] for project in projects), since).items():
+                all_commits.extend({**commit, 'project_id': project_id} for commit in commits)
             return sorted(all_commits, key=lambda x: x.get('created_at', ''), reverse=True)[:50]
             
         params = {
@@ -158,27 +144,6 @@ class GitLabIntegration:
             print(f"Error fetching commits: {e}")
             return []
 
-    def _get_project_commits(self, project_id: int, since: str = None) -> List[Dict]:
-        """Get commits for a specific project"""
-        url = f"{self.base_url}/projects/{project_id}/repository/commits"
-        params = {
-            "per_page": 20,
-            "order": "desc"
-        }
-        if since:
-            params["since"] = since
-        
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            commits = response.json()
-            # Add project_id to each commit for reference
-            for commit in commits:
-                commit['project_id'] = project_id
-            return commits
-        except requests.exceptions.RequestException:
-            return []
-
     def format_project_info(self, project: Dict) -> Dict:
         """Format project information for display"""
         return {
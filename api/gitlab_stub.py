@@ -0,0 +1,525 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/v4'
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+LANGUAGES = ('Python', 'JavaScript', 'TypeScript', 'Go', 'Ruby', 'Java', 'Shell', 'HTML', 'CSS', 'SQL')
+JOB_STAGES = (('build', 'compile'), ('test', 'unit-tests'), ('test', 'lint'), ('deploy', 'review-app'))
+
+def _timestamp(value: Optional[str]) -> Optional[str]:
+    """Normalize an ISO date or datetime query value to the stored 'YYYY-MM-DDTHH:MM:SSZ' form"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class _TimeIndex:
+    """Items sorted by created_at for range queries, served newest first"""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = sorted(items, key=lambda item: (item['created_at'], item['id']))
+        self.keys = [item['created_at'] for item in self.items]
+
+    def between(self, after: Optional[str] = None, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        lo = bisect_left(self.keys, after) if after else 0
+        hi = bisect_left(self.keys, before) if before else len(self.items)
+        return self.items[lo:hi][::-1]
+
+def _index(items: List[Dict[str, Any]], key: Callable[[Dict[str, Any]], Any]) -> Dict[Any, _TimeIndex]:
+    groups = defaultdict(list)
+    for item in items:
+        group = key(item)
+        if group is not None:
+            groups[group].append(item)
+    return {group: _TimeIndex(members) for group, members in groups.items()}
+
+class GitLabDataset:
+    """In-memory GitLab data indexed for the endpoints the clients call
+
+    Built from the users and gitlab_* documents of utils.synthetic_data, either
+    loaded from its JSONL output or generated in process. Projects, repository
+    commits, languages, MR approvals and pipeline jobs are derived from those
+    documents.
+    """
+
+    def __init__(self, users: List[Dict[str, Any]], events: List[Dict[str, Any]],
+                 merge_requests: List[Dict[str, Any]], issues: List[Dict[str, Any]],
+                 pipelines: List[Dict[str, Any]], web_url: str = 'https://gitlab.example.com'):
+        self.web_url = web_url.rstrip('/')
+        self.users = {}
+        for user in users:
+            gitlab_id = user.get('gitlab_id', user.get('id'))
+            self.users[gitlab_id] = {
+                'id': gitlab_id,
+                'username': user['user_id'] if 'user_id' in user else user['username'],
+                'name': user.get('name', ''),
+                'state': 'active',
+                'web_url': f"{self.web_url}/{user.get('user_id', user.get('username'))}"
+            }
+        self.users_by_name = {user['username']: user for user in self.users.values()}
+
+        self.events = _index(events, lambda item: item['author_id'])
+        self.merge_requests = _TimeIndex(merge_requests)
+        self.merge_requests_by_author = _index(merge_requests, lambda item: item['author']['id'])
+        self.merge_requests_by_project = _index(merge_requests, lambda item: item['project_id'])
+        reviewed = defaultdict(list)
+        for mr in merge_requests:
+            for reviewer in mr.get('reviewers') or []:
+                reviewed[reviewer['id']].append(mr)
+        self.merge_requests_by_reviewer = {user_id: _TimeIndex(items) for user_id, items in reviewed.items()}
+        self.issues = _TimeIndex(issues)
+        self.issues_by_assignee = _index(issues, lambda item: (item.get('assignee') or {}).get('id'))
+        self.issues_by_project = _index(issues, lambda item: item['project_id'])
+        self.pipelines_by_project = _index(pipelines, lambda item: item['project_id'])
+        self.merge_requests_by_iid = {(item['project_id'], item['iid']): item for item in merge_requests}
+        self.pipelines = {(item['project_id'], item['id']): item for item in pipelines}
+
+        commits = defaultdict(list)
+        members = defaultdict(set)
+        for event in events:
+            push = event.get('push_data') or {}
+            members[event['project_id']].add(event['author_id'])
+            author = self.users.get(event['author_id'], {})
+            commits[event['project_id']].append({
+                'id': push.get('commit_to') or str(event['id']),
+                'short_id': (push.get('commit_to') or str(event['id']))[:8],
+                'title': push.get('commit_title') or event.get('title', ''),
+                'message': push.get('commit_title') or event.get('title', ''),
+                'author_name': author.get('name', ''),
+                'author_email': f"{author.get('username', 'unknown')}@example.com",
+                'created_at': event['created_at'],
+                'committed_date': event['created_at'],
+                'web_url': f"{self.web_url}/projects/{event['project_id']}/-/commit/{push.get('commit_to', '')}"
+            })
+        self.commits_by_project = {project_id: _TimeIndex(items) for project_id, items in commits.items()}
+        self.projects = {}
+        for project_id in sorted(set(commits) | set(self.merge_requests_by_project) | set(self.issues_by_project)):
+            history = commits.get(project_id) or []
+            self.projects[project_id] = {
+                'id': project_id,
+                'name': f"project-{project_id}",
+                'path_with_namespace': f"synthetic/project-{project_id}",
+                'description': f"Synthetic project {project_id}",
+                'created_at': min((c['created_at'] for c in history), default=None),
+                'last_activity_at': max((c['created_at'] for c in history), default=None),
+                'star_count': project_id % 40,
+                'forks_count': project_id % 7,
+                'web_url': f"{self.web_url}/projects/{project_id}",
+                'default_branch': 'main',
+                'visibility': 'private'
+            }
+        self.projects_by_member = defaultdict(list)
+        for project_id, user_ids in members.items():
+            for user_id in user_ids:
+                self.projects_by_member[user_id].append(self.projects[project_id])
+
+    @classmethod
+    def from_jsonl(cls, directory: str, **kwargs) -> 'GitLabDataset':
+        """Load the JSONL files written by utils.synthetic_data"""
+        def read(collection):
+            path = os.path.join(directory, f"{collection}.jsonl")
+            if not os.path.exists(path):
+                return []
+            with open(path, encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        return cls(read('users'), read('gitlab_events'), read('gitlab_merge_requests'),
+                   read('gitlab_issues'), read('gitlab_pipelines'), **kwargs)
+
+    @classmethod
+    def generate(cls, **generator_kwargs) -> 'GitLabDataset':
+        """Generate a dataset in process (see utils.synthetic_data.SyntheticDataGenerator)"""
+        from utils.synthetic_data import SyntheticDataGenerator
+        generator = SyntheticDataGenerator(telemetry_days=0, **generator_kwargs)
+        collections = defaultdict(list)
+        for block in generator.blocks():
+            for name, documents in block.items():
+                collections[name].extend(documents)
+        return cls(collections['users'], collections['gitlab_events'], collections['gitlab_merge_requests'],
+                   collections['gitlab_issues'], collections['gitlab_pipelines'], web_url=generator.web_url)
+
+    def languages(self, project_id: int) -> Dict[str, float]:
+        """Stable per-project language percentages"""
+        rng = random.Random(project_id)
+        chosen = rng.sample(LANGUAGES, rng.randint(1, 4))
+        weights = [rng.random() + 0.1 for _ in chosen]
+        total = sum(weights)
+        return {language: round(100 * weight / total, 2) for language, weight in zip(chosen, weights)}
+
+    def approvals(self, merge_request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Stable approvals of an MR: most reviewers approve what gets merged, few what gets closed"""
+        rng = random.Random(merge_request['id'])
+        chance = {'merged': 0.85, 'closed': 0.3}.get(merge_request['state'], 0.5)
+        return [{'user': reviewer} for reviewer in merge_request.get('reviewers') or [] if rng.random() < chance]
+
+    def jobs(self, pipeline: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Jobs of a pipeline; a failed pipeline fails at its test stage"""
+        jobs = []
+        for i, (stage, name) in enumerate(JOB_STAGES):
+            if pipeline['status'] == 'success':
+                status = 'success'
+            elif pipeline['status'] == 'failed':
+                status = 'failed' if stage == 'test' else 'success' if stage == 'build' else 'skipped'
+            else:
+                status = 'canceled'
+            jobs.append({
+                'id': pipeline['id'] * 10 + i,
+                'name': name,
+                'stage': stage,
+                'status': status,
+                'ref': pipeline['ref'],
+                'created_at': pipeline['created_at'],
+                'duration': round(pipeline.get('duration', 0) / len(JOB_STAGES), 1)
+            })
+        return jobs
+
+class RateLimiter:
+    """Token bucket per client, refilled at rate per second up to burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> Tuple[bool, int, float]:
+        """(allowed, remaining, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(client, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[client] = (tokens, now)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+        return allowed, int(tokens), wait
+
+class GitLabStubServer:
+    """Local HTTP stand-in for the GitLab REST API, for offline benchmarks
+
+    Serves a GitLabDataset under /api/v4 with GitLab's page/per_page
+    pagination and X-Total/X-Next-Page/Link headers, ETags with 304 on
+    If-None-Match, per-token rate limiting (429 with Retry-After and the
+    RateLimit-* headers) and injected latency: latency_ms plus uniform jitter
+    of +/- jitter_ms per request. failure_rate of requests answer 500. All
+    randomness comes from one seeded generator, so runs are reproducible.
+    Point the app at it with GITLAB_API_URL=<base_url>.
+    """
+
+    def __init__(self, dataset: GitLabDataset, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0, jitter_ms: float = 0, rate_limit: float = 0,
+                 burst: Optional[int] = None, failure_rate: float = 0.0, seed: int = 0):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.limiter = RateLimiter(rate_limit, burst or max(1, int(rate_limit))) if rate_limit else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = defaultdict(int)
+        self._routes = self._build_routes()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> str:
+        """Serve in a background thread; returns the API base URL"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='gitlab-stub', daemon=True)
+        self._thread.start()
+        logger.info(f"GitLab stub serving at {self.base_url}")
+        return self.base_url
+
+    def serve_forever(self):
+        logger.info(f"GitLab stub serving at {self.base_url}")
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _build_routes(self) -> List[Tuple[re.Pattern, Callable]]:
+        routes = [
+            (r'/users', self._users),
+            (r'/users/(\d+)', self._user),
+            (r'/users/(\d+)/events', self._user_events),
+            (r'/users/(\d+)/projects', self._user_projects),
+            (r'/merge_requests', self._merge_requests),
+            (r'/issues', self._issues),
+            (r'/projects', self._projects),
+            (r'/projects/(\d+)/issues', self._project_issues),
+            (r'/projects/(\d+)/merge_requests', self._project_merge_requests),
+            (r'/projects/(\d+)/merge_requests/(\d+)/approvals', self._approvals),
+            (r'/projects/(\d+)/pipelines', self._project_pipelines),
+            (r'/projects/(\d+)/pipelines/(\d+)/jobs', self._pipeline_jobs),
+            (r'/projects/(\d+)/languages', self._languages),
+            (r'/projects/(\d+)/repository/commits', self._commits)
+        ]
+        return [(re.compile(f"^{re.escape(API_PREFIX)}{pattern}/?$"), handler) for pattern, handler in routes]
+
+    # Endpoint handlers return a list (paginated) or a single JSON value, or None for 404
+
+    def _users(self, params):
+        username = params.get('username')
+        if username:
+            user = self.dataset.users_by_name.get(username)
+            return [user] if user else []
+        return list(self.dataset.users.values())
+
+    def _user(self, params, user_id):
+        return self.dataset.users.get(int(user_id))
+
+    def _user_events(self, params, user_id):
+        index = self.dataset.events.get(int(user_id))
+        if index is None or params.get('action', 'pushed') != 'pushed':
+            return []
+        return index.between(_timestamp(params.get('after')), _timestamp(params.get('before')))
+
+    def _user_projects(self, params, user_id):
+        return self.dataset.projects_by_member.get(int(user_id), [])
+
+    @staticmethod
+    def _filtered(index: Optional[_TimeIndex], params) -> List[Dict[str, Any]]:
+        if index is None:
+            return []
+        items = index.between(_timestamp(params.get('created_after')), _timestamp(params.get('created_before')))
+        state = params.get('state')
+        if state and state != 'all':
+            items = [item for item in items if item['state'] == state]
+        return items
+
+    def _merge_requests(self, params):
+        if params.get('reviewer_id'):
+            return self._filtered(self.dataset.merge_requests_by_reviewer.get(int(params['reviewer_id'])), params)
+        if params.get('author_id'):
+            return self._filtered(self.dataset.merge_requests_by_author.get(int(params['author_id'])), params)
+        return self._filtered(self.dataset.merge_requests, params)
+
+    def _issues(self, params):
+        if params.get('assignee_id'):
+            return self._filtered(self.dataset.issues_by_assignee.get(int(params['assignee_id'])), params)
+        return self._filtered(self.dataset.issues, params)
+
+    def _projects(self, params):
+        return list(self.dataset.projects.values())
+
+    def _project_issues(self, params, project_id):
+        return self._filtered(self.dataset.issues_by_project.get(int(project_id)), params)
+
+    def _project_merge_requests(self, params, project_id):
+        return self._filtered(self.dataset.merge_requests_by_project.get(int(project_id)), params)
+
+    def _approvals(self, params, project_id, iid):
+        merge_request = self.dataset.merge_requests_by_iid.get((int(project_id), int(iid)))
+        if merge_request is None:
+            return None
+        approved_by = self.dataset.approvals(merge_request)
+        return {
+            'id': merge_request['id'],
+            'iid': merge_request['iid'],
+            'project_id': merge_request['project_id'],
+            'state': merge_request['state'],
+            'approved': bool(approved_by),
+            'approved_by': approved_by
+        }
+
+    def _project_pipelines(self, params, project_id):
+        index = self.dataset.pipelines_by_project.get(int(project_id))
+        items = index.between() if index else []
+        if params.get('username'):
+            items = [item for item in items if (item.get('user') or {}).get('username') == params['username']]
+        updated_after = _timestamp(params.get('updated_after'))
+        if updated_after:
+            items = [item for item in items if item['updated_at'] >= updated_after]
+        return items
+
+    def _pipeline_jobs(self, params, project_id, pipeline_id):
+        pipeline = self.dataset.pipelines.get((int(project_id), int(pipeline_id)))
+        return self.dataset.jobs(pipeline) if pipeline else None
+
+    def _languages(self, params, project_id):
+        if int(project_id) not in self.dataset.projects:
+            return None
+        return self.dataset.languages(int(project_id))
+
+    def _commits(self, params, project_id):
+        index = self.dataset.commits_by_project.get(int(project_id))
+        if index is None:
+            return [] if int(project_id) in self.dataset.projects else None
+        return index.between(_timestamp(params.get('since')), _timestamp(params.get('until')))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_GET(self):
+                server._handle(self)
+
+        return Handler
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        self._count('requests')
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            failed = self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+
+        headers = {}
+        if self.limiter:
+            client = request.headers.get('PRIVATE-TOKEN') or request.client_address[0]
+            allowed, remaining, wait = self.limiter.take(client)
+            headers.update({
+                'RateLimit-Limit': str(self.limiter.burst),
+                'RateLimit-Remaining': str(remaining),
+                'RateLimit-Reset': str(int(time.time() + wait) + 1)
+            })
+            if not allowed:
+                self._count('rate_limited')
+                headers['Retry-After'] = str(max(1, int(wait + 0.999)))
+                return self._send(request, 429, {'message': '429 Too Many Requests'}, headers)
+        if failed:
+            self._count('failed')
+            return self._send(request, 500, {'message': '500 Internal Server Error'}, headers)
+
+        url = urlparse(request.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        for pattern, handler in self._routes:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            self._count('not_found')
+            return self._send(request, 404, {'message': '404 Not Found'}, headers)
+
+        try:
+            result = handler(params, *match.groups())
+        except (TypeError, ValueError) as e:
+            return self._send(request, 400, {'message': f"400 Bad request - {str(e)}"}, headers)
+        if result is None:
+            self._count('not_found')
+            return self._send(request, 404, {'message': '404 Not Found'}, headers)
+        if isinstance(result, list):
+            result, page_headers = self._paginate(url.path, params, result)
+            headers.update(page_headers)
+        self._send(request, 200, result, headers)
+
+    @staticmethod
+    def _paginate(path: str, params: Dict[str, str], items: List[Any]) -> Tuple[List[Any], Dict[str, str]]:
+        """Offset pagination with GitLab's headers"""
+        try:
+            per_page = max(1, min(int(params.get('per_page', DEFAULT_PER_PAGE)), MAX_PER_PAGE))
+            page = max(1, int(params.get('page', 1)))
+        except ValueError:
+            per_page, page = DEFAULT_PER_PAGE, 1
+        total = len(items)
+        total_pages = max(1, -(-total // per_page))
+        headers = {
+            'X-Page': str(page),
+            'X-Per-Page': str(per_page),
+            'X-Total': str(total),
+            'X-Total-Pages': str(total_pages),
+            'X-Next-Page': str(page + 1) if page < total_pages else '',
+            'X-Prev-Page': str(page - 1) if page > 1 else ''
+        }
+        links = []
+        for rel, number in (('prev', page - 1 if page > 1 else None), ('next', page + 1 if page < total_pages else None),
+                            ('first', 1), ('last', total_pages)):
+            if number is not None:
+                query = urlencode({**params, 'page': number, 'per_page': per_page})
+                links.append(f'<{path}?{query}>; rel="{rel}"')
+        headers['Link'] = ', '.join(links)
+        return items[(page - 1) * per_page:page * per_page], headers
+
+    def _send(self, request: BaseHTTPRequestHandler, status: int, body: Any, headers: Dict[str, str]):
+        payload = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        if status == 200:
+            etag = f'W/"{hashlib.sha1(payload).hexdigest()}"'
+            headers['ETag'] = etag
+            if request.headers.get('If-None-Match') == etag:
+                self._count('not_modified')
+                status, payload = 304, b''
+        request.send_response(status)
+        if payload:
+            request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        if payload:
+            request.wfile.write(payload)
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point, e.g.
+
+    python -m api.gitlab_stub --users 500 --days 90 --latency-ms 80 --jitter-ms 40 --rate-limit 20
+    python -m api.gitlab_stub --data data/synthetic --port 8929
+    """
+    parser = argparse.ArgumentParser(description='Serve a local GitLab API stand-in')
+    parser.add_argument('--data', metavar='DIRECTORY', help='JSONL output of utils.synthetic_data')
+    parser.add_argument('--users', type=int, default=200, help='Users to generate when --data is not given')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8929)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--rate-limit', type=float, default=0, help='Requests per second per token (0 disables)')
+    parser.add_argument('--burst', type=int, default=None)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.data:
+        dataset = GitLabDataset.from_jsonl(args.data)
+    else:
+        dataset = GitLabDataset.generate(users=args.users, days=args.days, seed=args.seed)
+    server = GitLabStubServer(dataset, args.host, args.port, args.latency_ms, args.jitter_ms,
+                              args.rate_limit, args.burst, args.failure_rate, args.seed)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from utils.latency_sketches import FINISHED_PIPELINE_STATUSES
+
+# Concurrent GitLab requests per process for project data
+PROJECT_WORKERS = int(os.getenv('GITLAB_PROJECT_WORKERS', '8'))
+# How long a project's data is reused, for every developer on it
+PROJECT_CACHE_SECONDS = int(os.getenv('GITLAB_PROJECT_CACHE_SECONDS', '300'))
+PROJECT_HISTORY_DAYS = 90
+RESOLVED_MR_STATES = ('merged', 'closed')
+
+DEFAULT_PIPELINE_SUCCESS_RATE = 0.85
+DEFAULT_REVIEW_PARTICIPATION = 0.75
+
+# Shared by all collectors so the bound holds per process, not per client
+_executor = ThreadPoolExecutor(max_workers=PROJECT_WORKERS, thread_name_prefix='gitlab-project')
+# Background collection for refresh(); one collect at a time, its requests still run on _executor
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gitlab-project-refresh')
+
+def pipeline_success_rate(pipelines: Iterable[Dict], username: str) -> Optional[float]:
+    """Share of a developer's finished pipelines that succeeded, None without any"""
+    finished = [pipeline for pipeline in pipelines
+                if (pipeline.get('user') or {}).get('username') == username
+                and pipeline.get('status') in FINISHED_PIPELINE_STATUSES]
+    if not finished:
+        return None
+    return len([pipeline for pipeline in finished if pipeline['status'] == 'success']) / len(finished)
+
+def review_participation(merge_requests: Iterable[Dict], user_id: int) -> Optional[float]:
+    """Share of resolved MRs by others a developer was reviewer on or approved that they approved
+
+    Only MRs whose approvals were fetched count; None when there are none.
+    """
+    requested = approved = 0
+    for mr in merge_requests:
+        if mr.get('approved_by') is None or (mr.get('author') or {}).get('id') == user_id:
+            continue
+        did_approve = any(user.get('id') == user_id for user in mr['approved_by'])
+        if did_approve or any(reviewer.get('id') == user_id for reviewer in mr.get('reviewers') or []):
+            requested += 1
+            approved += did_approve
+    return approved / requested if requested else None
+
+def language_breakdown(languages: Iterable[Dict[str, float]]) -> Dict[str, int]:
+    """Per-project language percentages summed and normalized to whole percents"""
+    totals: Dict[str, float] = {}
+    for project_languages in languages:
+        for language, percentage in project_languages.items():
+            totals[language] = totals.get(language, 0) + percentage
+    total = sum(totals.values())
+    if total > 0:
+        totals = {language: int((value / total) * 100) for language, value in totals.items()}
+    return totals
+
+class ProjectCollector:
+    """Per-project GitLab data fetched in parallel and shared between developers
+
+    collect() returns the last PROJECT_HISTORY_DAYS of each project's
+    pipelines and merge requests (resolved ones with their approvals) plus
+    its languages. Every list and approval request of the projects not
+    cached runs on one bounded thread pool; developers on the same project
+    share its entry, including a fetch already in flight, for ttl_seconds.
+    Approvals of resolved MRs cannot change, so they are carried over and
+    only fetched for MRs new since the last refresh.
+
+    Request paths use cached() and refresh() instead, which never wait on
+    GitLab: they read the last collected data and leave fetching what is
+    missing or expired to a background thread.
+    """
+
+    def __init__(self, base_url: str, headers: Dict[str, str], ttl_seconds: float = PROJECT_CACHE_SECONDS,
+                 history_days: int = PROJECT_HISTORY_DAYS):
+        self.base_url = base_url
+        self.headers = headers
+        self.ttl_seconds = ttl_seconds
+        self.history_days = history_days
+        # project id -> {'future': Future of the project data, 'expires': monotonic deadline}
+        self._projects: Dict[int, Dict[str, Any]] = {}
+        # project id -> last data collected for it, kept past expiry for cached()
+        self._collected: Dict[int, Dict[str, Any]] = {}
+        # Project ids queued or being collected by refresh()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'fetches': 0, 'requests': 0, 'failed_requests': 0}
+
+    def collect(self, project_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Data of each project, fetching the ones not cached concurrently"""
+        project_ids = list(dict.fromkeys(project_ids))
+        futures, claimed, previous = {}, {}, {}
+        now = time.monotonic()
+        with self._lock:
+            for project_id in project_ids:
+                entry = self._projects.get(project_id)
+                if entry and (not entry['future'].done() or now < entry['expires']):
+                    futures[project_id] = entry['future']
+                    self._stats['hits'] += 1
+                    continue
+                if project_id in self._collected:
+                    previous[project_id] = self._collected[project_id]
+                future = Future()
+                self._projects[project_id] = {'future': future, 'expires': math.inf}
+                futures[project_id] = claimed[project_id] = future
+            self._stats['fetches'] += len(claimed)
+        if claimed:
+            self._fetch(claimed, previous)
+        return {project_id: futures[project_id].result() for project_id in project_ids}
+
+    def cached(self, project_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Last collected data of each project that has any, without fetching"""
+        with self._lock:
+            return {project_id: self._collected[project_id] for project_id in dict.fromkeys(project_ids)
+                    if project_id in self._collected}
+
+    def refresh(self, project_ids: Iterable[int]):
+        """Collect the projects whose data is missing or expired in the background"""
+        now = time.monotonic()
+        with self._lock:
+            due = []
+            for project_id in dict.fromkeys(project_ids):
+                entry = self._projects.get(project_id)
+                if project_id not in self._refreshing and (
+                        not entry or (entry['future'].done() and now >= entry['expires'])):
+                    due.append(project_id)
+            self._refreshing.update(due)
+        if due:
+            _refresher.submit(self._refresh, due)
+
+    def commits(self, project_ids: Iterable[int], since: Optional[str] = None,
+                per_project: int = 20) -> Dict[int, List[Dict]]:
+        """Newest repository commits of each project, fetched concurrently and not cached"""
+        params = {'per_page': per_project, 'order': 'desc'}
+        if since:
+            params['since'] = since
+        futures = {project_id: _executor.submit(self._get, f"/projects/{project_id}/repository/commits", params, False)
+                   for project_id in dict.fromkeys(project_ids)}
+        return {project_id: future.result() or [] for project_id, future in futures.items()}
+
+    def invalidate(self, project_id: Optional[int] = None):
+        """Drop cached project data so the next collect() refetches it"""
+        with self._lock:
+            if project_id is None:
+                self._projects.clear()
+                self._collected.clear()
+            else:
+                self._projects.pop(project_id, None)
+                self._collected.pop(project_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'projects': len(self._projects), 'refreshing': len(self._refreshing)}
+
+    def _refresh(self, project_ids: List[int]):
+        try:
+            self.collect(project_ids)
+        except Exception as e:
+            logging.error(f"Error refreshing project data: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(project_ids)
+
+    def _fetch(self, claimed: Dict[int, Future], previous: Dict[int, Dict[str, Any]]):
+        """Fetch the claimed projects and resolve their futures"""
+        try:
+            since = (datetime.now(timezone.utc) - timedelta(days=self.history_days)).isoformat()
+            lists = {}
+            for project_id in claimed:
+                for part, (path, params) in self._list_requests(project_id, since).items():
+                    lists[project_id, part] = _executor.submit(self._get, path, params, part != 'languages')
+
+            approvals = {}
+            for project_id in claimed:
+                known = {mr['iid']: mr['approved_by']
+                         for mr in (previous.get(project_id) or {}).get('merge_requests', [])
+                         if mr.get('approved_by') is not None and mr.get('state') in RESOLVED_MR_STATES}
+                for mr in lists[project_id, 'merge_requests'].result() or []:
+                    if mr.get('state') not in RESOLVED_MR_STATES:
+                        continue
+                    if mr['iid'] in known:
+                        approvals[project_id, mr['iid']] = known[mr['iid']]
+                    else:
+                        approvals[project_id, mr['iid']] = _executor.submit(
+                            self._get, f"/projects/{project_id}/merge_requests/{mr['iid']}/approvals", {}, False)
+
+            for project_id, future in claimed.items():
+                results = {part: lists[project_id, part].result()
+                           for part in ('pipelines', 'merge_requests', 'languages')}
+                complete = all(result is not None for result in results.values())
+                merge_requests = []
+                for mr in results['merge_requests'] or []:
+                    approved_by = approvals.get((project_id, mr['iid']))
+                    if isinstance(approved_by, Future):
+                        response = approved_by.result()
+                        complete = complete and response is not None
+                        approved_by = [approval['user'] for approval in (response or {}).get('approved_by', [])
+                                       if approval.get('user')] if response is not None else None
+                    merge_requests.append({**mr, 'approved_by': approved_by})
+                data = {
+                    'pipelines': results['pipelines'] or [],
+                    'merge_requests': merge_requests,
+                    'languages': results['languages'] or {}
+                }
+                with self._lock:
+                    # Partial data is served once but refetched on the next call
+                    self._projects[project_id]['expires'] = time.monotonic() + (self.ttl_seconds if complete else 0)
+                    self._collected[project_id] = data
+                future.set_result(data)
+        except Exception as e:
+            logging.error(f"Error collecting project data: {str(e)}")
+            with self._lock:
+                for project_id, future in claimed.items():
+                    if not future.done():
+                        self._projects.pop(project_id, None)
+                        future.set_exception(e)
+            raise
+
+    def _list_requests(self, project_id: int, since: str) -> Dict[str, tuple]:
+        return {
+            'pipelines': (f"/projects/{project_id}/pipelines", {'updated_after': since}),
+            'merge_requests': (f"/projects/{project_id}/merge_requests", {'state': 'all', 'created_after': since}),
+            'languages': (f"/projects/{project_id}/languages", {})
+        }
+
+    def _get(self, path: str, params: Dict[str, Any], paginated: bool = True) -> Any:
+        """One GitLab resource, every page of a list; None when a request failed"""
+        items = []
+        page = 1
+        while True:
+            if paginated:
+                params = {**params, 'per_page': 100, 'page': page}
+            with self._lock:
+                self._stats['requests'] += 1
+            try:
+                response = requests.get(f"{self.base_url}{path}", headers=self.headers, params=params, timeout=30)
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error fetching {path}: {str(e)}")
+                response = None
+            if response is None or response.status_code != 200:
+                with self._lock:
+                    self._stats['failed_requests'] += 1
+                return None
+            data = response.json()
+            if not paginated:
+                return data
+            if not data:
+                return items
+            items.extend(data)
+            if len(data) < params['per_page']:
+                return items
+            page += 1
@@ -0,0 +1,126 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# Relative slowdown of a timing that counts as a regression in compare()
+REGRESSION_THRESHOLD = 0.2
+
+def summarize(durations: List[float]) -> Dict[str, Any]:
+    """Latency summary in milliseconds"""
+    if not durations:
+        return {'count': 0}
+    ordered = sorted(durations)
+
+    def percentile(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'p50_ms': percentile(0.5),
+        'p90_ms': percentile(0.9),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, Any]:
+    """Time repeat calls of fn after warmup untimed calls"""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+def measure_concurrent(fn: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Call fn(i) for i in range(requests) from concurrency threads; latency and throughput
+
+    fn returning False counts as an error (exceptions too).
+    """
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            ok = fn(i) is not False
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+    summary = summarize([duration for duration, _ in outcomes])
+    summary.update({
+        'concurrency': concurrency,
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'throughput_rps': round(requests / elapsed, 1) if elapsed else None
+    })
+    return summary
+
+def _git(*args) -> Optional[str]:
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict[str, Any]:
+    """Where and on what code a run happened"""
+    import numpy
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+def save_results(results: Dict[str, Any], directory: str = RESULTS_DIR) -> str:
+    """Write a run to <directory>/<timestamp>-<commit>.json; returns the path"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    path = os.path.join(directory, f"{stamp}-{results['environment'].get('commit') or 'nogit'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    return path
+
+def _timings(node: Any, prefix: str = '') -> Dict[str, float]:
+    """Flatten a result tree to {path: mean_ms} for every measurement in it"""
+    found = {}
+    if isinstance(node, dict):
+        if 'mean_ms' in node:
+            found[prefix] = node['mean_ms']
+        for key, value in node.items():
+            found.update(_timings(value, f"{prefix}/{key}" if prefix else key))
+    return found
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """Measurements present in both runs whose mean moved by more than threshold"""
+    before = _timings(baseline.get('scenarios', {}))
+    after = _timings(current.get('scenarios', {}))
+    changes = []
+    for path in sorted(before.keys() & after.keys()):
+        if not before[path]:
+            continue
+        change = (after[path] - before[path]) / before[path]
+        if abs(change) > threshold:
+            changes.append({
+                'measurement': path,
+                'baseline_ms': before[path],
+                'current_ms': after[path],
+                'change': round(change, 3),
+                'regression': change > 0
+            })
+    return changes
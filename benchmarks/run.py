@@ -0,0 +1,66 @@
+import argparse
+import json
+import logging
+import time
+import traceback
+from typing import List, Optional
+
+from benchmarks.harness import RESULTS_DIR, REGRESSION_THRESHOLD, compare, environment, save_results
+from benchmarks.scenarios import DEFAULT_JITTER_MS, DEFAULT_LATENCY_MS, SCENARIOS, SIZES, ScenarioSkipped
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run benchmark scenarios and store the results as JSON, e.g.
+
+    python -m benchmarks.run --sizes small medium
+    python -m benchmarks.run --scenarios metrics_compute --compare benchmarks/results/<previous>.json
+
+    Returns 1 when --compare finds a regression, so CI can fail on it.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the metrics pipeline, storage and routes')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['small'])
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS,
+                        help='GitLab stand-in latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=DEFAULT_JITTER_MS)
+    parser.add_argument('--output', default=RESULTS_DIR, help='Directory for the results JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Relative change in a mean that is reported')
+    args = parser.parse_args(argv)
+
+    # Per-request logging from the app would dominate route timings
+    logging.disable(logging.INFO)
+
+    results = {'environment': environment(), 'scenarios': {}}
+    for name in args.scenarios:
+        for size_name in args.sizes:
+            started = time.perf_counter()
+            try:
+                outcome = SCENARIOS[name](SIZES[size_name], latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+                status = 'ok'
+            except ScenarioSkipped as e:
+                outcome, status = {'reason': str(e)}, 'skipped'
+            except Exception as e:
+                outcome, status = {'error': str(e), 'traceback': traceback.format_exc()}, 'failed'
+            outcome.update({'status': status, 'size': SIZES[size_name],
+                            'seconds': round(time.perf_counter() - started, 2)})
+            results['scenarios'].setdefault(name, {})[size_name] = outcome
+            print(f"{name}/{size_name}: {status} in {outcome['seconds']}s")
+
+    path = save_results(results, args.output)
+    print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        changes = compare(baseline, results, args.threshold)
+        for change in changes:
+            label = 'REGRESSION' if change['regression'] else 'improvement'
+            print(f"{label}: {change['measurement']} {change['baseline_ms']}ms -> "
+                  f"{change['current_ms']}ms ({change['change']:+.0%})")
+        if any(change['regression'] for change in changes):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
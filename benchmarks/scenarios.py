@@ -0,0 +1,251 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.harness import measure, measure_concurrent
+
+logger = logging.getLogger(__name__)
+
+# Data sizes per scenario: history items per developer, population and load
+SIZES = {
+    'small': {'items': 1000, 'users': 20, 'days': 90, 'requests': 100, 'concurrency': 4},
+    'medium': {'items': 10000, 'users': 100, 'days': 180, 'requests': 300, 'concurrency': 8},
+    'large': {'items': 100000, 'users': 500, 'days': 365, 'requests': 1000, 'concurrency': 16}
+}
+
+# Stand-in GitLab latency per request, roughly a nearby self-hosted instance
+DEFAULT_LATENCY_MS = 20
+DEFAULT_JITTER_MS = 10
+
+# Usernames the app's login page knows, mapped onto the first synthetic users
+APP_USERS = ('dev1', 'dev2', 'dev3', 'dev4')
+
+class ScenarioSkipped(Exception):
+    """A scenario cannot run here (e.g. no MongoDB); recorded with its reason"""
+
+def _history(items: int, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """At least items synthetic push events, with the MRs and issues generated alongside"""
+    from utils.synthetic_data import SyntheticDataGenerator
+    history = {'gitlab_events': [], 'gitlab_merge_requests': [], 'gitlab_issues': []}
+    # About 80 pushes per synthetic developer over 90 days, so this overshoots a little
+    generator = SyntheticDataGenerator(users=max(1, items // 40), days=90, seed=seed, telemetry_days=0)
+    for block in generator.blocks():
+        for name in history:
+            history[name].extend(block[name])
+        if len(history['gitlab_events']) >= items:
+            break
+    return {
+        'commits': history['gitlab_events'][:items],
+        'merge_requests': history['gitlab_merge_requests'][:items],
+        'issues': history['gitlab_issues'][:items]
+    }
+
+def _gitlab_api():
+    from api.gitlab_api import GitLabAPI
+    os.environ.setdefault('GITLAB_ACCESS_TOKEN', 'benchmark')
+    return GitLabAPI()
+
+def metrics_compute(size: Dict[str, Any], **options) -> Dict[str, Any]:
+    """GitLabAPI metric computations over one developer's history of size['items']"""
+    from utils.activity_metrics import aggregate_items
+    from utils.event_arrays import EventArrays, activity_stats
+    history = _history(size['items'])
+    api = _gitlab_api()
+    commits, merge_requests, issues = history['commits'], history['merge_requests'], history['issues']
+    repeat = 5 if size['items'] <= 10000 else 2
+    end_date = datetime.now(timezone.utc)
+    arrays = EventArrays.from_items(commits, merge_requests, issues)
+    return {
+        'items': {name: len(values) for name, values in history.items()},
+        'calculate_weekly_trend': measure(lambda: api._calculate_weekly_trend(commits, merge_requests, issues), repeat),
+        'format_historical_data': measure(lambda: api._format_historical_data(commits), repeat),
+        'format_historical_data_limit_50': measure(lambda: api._format_historical_data(commits, 50), repeat),
+        'calculate_avg_merge_time': measure(lambda: api._calculate_avg_merge_time(merge_requests), repeat),
+        'get_recent_activity': measure(lambda: api._get_recent_activity(commits, merge_requests, issues), repeat),
+        'commits_this_week': measure(lambda: len([
+            c for c in commits
+            if (end_date - datetime.fromisoformat(c['created_at'].replace('Z', '+00:00'))).days <= 7
+        ]), repeat),
+        'aggregate_activity': measure(lambda: aggregate_items(commits, merge_requests, issues, end_date), repeat),
+        'event_arrays_build': measure(lambda: EventArrays.from_items(commits, merge_requests, issues), repeat),
+        'activity_stats': measure(lambda: activity_stats({'developer': arrays}, end_date), repeat)
+    }
+
+def _stub_server(size: Dict[str, Any], latency_ms: float, jitter_ms: float, **server_options):
+    """A started GitLab stand-in over a synthetic population, with APP_USERS aliased"""
+    from api.gitlab_stub import GitLabDataset, GitLabStubServer
+    dataset = GitLabDataset.generate(users=size['users'], days=size['days'])
+    for alias, user in zip(APP_USERS, list(dataset.users.values())):
+        dataset.users_by_name[alias] = user
+    server = GitLabStubServer(dataset, latency_ms=latency_ms, jitter_ms=jitter_ms, **server_options)
+    server.start()
+    return server
+
+def gitlab_client(size: Dict[str, Any], latency_ms: float = DEFAULT_LATENCY_MS,
+                  jitter_ms: float = DEFAULT_JITTER_MS, **options) -> Dict[str, Any]:
+    """GitLabAPI.get_developer_metrics end to end against the local stand-in"""
+    server = _stub_server(size, latency_ms, jitter_ms)
+    previous = {key: os.environ.get(key) for key in ('GITLAB_API_URL', 'GITLAB_ACCESS_TOKEN')}
+    os.environ.update({'GITLAB_API_URL': server.base_url, 'GITLAB_ACCESS_TOKEN': 'benchmark'})
+    try:
+        usernames = [user['username'] for user in list(server.dataset.users.values())[:20]]
+        api = _gitlab_api()
+        before = server.stats().get('requests', 0)
+        sequential = measure_concurrent(
+            lambda i: bool(api.get_developer_metrics(usernames[i], include_history=False)), len(usernames), 1)
+        requests_per_developer = (server.stats().get('requests', 0) - before) / len(usernames)
+
+        def fetch(i):
+            # A fresh client per call, as each request handler would see cold caches
+            return bool(_gitlab_api().get_developer_metrics(usernames[i % len(usernames)], include_history=False))
+
+        concurrent = measure_concurrent(fetch, min(size['requests'], 4 * len(usernames)), size['concurrency'])
+        return {
+            'latency_ms': latency_ms,
+            'jitter_ms': jitter_ms,
+            'developers': len(usernames),
+            'requests_per_developer': round(requests_per_developer, 1),
+            'get_developer_metrics_sequential': sequential,
+            'get_developer_metrics_concurrent': concurrent,
+            'stub': server.stats()
+        }
+    finally:
+        server.stop()
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+_mongo_lock = threading.Lock()
+_mongo_backend: Optional[str] = None
+
+def _use_mongo() -> str:
+    """Point MongoDBManager at MONGODB_URI, or at mongomock when installed
+
+    Benchmarks write to their own database (MONGODB_DATABASE, default
+    gitlab_analytics_benchmark), never the app's.
+    """
+    global _mongo_backend
+    with _mongo_lock:
+        if _mongo_backend:
+            return _mongo_backend
+        os.environ.setdefault('MONGODB_DATABASE', 'gitlab_analytics_benchmark')
+        if os.getenv('MONGODB_URI'):
+            _mongo_backend = 'mongod'
+            return _mongo_backend
+        try:
+            import mongomock
+        except ImportError:
+            raise ScenarioSkipped("MONGODB_URI is not set and mongomock is not installed")
+        import db.models
+        client = mongomock.MongoClient()
+        db.models.MongoClient = lambda *args, **kwargs: client
+        os.environ['MONGODB_URI'] = 'mongodb://mongomock'
+        _mongo_backend = 'mongomock'
+        return _mongo_backend
+
+def mongo(size: Dict[str, Any], **options) -> Dict[str, Any]:
+    """MongoDBManager read and write paths"""
+    backend = _use_mongo()
+    from db.models import MongoDBManager
+    from utils.synthetic_data import SyntheticDataGenerator
+    manager = MongoDBManager()
+    try:
+        users = min(size['users'], 100)
+        generator = SyntheticDataGenerator(users=users, days=30, telemetry_days=7, seed=1)
+        blocks = list(generator.blocks())
+        events = [event for block in blocks for event in block['gitlab_events']]
+        telemetry = [batch for block in blocks for batch in block['telemetry_samples']]
+        user_ids = [user['user_id'] for block in blocks for user in block['users']]
+        metrics = _gitlab_api()._get_mock_metrics(user_ids[0])
+        model = {'user_id': user_ids[0], 'gitlab_metrics': metrics, 'recommendations': []}
+
+        manager.db.drop_collection('gitlab_events')
+        manager.db.drop_collection('telemetry_samples')
+        started = time.perf_counter()
+        manager.insert_documents('gitlab_events', [dict(event) for event in events])
+        insert_events = time.perf_counter() - started
+        started = time.perf_counter()
+        manager.insert_telemetry_batches([dict(batch) for batch in telemetry])
+        insert_telemetry = time.perf_counter() - started
+
+        repeat = min(len(user_ids), 20)
+        return {
+            'backend': backend,
+            'insert_events': {'documents': len(events), 'seconds': round(insert_events, 3),
+                              'docs_per_second': round(len(events) / insert_events) if insert_events else None},
+            'insert_telemetry_batches': {'documents': len(telemetry), 'seconds': round(insert_telemetry, 3)},
+            'save_gitlab_metrics': measure(lambda: manager.save_gitlab_metrics(user_ids[0], dict(metrics)), repeat),
+            'get_latest_gitlab_metrics': measure(lambda: manager.get_latest_gitlab_metrics(user_ids[0]), repeat),
+            'save_dashboard_model': measure(lambda: manager.save_dashboard_model(user_ids[0], dict(model)), repeat),
+            'get_dashboard_model': measure(lambda: manager.get_dashboard_model(user_ids[0]), repeat),
+            'get_telemetry_samples': measure(lambda: manager.get_telemetry_samples(user_ids[0]), repeat),
+            'get_all_users': measure(manager.get_all_users, repeat)
+        }
+    finally:
+        manager.close()
+
+def _login(base_url: str, username: str):
+    import requests
+    session = requests.Session()
+    session.post(f"{base_url}/login", data={'username': username, 'password': 'password'}, allow_redirects=False)
+    return session
+
+def routes(size: Dict[str, Any], latency_ms: float = DEFAULT_LATENCY_MS,
+           jitter_ms: float = DEFAULT_JITTER_MS, **options) -> Dict[str, Any]:
+    """Flask route latency under concurrent load, over HTTP, with all external services local
+
+    GitLab is the stand-in server, Gemini the stub backend and MongoDB a
+    local mongod or mongomock.
+    """
+    backend = _use_mongo()
+    server = _stub_server(size, latency_ms, jitter_ms)
+    os.environ.update({
+        'GITLAB_API_URL': server.base_url,
+        'GITLAB_ACCESS_TOKEN': 'benchmark',
+        'LLM_BACKEND': 'stub',
+        'LLM_STUB_LATENCY_MS': os.getenv('LLM_STUB_LATENCY_MS', '200')
+    })
+    from werkzeug.serving import make_server
+    from app import app
+
+    http = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=http.serve_forever, name='benchmark-app', daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{http.server_port}"
+    try:
+        developers = {name: _login(base_url, name) for name in APP_USERS}
+        admin = _login(base_url, 'admin')
+        sessions = list(developers.values())
+        endpoints: List[Tuple[str, Callable[[int], Any]]] = [
+            ('dashboard', lambda i: sessions[i % len(sessions)].get(f"{base_url}/").ok),
+            ('admin', lambda i: admin.get(f"{base_url}/admin").ok),
+            ('api_gitlab_metrics', lambda i: sessions[0].get(
+                f"{base_url}/api/gitlab_metrics/{APP_USERS[i % len(APP_USERS)]}").ok),
+            ('api_telemetry', lambda i: sessions[0].get(
+                f"{base_url}/api/telemetry/{APP_USERS[i % len(APP_USERS)]}").ok),
+            ('api_series', lambda i: sessions[0].get(
+                f"{base_url}/api/series", params={'users': ','.join(APP_USERS), 'metric': 'focus_score'}).ok),
+            ('api_team_stats', lambda i: admin.get(f"{base_url}/api/team/stats").ok),
+            ('api_recommendations', lambda i: sessions[0].get(
+                f"{base_url}/api/recommendations/{APP_USERS[i % len(APP_USERS)]}").status_code in (200, 202))
+        ]
+        results = {'mongo_backend': backend, 'latency_ms': latency_ms}
+        for name, call in endpoints:
+            results[name] = measure_concurrent(call, size['requests'], size['concurrency'])
+        results['stub'] = server.stats()
+        return results
+    finally:
+        http.shutdown()
+        server.stop()
+
+SCENARIOS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'metrics_compute': metrics_compute,
+    'gitlab_client': gitlab_client,
+    'mongo': mongo,
+    'routes': routes
+}
@@ -10,6 +10,9 @@ GEMINI_API_VERSION = "v1beta"
 GEMINI_MODEL_NAME = "gemini-2.0-flash"
 GEMINI_API_BASE_URL = f"https://generativelanguage.googleapis.com/{GEMINI_API_VERSION}/models/{GEMINI_MODEL_NAME}:generateContent"
 
+# LLM backend: 'gemini' for the real API, 'stub' for the local load-test stand-in
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+
 # API Request Headers
 API_HEADERS = {
     'Content-Type': 'application/json'
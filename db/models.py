@@ -1,5 +1,6 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReplaceOne
 from pymongo.server_api import ServerApi
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 import logging
 import os
@@ -38,7 +39,7 @@ class MongoDBManager:
             self.client.admin.command('ping')
             logger.info("Successfully connected to MongoDB!")
             
-            self.db = self.client['gitlab_analytics']
+            self.db = self.client[os.getenv('MONGODB_DATABASE', 'gitlab_analytics')]
             
             # Initialize collections
             self.users = self.db['users']
@@ -46,6 +47,18 @@ class MongoDBManager:
             self.gitlab_metrics = self.db['gitlab_metrics']
             self.recommendations = self.db['recommendations']
             self.telemetry = self.db['telemetry']
+            self.dashboard_models = self.db['dashboard_models']
+            self.jobs = self.db['jobs']
+            self.llm_cache = self.db['llm_cache']
+            self.uploaded_files = self.db['uploaded_files']
+            self.insights = self.db['insights']
+            self.telemetry_samples = self.db['telemetry_samples']
+            self.gitlab_events = self.db['gitlab_events']
+            self.gitlab_merge_requests = self.db['gitlab_merge_requests']
+            self.gitlab_issues = self.db['gitlab_issues']
+            self.gitlab_pipelines = self.db['gitlab_pipelines']
+            self.metric_sketches = self.db['metric_sketches']
+            self.rolling_metrics = self.db['rolling_metrics']
             
             # Drop existing indexes to avoid conflicts
             self._drop_indexes()
@@ -70,6 +83,18 @@ class MongoDBManager:
             self.gitlab_metrics.drop_indexes()
             self.recommendations.drop_indexes()
             self.telemetry.drop_indexes()
+            self.dashboard_models.drop_indexes()
+            self.jobs.drop_indexes()
+            self.llm_cache.drop_indexes()
+            self.uploaded_files.drop_indexes()
+            self.insights.drop_indexes()
+            self.telemetry_samples.drop_indexes()
+            self.gitlab_events.drop_indexes()
+            self.gitlab_merge_requests.drop_indexes()
+            self.gitlab_issues.drop_indexes()
+            self.gitlab_pipelines.drop_indexes()
+            self.metric_sketches.drop_indexes()
+            self.rolling_metrics.drop_indexes()
             logger.info("Dropped existing indexes")
         except Exception as e:
             logger.error(f"Error dropping indexes: {str(e)}")
@@ -86,9 +111,47 @@ class MongoDBManager:
             # Recommendations collection
             self.recommendations.create_index([('user_id', ASCENDING), ('timestamp', DESCENDING)])
             
+            # Insights collection
+            self.insights.create_index([('user_id', ASCENDING), ('timestamp', DESCENDING)])
+            
             # Telemetry collection
             self.telemetry.create_index([('user_id', ASCENDING), ('timestamp', DESCENDING)])
             
+            # Telemetry samples collection - append-only batches, one per device upload
+            self.telemetry_samples.create_index([('device_id', ASCENDING), ('batch_id', ASCENDING)], unique=True)
+            self.telemetry_samples.create_index([('user_id', ASCENDING), ('start', DESCENDING)])
+            
+            # GitLab entity collections - raw API-shaped documents keyed by GitLab id
+            self.gitlab_events.create_index([('id', ASCENDING)], unique=True)
+            self.gitlab_events.create_index([('author_username', ASCENDING), ('created_at', DESCENDING)])
+            self.gitlab_merge_requests.create_index([('id', ASCENDING)], unique=True)
+            self.gitlab_merge_requests.create_index([('author.username', ASCENDING), ('created_at', DESCENDING)])
+            self.gitlab_issues.create_index([('id', ASCENDING)], unique=True)
+            self.gitlab_issues.create_index([('assignee.username', ASCENDING), ('created_at', DESCENDING)])
+            self.gitlab_pipelines.create_index([('id', ASCENDING)], unique=True)
+            self.gitlab_pipelines.create_index([('user.username', ASCENDING), ('created_at', DESCENDING)])
+            
+            # Metric sketches collection - one quantile sketch per user, team or org and metric
+            self.metric_sketches.create_index([('scope', ASCENDING), ('key', ASCENDING), ('metric', ASCENDING)],
+                                              unique=True)
+            
+            # Rolling metrics collection - one day-bucket ring per user
+            self.rolling_metrics.create_index([('user_id', ASCENDING)], unique=True)
+            
+            # Dashboard models collection - one precomputed model per user
+            self.dashboard_models.create_index([('user_id', ASCENDING)], unique=True)
+            
+            # Background jobs collection
+            self.jobs.create_index([('job_id', ASCENDING)], unique=True)
+            
+            # LLM cache collection - entries expire at their expires_at time
+            self.llm_cache.create_index([('key', ASCENDING)], unique=True)
+            self.llm_cache.create_index([('expires_at', ASCENDING)], expireAfterSeconds=0)
+            
+            # Uploaded files collection - Gemini file handles by content hash
+            self.uploaded_files.create_index([('content_hash', ASCENDING)], unique=True)
+            self.uploaded_files.create_index([('expires_at', ASCENDING)], expireAfterSeconds=0)
+            
             # Achievements collection - handle null achievement_id
             self.achievements.create_index([
                 ('user_id', ASCENDING),
@@ -192,6 +255,18 @@ class MongoDBManager:
             logger.error(f"Error getting recommendations: {str(e)}")
             return None
     
+    def get_latest_insights(self, user_id):
+        """Get latest ADK insights for user"""
+        try:
+            return self.insights.find_one(
+                {'user_id': user_id},
+                sort=[('timestamp', DESCENDING)],
+                projection={'_id': 0}
+            )
+        except Exception as e:
+            logger.error(f"Error getting insights: {str(e)}")
+            return None
+    
     def get_telemetry_data(self, user_id):
         """Get telemetry data for user"""
         try:
@@ -228,6 +303,18 @@ class MongoDBManager:
         except Exception as e:
             logger.error(f"Error saving recommendations: {str(e)}")
     
+    def save_insights(self, user_id, insights):
+        """Save ADK insights"""
+        try:
+            insights['user_id'] = user_id
+            insights['timestamp'] = datetime.now(timezone.utc).isoformat()
+            # Convert to JSON-serializable format
+            insights_json = json.loads(json.dumps(insights, cls=DateTimeEncoder))
+            self.insights.insert_one(insights_json)
+            logger.info(f"Saved insights for user {user_id}")
+        except Exception as e:
+            logger.error(f"Error saving insights: {str(e)}")
+    
     def save_telemetry(self, user_id, telemetry):
         """Save telemetry data"""
         try:
@@ -240,6 +327,186 @@ class MongoDBManager:
         except Exception as e:
             logger.error(f"Error saving telemetry: {str(e)}")
     
+    def insert_telemetry_batches(self, batches):
+        """Append telemetry sample batches; batches already stored count as written"""
+        # Duplicate batch ids are client retries of batches already stored
+        return self.insert_documents('telemetry_samples', batches)
+    
+    def insert_documents(self, collection, documents):
+        """Bulk insert unordered into a collection; documents whose unique key is already stored count as written"""
+        try:
+            self.db[collection].insert_many(documents, ordered=False)
+            return True
+        except BulkWriteError as e:
+            errors = [error for error in e.details.get('writeErrors', []) if error.get('code') != 11000]
+            if errors or e.details.get('writeConcernErrors'):
+                logger.error(f"Error inserting into {collection}: {errors[:3]}")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Error inserting into {collection}: {str(e)}")
+            return False
+    
+    def upsert_documents(self, collection, documents, key='id'):
+        """Bulk insert or replace documents by their key field"""
+        try:
+            self.db[collection].bulk_write(
+                [ReplaceOne({key: document[key]}, document, upsert=True) for document in documents],
+                ordered=False
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting into {collection}: {str(e)}")
+            return False
+    
+    def get_telemetry_samples(self, user_id, since=None, until=None):
+        """Get telemetry sample batches for user, oldest first"""
+        try:
+            query = {'user_id': user_id}
+            if since is not None:
+                query['end'] = {'$gte': since}
+            if until is not None:
+                query['start'] = {'$lt': until}
+            return list(self.telemetry_samples.find(query, projection={'_id': 0}).sort('start', ASCENDING))
+        except Exception as e:
+            logger.error(f"Error getting telemetry samples: {str(e)}")
+            return []
+    
+    def get_dashboard_model(self, user_id):
+        """Get the precomputed dashboard model for user"""
+        try:
+            return self.dashboard_models.find_one(
+                {'user_id': user_id},
+                projection={'_id': 0}
+            )
+        except Exception as e:
+            logger.error(f"Error getting dashboard model: {str(e)}")
+            return None
+    
+    def save_dashboard_model(self, user_id, model):
+        """Save (replace) the precomputed dashboard model for user"""
+        try:
+            model_json = json.loads(json.dumps(model, cls=DateTimeEncoder))
+            model_json['user_id'] = user_id
+            self.dashboard_models.replace_one({'user_id': user_id}, model_json, upsert=True)
+            logger.info(f"Saved dashboard model for user {user_id}")
+        except Exception as e:
+            logger.error(f"Error saving dashboard model: {str(e)}")
+    
+    def delete_dashboard_model(self, user_id=None):
+        """Delete the dashboard model for user, or all models when user_id is None"""
+        try:
+            query = {} if user_id is None else {'user_id': user_id}
+            self.dashboard_models.delete_many(query)
+        except Exception as e:
+            logger.error(f"Error deleting dashboard model: {str(e)}")
+    
+    def get_metric_sketch(self, scope, key, metric):
+        """Get a stored quantile sketch with its watermark"""
+        try:
+            return self.metric_sketches.find_one(
+                {'scope': scope, 'key': key, 'metric': metric},
+                projection={'_id': 0}
+            )
+        except Exception as e:
+            logger.error(f"Error getting metric sketch: {str(e)}")
+            return None
+    
+    def get_metric_sketch_keys(self, scope):
+        """Get the users, teams or org keys that have stored sketches"""
+        try:
+            return sorted(self.metric_sketches.distinct('key', {'scope': scope}))
+        except Exception as e:
+            logger.error(f"Error getting metric sketch keys: {str(e)}")
+            return []
+    
+    def save_metric_sketch(self, scope, key, metric, document):
+        """Save (replace) a quantile sketch"""
+        try:
+            self.metric_sketches.replace_one(
+                {'scope': scope, 'key': key, 'metric': metric},
+                {**document, 'scope': scope, 'key': key, 'metric': metric,
+                 'updated_at': datetime.now(timezone.utc).isoformat()},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error saving metric sketch: {str(e)}")
+    
+    def get_rolling_metrics(self, user_id):
+        """Get a user's rolling activity state"""
+        try:
+            return self.rolling_metrics.find_one({'user_id': user_id}, projection={'_id': 0})
+        except Exception as e:
+            logger.error(f"Error getting rolling metrics: {str(e)}")
+            return None
+    
+    def save_rolling_metrics(self, user_id, state):
+        """Save (replace) a user's rolling activity state"""
+        try:
+            self.rolling_metrics.replace_one(
+                {'user_id': user_id},
+                {**state, 'user_id': user_id, 'updated_at': datetime.now(timezone.utc).isoformat()},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error saving rolling metrics: {str(e)}")
+    
+    def get_job(self, job_id):
+        """Get a background job record"""
+        try:
+            return self.jobs.find_one({'job_id': job_id}, projection={'_id': 0})
+        except Exception as e:
+            logger.error(f"Error getting job: {str(e)}")
+            return None
+    
+    def save_job(self, job):
+        """Save (replace) a background job record"""
+        try:
+            job_json = json.loads(json.dumps(job, cls=DateTimeEncoder))
+            self.jobs.replace_one({'job_id': job['job_id']}, job_json, upsert=True)
+        except Exception as e:
+            logger.error(f"Error saving job: {str(e)}")
+    
+    def get_llm_cache_entry(self, key):
+        """Get an unexpired LLM cache entry"""
+        try:
+            return self.llm_cache.find_one(
+                {'key': key, 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+                projection={'_id': 0, 'key': 0}
+            )
+        except Exception as e:
+            logger.error(f"Error getting LLM cache entry: {str(e)}")
+            return None
+    
+    def save_llm_cache_entry(self, key, entry):
+        """Save an LLM cache entry; expires_at stays a datetime for the TTL index"""
+        try:
+            self.llm_cache.replace_one({'key': key}, {**entry, 'key': key}, upsert=True)
+        except Exception as e:
+            logger.error(f"Error saving LLM cache entry: {str(e)}")
+    
+    def get_uploaded_file(self, content_hash):
+        """Get an unexpired Gemini file handle for uploaded content"""
+        try:
+            return self.uploaded_files.find_one(
+                {'content_hash': content_hash, 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+                projection={'_id': 0}
+            )
+        except Exception as e:
+            logger.error(f"Error getting uploaded file: {str(e)}")
+            return None
+    
+    def save_uploaded_file(self, content_hash, record):
+        """Save a Gemini file handle; expires_at stays a datetime for the TTL index"""
+        try:
+            self.uploaded_files.replace_one(
+                {'content_hash': content_hash},
+                {**record, 'content_hash': content_hash},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error saving uploaded file: {str(e)}")
+    
     def close(self):
         """Close MongoDB connection"""
         try:
@@ -1,14 +1,33 @@
 import os
 import logging
-from flask import render_template, request, session, redirect, url_for, jsonify, flash, send_from_directory
+from flask import render_template, request, session, redirect, url_for, jsonify, flash, send_from_directory, Response, stream_with_context
 from app import app
-from api.gitlab_api import GitLabAPI
+from api.gitlab_api import GitLabAPI, HISTORY_KINDS
 from api.gitlab_integration import GitLabIntegration
 from api.gitlab_sync import GitLabSync
 from ai.recommendations import GeminiRecommendations
-from ai.adk_agent import get_adk_insights
+from ai.adk_agent import get_adk_insights, stream_adk_insights
+from ai.cache import prompt_cache
+from ai.scheduler import gemini_scheduler
+from ai.uploads import image_uploads
+from ai.engine import RecommendationEngine, RECOMMENDATION_BUDGET_SECONDS, is_fresh_result
 from db.models import MongoDBManager
-from utils.data_generator import get_telemetry_data, get_hardcoded_users, get_achievements
+from utils.data_generator import get_telemetry_data, get_hardcoded_users
+from utils.dashboard_cache import DashboardModelCache, DASHBOARD_HISTORY_LIMIT, get_developer_details
+from utils.jobs import JobQueue
+from utils.precompute import stamp_activity, staleness_reason
+from utils.telemetry_series import load_recent_telemetry
+from utils.chart_series import (query_series, team_stats, validate_metric, DEFAULT_POINTS, MAX_POINTS,
+                                DEFAULT_RANGE_SECONDS, MAX_SERIES_USERS)
+from utils.event_arrays import DEFAULT_WINDOWS as ACTIVITY_WINDOWS
+from utils.gitlab_webhooks import GitLabWebhookProcessor, WEBHOOK_EVENTS, verify_token
+from utils.latency_sketches import LatencySketches, USER_SCOPE
+from utils.rolling_metrics import rolling_metrics
+from utils.telemetry_ingest import (TelemetryBuffer, TelemetryPayloadError, MAX_PAYLOAD_BYTES, decode_payload,
+                                    parse_batches)
+import hmac
+import json
+import time
 import traceback
 from datetime import datetime, timezone
 
@@ -16,7 +35,41 @@ from datetime import datetime, timezone
 gitlab_api = GitLabAPI()
 gitlab_sync = GitLabSync()
 mongodb = MongoDBManager()
+prompt_cache.attach_mongo(mongodb)
+image_uploads.attach_mongo(mongodb)
+rolling_metrics.attach_mongo(mongodb)
 gemini = GeminiRecommendations(os.getenv('GEMINI_API_KEY', ''))
+dashboard_cache = DashboardModelCache(gitlab_api, mongodb)
+latency_sketches = LatencySketches(mongodb)
+gitlab_webhooks = GitLabWebhookProcessor(gitlab_api, mongodb, dashboard_cache, latency_sketches, rolling_metrics)
+job_queue = JobQueue(max_workers=int(os.getenv('AI_JOB_WORKERS', '4')), mongo_manager=mongodb)
+telemetry_buffer = TelemetryBuffer(
+    mongodb,
+    max_samples=int(os.getenv('TELEMETRY_FLUSH_SAMPLES', '5000')),
+    max_delay_seconds=float(os.getenv('TELEMETRY_FLUSH_MS', '500')) / 1000.0
+)
+
+# History is fetched for the last 90 days, so longer trend windows would be empty
+MAX_ACTIVITY_WINDOW = 90
+
+# AI results younger than this are served without queueing a regeneration
+AI_RESULT_MAX_AGE_SECONDS = 3600
+
+def _get_telemetry(user_id):
+    """Telemetry rolled up from pushed device samples, else generated sample data"""
+    return load_recent_telemetry(mongodb, user_id) or get_telemetry_data(user_id)
+
+def _get_team_metrics():
+    """GitLab metrics, telemetry and profile for every developer"""
+    users = get_hardcoded_users()
+    return {
+        user_id: {
+            'gitlab': gitlab_api.get_developer_metrics(user_id, include_history=False),
+            'telemetry': _get_telemetry(user_id),
+            'user_info': user
+        }
+        for user_id, user in users.items() if user_id != 'admin'
+    }
 
 @app.route('/')
 def index():
@@ -30,74 +83,20 @@ def index():
     if user_role == 'admin':
         return redirect(url_for('admin'))
     
-    # Get GitLab metrics
-    gitlab_metrics = gitlab_api.get_developer_metrics(user_id) or {}
-    
-    # Get user information
-    users = get_hardcoded_users()
-    current_user = users.get(user_id, users['dev1'])
-    
-    # Get developer details for Gemini
-    developer_details = {
-        'name': current_user.get('name', 'Unknown'),
-        'team': current_user.get('team', 'Unknown'),
-        'role': current_user.get('role', 'developer'),
-        'recent_activity': gitlab_metrics.get('recent_activity', []),
-        'skills': gitlab_metrics.get('skills', [])
-    }
-    
-    # Get AI recommendations from Gemini
-    recommendations = gemini.get_recommendations(developer_details) or {'recommendations': []}
-    
-    # Get achievements
-    achievements = get_achievements(user_id) or []
-    
-    # Create productivity insights
-    productivity_insights = {
-        'productivity_score': gitlab_metrics.get('productivity_score', 7),
-        'collaboration_score': gitlab_metrics.get('collaboration_score', 6),
-        'strengths': [
-            'Active project participation',
-            'Multiple project contributions',
-            'Regular code commits'
-        ],
-        'areas_for_improvement': [
-            'Issue tracking',
-            'Documentation',
-            'Code review participation'
-        ]
-    }
-    
-    # Create weekly goals
-    weekly_goals = [
-        {
-            'goal': 'Improve Issue Management',
-            'metric': 'Number of issues created',
-            'target': '5'
-        },
-        {
-            'goal': 'Enhance Documentation',
-            'metric': 'Documentation updates',
-            'target': '3'
-        }
-    ]
-    
-    # Create skill development data
-    skill_development = {
-        'current_level': 'intermediate',
-        'recommended_focus': ['Project Management', 'Documentation'],
-        'learning_resources': ['GitLab Documentation', 'Project Management Best Practices']
-    }
+    # Render from the precomputed view model; when no Gemini recommendations
+    # are stored the rule-based ones are shown and upgraded by the page
+    model = dashboard_cache.get(user_id)
     
     return render_template('dashboard.html', 
-                         gitlab_metrics=gitlab_metrics,
-                         achievements=achievements,
-                         recommendations=recommendations['recommendations'],
-                         current_user=current_user,
+                         gitlab_metrics=model['gitlab_metrics'],
+                         achievements=model['achievements'],
+                         recommendations=model['recommendations'],
+                         recommendations_source=model.get('recommendations_source', 'gemini'),
+                         current_user=model['current_user'],
                          user_id=user_id,
-                         productivity_insights=productivity_insights,
-                         weekly_goals=weekly_goals,
-                         skill_development=skill_development)
+                         productivity_insights=model['productivity_insights'],
+                         weekly_goals=model['weekly_goals'],
+                         skill_development=model['skill_development'])
 
 @app.route('/telemetry')
 def telemetry():
@@ -112,7 +111,7 @@ def telemetry():
         return redirect(url_for('admin'))
     
     # Get telemetry data
-    telemetry_data = get_telemetry_data(user_id)
+    telemetry_data = _get_telemetry(user_id)
     users = get_hardcoded_users()
     current_user = users.get(user_id, users['dev1'])
     
@@ -129,21 +128,12 @@ def admin():
     
     # Get comprehensive team data including GitLab metrics
     team_data = gitlab_api.get_team_metrics()
-    users = get_hardcoded_users()
-    team_metrics = {}
-    
-    for user_id in users.keys():
-        if user_id != 'admin':
-            gitlab_metrics = gitlab_api.get_developer_metrics(user_id)
-            team_metrics[user_id] = {
-                'gitlab': gitlab_metrics,
-                'telemetry': get_telemetry_data(user_id),
-                'user_info': users[user_id]
-            }
+    team_metrics = _get_team_metrics()
     
     return render_template('admin.html', 
                          team_metrics=team_metrics, 
-                         team_data=team_data)
+                         team_data=team_data,
+                         team_stats=team_stats(team_metrics))
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -176,49 +166,298 @@ def logout():
     flash('Logged out successfully', 'info')
     return redirect(url_for('login'))
 
+def _parse_fields(value):
+    """Parse a comma-separated fields= query parameter"""
+    if not value:
+        return None
+    return [field.strip() for field in value.split(',') if field.strip()]
+
 @app.route('/api/gitlab_metrics/<user_id>')
 def api_gitlab_metrics(user_id):
-    """API endpoint for GitLab metrics"""
-    metrics = gitlab_api.get_developer_metrics(user_id)
+    """API endpoint for GitLab metrics
+
+    Supports fields= projection; historical_data is only built when requested
+    and is otherwise paged through /api/gitlab_metrics/<user_id>/history/<kind>.
+    """
+    fields = _parse_fields(request.args.get('fields'))
+    include_history = bool(fields) and 'historical_data' in fields
+    limit = max(1, min(request.args.get('limit', DASHBOARD_HISTORY_LIMIT, type=int), 500))
+    metrics = gitlab_api.get_developer_metrics(
+        user_id,
+        include_history=include_history,
+        history_limit=limit
+    )
+    if fields:
+        metrics = {k: v for k, v in metrics.items() if k in fields}
+    else:
+        metrics.pop('historical_data', None)
+    return jsonify(metrics)
+
+@app.route('/api/gitlab_metrics/<user_id>/live')
+def api_gitlab_live_metrics(user_id):
+    """API endpoint for incrementally maintained activity metrics, read in constant time"""
+    metrics = gitlab_api.get_live_metrics(user_id)
+    if metrics is None:
+        return jsonify({"success": False, "error": "No activity state for this user yet"}), 404
     return jsonify(metrics)
 
+@app.route('/api/gitlab_metrics/<user_id>/history/<kind>')
+def api_gitlab_history(user_id, kind):
+    """API endpoint for cursor-paged historical commits, merge requests or issues"""
+    if kind not in HISTORY_KINDS:
+        return jsonify({"success": False, "error": f"Unknown history kind: {kind}"}), 404
+    limit = max(1, min(request.args.get('limit', DASHBOARD_HISTORY_LIMIT, type=int), 500))
+    try:
+        page = gitlab_api.get_historical_page(
+            user_id,
+            kind,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            fields=_parse_fields(request.args.get('fields'))
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify(page)
+
 @app.route('/api/telemetry/<user_id>')
 def api_telemetry(user_id):
     """API endpoint for telemetry data"""
-    data = get_telemetry_data(user_id)
+    data = _get_telemetry(user_id)
     return jsonify(data)
 
+@app.route('/api/series')
+def api_series():
+    """API endpoint for chart series
+
+    users= (comma-separated), metric=, start= and end= (epoch seconds,
+    default the last 7 days), points= (target points per series),
+    bucket= (minimum bucket seconds, e.g. 86400 for daily totals) and
+    utc_offset= (seconds, aligns buckets to local time). Each series has at
+    most points entries however long the range is.
+    """
+    user_ids = _parse_fields(request.args.get('users'))
+    if not user_ids:
+        return jsonify({"success": False, "error": "users is required"}), 400
+    if len(user_ids) > MAX_SERIES_USERS:
+        return jsonify({"success": False, "error": f"At most {MAX_SERIES_USERS} users per request"}), 400
+    metric = request.args.get('metric', 'focus_score')
+    error = validate_metric(metric)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    end = request.args.get('end', int(time.time()), type=int)
+    start = request.args.get('start', end - DEFAULT_RANGE_SECONDS, type=int)
+    if start >= end:
+        return jsonify({"success": False, "error": "start must be before end"}), 400
+    points = max(3, min(request.args.get('points', DEFAULT_POINTS, type=int), MAX_POINTS))
+    bucket = request.args.get('bucket', type=int)
+    utc_offset = request.args.get('utc_offset', 0, type=int)
+
+    series = [
+        query_series(mongodb, user_id, metric, start, end, points, utc_offset, bucket,
+                     fallback=get_telemetry_data)
+        for user_id in user_ids
+    ]
+    return jsonify({"success": True, "metric": metric, "points": points, "series": series})
+
+@app.route('/api/team/stats')
+def api_team_stats():
+    """API endpoint for the admin team overview, aggregated on the server"""
+    if session.get('user_role') != 'admin':
+        return jsonify({"success": False, "error": "Admin access required"}), 403
+    return jsonify(team_stats(_get_team_metrics()))
+
+@app.route('/api/team/activity')
+def api_team_activity():
+    """API endpoint for team contribution trends, activity histograms and merge-time percentiles
+
+    windows= (comma-separated days, default 7,30,90) and utc_offset=
+    (seconds, for the weekday and hour histograms).
+    """
+    if session.get('user_role') != 'admin':
+        return jsonify({"success": False, "error": "Admin access required"}), 403
+    try:
+        windows = [int(days) for days in _parse_fields(request.args.get('windows')) or ACTIVITY_WINDOWS]
+    except ValueError:
+        return jsonify({"success": False, "error": "windows must be whole days"}), 400
+    if any(days <= 0 or days > MAX_ACTIVITY_WINDOW for days in windows):
+        return jsonify({"success": False, "error": f"windows must be 1 to {MAX_ACTIVITY_WINDOW} days"}), 400
+    user_ids = [user_id for user_id in get_hardcoded_users() if user_id != 'admin']
+    return jsonify(gitlab_api.get_team_activity(
+        user_ids, windows=windows, utc_offset_seconds=request.args.get('utc_offset', 0, type=int)))
+
+@app.route('/api/team/percentiles')
+def api_team_percentiles():
+    """API endpoint for org and per-team merge time, review latency and pipeline duration percentiles"""
+    if session.get('user_role') != 'admin':
+        return jsonify({"success": False, "error": "Admin access required"}), 403
+    return jsonify(latency_sketches.team_summaries())
+
+@app.route('/api/gitlab_metrics/<user_id>/percentiles')
+def api_gitlab_percentiles(user_id):
+    """API endpoint for a developer's duration percentiles, as of the last sync"""
+    return jsonify(latency_sketches.summaries(USER_SCOPE, user_id))
+
+@app.route('/api/telemetry/<user_id>/samples', methods=['POST'])
+def api_ingest_telemetry(user_id):
+    """API endpoint for desktop and watch agents pushing telemetry samples
+
+    Accepts one columnar batch or {"batches": [...]}, optionally gzip or
+    deflate compressed, up to MAX_PAYLOAD_BYTES (413 beyond). Responds 200
+    once the batches are stored; on 503 the agent retries with the same
+    batch_id, which is stored at most once.
+    """
+    token = os.getenv('TELEMETRY_INGEST_TOKEN')
+    received = request.headers.get('X-Telemetry-Token') or ''
+    if token and not hmac.compare_digest(received.encode('utf-8'), token.encode('utf-8')):
+        return jsonify({"success": False, "error": "Invalid telemetry token"}), 401
+    # Bound the body before reading it; decode_payload bounds the decompressed size
+    if (request.content_length or 0) > MAX_PAYLOAD_BYTES:
+        return jsonify({"success": False, "error": "Payload too large"}), 413
+    raw = request.stream.read(MAX_PAYLOAD_BYTES + 1)
+    if len(raw) > MAX_PAYLOAD_BYTES:
+        return jsonify({"success": False, "error": "Payload too large"}), 413
+    try:
+        payload = decode_payload(raw, request.headers.get('Content-Encoding'))
+        batches = parse_batches(user_id, payload)
+    except TelemetryPayloadError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    if not telemetry_buffer.submit(batches):
+        return jsonify({"success": False, "error": "Telemetry store unavailable, retry later"}), 503
+    return jsonify({
+        "success": True,
+        "batches": [batch['batch_id'] for batch in batches],
+        "samples": sum(batch['count'] for batch in batches)
+    })
+
+@app.route('/api/telemetry/ingest/stats')
+def api_telemetry_ingest_stats():
+    """API endpoint for telemetry flush counters"""
+    return jsonify(telemetry_buffer.stats())
+
+@app.route('/api/gitlab/webhook', methods=['POST'])
+def api_gitlab_webhook():
+    """Receiver for GitLab project or group webhooks (push, merge request, issue and pipeline events)
+
+    GitLab must send GITLAB_WEBHOOK_SECRET as the hook's secret token.
+    Events are queued and applied in the background; 202 once queued, 503
+    when the queue is full so GitLab retries. Other event types are ignored.
+    """
+    secret = os.getenv('GITLAB_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({"success": False, "error": "Webhooks are not configured"}), 503
+    if not verify_token(request.headers.get('X-Gitlab-Token'), secret):
+        return jsonify({"success": False, "error": "Invalid webhook token"}), 401
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"success": False, "error": "Expected a JSON object"}), 400
+
+    event = request.headers.get('X-Gitlab-Event', '')
+    if event not in WEBHOOK_EVENTS:
+        return jsonify({"success": True, "ignored": event})
+    if not gitlab_webhooks.submit(event, payload):
+        return jsonify({"success": False, "error": "Webhook queue full, retry later"}), 503
+    return jsonify({"success": True, "queued": event}), 202
+
+@app.route('/api/gitlab/webhook/stats')
+def api_gitlab_webhook_stats():
+    """API endpoint for webhook queue and apply counters"""
+    return jsonify(gitlab_webhooks.stats())
+
+def _generate_recommendations(user_id, gitlab_metrics):
+    """Background job: generate and store Gemini recommendations from the metrics the request served"""
+    recommendations = gemini.get_recommendations(get_developer_details(user_id, gitlab_metrics))
+    # Raise so the job fails instead of caching an error as the latest result
+    if recommendations.get('error') or not recommendations.get('recommendations'):
+        raise RuntimeError(recommendations.get('error') or "Gemini returned no recommendations")
+    mongodb.save_recommendations(user_id, stamp_activity(recommendations, gitlab_metrics))
+    return recommendations
+
+def _generate_adk_insights(user_id, gitlab_metrics):
+    """Background job: generate and store ADK insights from the metrics the request served"""
+    insights = get_adk_insights(get_developer_details(user_id, gitlab_metrics))
+    if insights.get('error'):
+        raise RuntimeError(insights['error'])
+    mongodb.save_insights(user_id, stamp_activity(insights, gitlab_metrics))
+    return insights
+
+def _serve_ai_result(kind, user_id, generate, gitlab_metrics, stored=None):
+    """Answer from the last AI result, queueing a regeneration when it is stale
+
+    Returns the result with status 'done' when fresh, the stale result with
+    status 'stale' and a job id while a new one is generated, or status
+    'pending' and a job id to poll at /api/jobs/<job_id> when nothing exists yet.
+    A stored result also counts as fresh while the developer's activity has
+    not materially changed since it was generated (see utils.precompute).
+    """
+    key = f"{kind}:{user_id}"
+    latest = job_queue.latest_result(key)
+    if latest and time.time() - latest['finished_at'] < AI_RESULT_MAX_AGE_SECONDS:
+        return jsonify({**latest['result'], 'status': 'done'})
+    cached = latest['result'] if latest else stored
+    fresh = cached and (
+        is_fresh_result(cached, AI_RESULT_MAX_AGE_SECONDS)
+        or not staleness_reason(cached, gitlab_metrics)
+    )
+    if fresh and not job_queue.is_active(key):
+        return jsonify({**cached, 'status': 'done'})
+
+    job_id = job_queue.submit(kind, key, generate, user_id, gitlab_metrics)
+    if cached:
+        return jsonify({**cached, 'status': 'stale', 'job_id': job_id})
+    return jsonify({'status': 'pending', 'job_id': job_id}), 202
+
+recommendation_engine = RecommendationEngine(
+    job_queue,
+    _generate_recommendations,
+    budget_seconds=RECOMMENDATION_BUDGET_SECONDS,
+    max_age_seconds=AI_RESULT_MAX_AGE_SECONDS
+)
+
 @app.route('/api/recommendations/<user_id>')
 def api_recommendations(user_id):
-    """API endpoint for AI recommendations"""
-    gitlab_metrics = gitlab_api.get_developer_metrics(user_id)
-    developer_details = {
-        'user_info': {
-            'name': get_hardcoded_users()[user_id]['name'],
-            'username': user_id,
-            'role': get_hardcoded_users()[user_id]['role']
-        },
-        'activity': {
-            'total_events': gitlab_metrics.get('commits_this_week', 0),
-            'total_projects': len(gitlab_metrics.get('gitlab_projects', [])),
-            'projects': gitlab_metrics.get('gitlab_projects', [])[:5]
-        },
-        'contributions': {
-            'commits': {'total': gitlab_metrics.get('commits_this_week', 0)},
-            'merge_requests': {
-                'total': gitlab_metrics.get('merge_requests_open', 0) + gitlab_metrics.get('merge_requests_merged', 0),
-                'open': gitlab_metrics.get('merge_requests_open', 0),
-                'merged': gitlab_metrics.get('merge_requests_merged', 0)
-            },
-            'issues': {
-                'total': gitlab_metrics.get('issues_assigned', 0),
-                'open': gitlab_metrics.get('issues_assigned', 0) - gitlab_metrics.get('issues_closed', 0),
-                'closed': gitlab_metrics.get('issues_closed', 0)
-            }
-        }
-    }
-    recommendations = gemini.get_recommendations(developer_details)
-    return jsonify(recommendations)
+    """API endpoint for AI recommendations
+
+    Answers within budget_ms (default RECOMMENDATION_BUDGET_MS, at most twice
+    that): with Gemini recommendations when they are ready, otherwise with
+    rule-based ones and a job id to poll for the Gemini upgrade.
+    """
+    budget_ms = request.args.get('budget_ms', type=float)
+    if budget_ms is not None:
+        budget_ms = max(0.0, min(budget_ms, 2 * RECOMMENDATION_BUDGET_SECONDS * 1000))
+    gitlab_metrics = dashboard_cache.get(user_id)['gitlab_metrics']
+    result = recommendation_engine.get_recommendations(
+        user_id,
+        gitlab_metrics,
+        stored=mongodb.get_latest_recommendations(user_id),
+        budget_seconds=budget_ms / 1000.0 if budget_ms is not None else None
+    )
+    return jsonify(result)
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API endpoint for polling a background job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+    return jsonify(job)
+
+@app.route('/api/ai_cache/stats')
+def api_ai_cache_stats():
+    """API endpoint for prompt cache hit ratio and savings"""
+    return jsonify({**prompt_cache.stats(), 'image_uploads': image_uploads.stats()})
+
+@app.route('/api/ai_scheduler/stats')
+def api_ai_scheduler_stats():
+    """API endpoint for Gemini queueing delay and admission counters"""
+    return jsonify(gemini_scheduler.stats())
+
+@app.route('/api/dashboard/<user_id>/invalidate', methods=['POST'])
+def api_invalidate_dashboard(user_id):
+    """API endpoint to drop a user's precomputed dashboard model"""
+    dashboard_cache.invalidate(user_id)
+    return jsonify({"success": True, "user_id": user_id})
 
 @app.route('/api/analyze_image', methods=['POST'])
 def api_analyze_image():
@@ -241,30 +480,13 @@ def api_adk_insights(user_id):
     """API endpoint for ADK insights"""
     try:
         app.logger.info(f"Processing ADK insights request for user: {user_id}")
-        
-        # Get GitLab metrics
-        gitlab_metrics = gitlab_api.get_developer_metrics(user_id) or {}
-        app.logger.info(f"Retrieved GitLab metrics: {gitlab_metrics}")
-        
-        # Get user information
-        users = get_hardcoded_users()
-        current_user = users.get(user_id, users['dev1'])
-        app.logger.info(f"Retrieved user info: {current_user}")
-        
-        # Prepare developer details for ADK
-        developer_details = {
-            'name': current_user.get('name', 'Unknown'),
-            'role': current_user.get('role', 'developer'),
-            'recent_activity': gitlab_metrics.get('recent_activity', []),
-            'skills': gitlab_metrics.get('skills', [])
-        }
-        app.logger.info(f"Prepared developer details: {developer_details}")
-        
-        # Get insights from ADK agent
-        insights = get_adk_insights(developer_details)
-        app.logger.info("Successfully generated insights")
-        
-        return jsonify(insights)
+        return _serve_ai_result(
+            'adk_insights',
+            user_id,
+            _generate_adk_insights,
+            dashboard_cache.get(user_id)['gitlab_metrics'],
+            stored=mongodb.get_latest_insights(user_id)
+        )
         
     except Exception as e:
         app.logger.error(f"Error in ADK insights endpoint: {str(e)}")
@@ -275,6 +497,41 @@ def api_adk_insights(user_id):
             'timestamp': datetime.now(timezone.utc).isoformat()
         }), 500
 
+@app.route('/api/adk_insights/<user_id>/stream')
+def api_adk_insights_stream(user_id):
+    """Server-sent events endpoint streaming ADK insights as they are generated
+
+    Each message carries the next text chunk; a final 'done' event carries
+    the timestamp, or an 'error' event the failure. The assembled insights
+    are stored like the background job's, for /api/adk_insights and the
+    precompute staleness check.
+    """
+    gitlab_metrics = dashboard_cache.get(user_id)['gitlab_metrics']
+    developer_details = get_developer_details(user_id, gitlab_metrics)
+
+    def generate():
+        try:
+            chunks, sections = [], []
+            for event in stream_adk_insights(developer_details):
+                sections.extend(event['sections'])
+                if event['chunk']:
+                    chunks.append(event['chunk'])
+                    yield f"data: {json.dumps({'chunk': event['chunk']})}\n\n"
+            done = {'timestamp': datetime.now(timezone.utc).isoformat()}
+            insights = {'insights': ''.join(chunks), 'sections': sections, 'timestamp': done['timestamp']}
+            mongodb.save_insights(user_id, stamp_activity(insights, gitlab_metrics))
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+        except Exception as e:
+            app.logger.error(f"Error streaming ADK insights: {str(e)}")
+            app.logger.error(traceback.format_exc())
+            yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.errorhandler(404)
 def page_not_found(e):
     return render_template('base.html'), 404
@@ -24,6 +24,23 @@ document.addEventListener('DOMContentLoaded', function() {
     setInterval(updateDeviceStatus, 60000); // Update every minute
 });
 
+// Fetch one metric's chart series for the last week from /api/series
+function loadSeries(userId, metric, options = {}) {
+    const params = new URLSearchParams({
+        users: userId,
+        metric: metric,
+        utc_offset: -new Date().getTimezoneOffset() * 60,
+        ...options
+    });
+    return fetch(`/api/series?${params}`)
+        .then(response => response.json())
+        .then(data => (data.success && data.series.length ? data.series[0] : {points: []}))
+        .catch(error => {
+            console.error(`Error loading ${metric} series:`, error);
+            return {points: []};
+        });
+}
+
 // Initialize focus score chart
 function initFocusChart(data, labels) {
     const ctx = document.getElementById('focusChart');
@@ -38,7 +55,7 @@ function initFocusChart(data, labels) {
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: labels.map(date => new Date(date).toLocaleDateString('en-US', { weekday: 'short' })),
+            labels: labels.map(date => new Date(date).toLocaleString('en-US', { weekday: 'short', hour: 'numeric' })),
             datasets: [{
                 label: 'Focus Score',
                 data: data,
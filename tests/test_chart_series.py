@@ -0,0 +1,56 @@
+import time
+
+from utils.chart_series import series_from_samples, team_stats
+from utils.telemetry_series import TelemetrySeries
+
+def _screen_time_only_telemetry():
+    now = int(time.time())
+    batch = {
+        'user_id': 'dev1',
+        'device_id': 'laptop',
+        'device_type': 'desktop',
+        'batch_id': 'batch-1',
+        'timestamps': [now - 600, now - 300],
+        'series': {'screen_seconds': [300, 300]}
+    }
+    return TelemetrySeries.from_batches([batch]).to_dashboard()
+
+def test_team_stats_with_partial_telemetry():
+    telemetry = _screen_time_only_telemetry()
+    team = {
+        'dev1': {'gitlab': {'productivity_score': 7.0}, 'telemetry': telemetry, 'user_info': {'name': 'Dev One'}},
+        'dev2': {
+            'gitlab': {'productivity_score': 9.0},
+            'telemetry': {'daily_data': [{'focus_score': 80, 'screen_time_hours': 6.0}],
+                          'health_data': {'sleep_hours': 7.0, 'stress_level': 30}},
+            'user_info': {'name': 'Dev Two'}
+        }
+    }
+    stats = team_stats(team)
+    assert stats['total_developers'] == 2
+    # dev1 never reported focus or stress, so only dev2 counts towards them
+    assert stats['average_focus'] == 80
+    assert stats['average_stress_level'] == 30
+    assert stats['average_screen_time_hours'] == round((0.2 + 6.0) / 2, 1)
+
+def test_team_stats_without_any_reported_value():
+    stats = team_stats({'dev1': {'gitlab': {}, 'telemetry': _screen_time_only_telemetry(), 'user_info': {}}})
+    assert stats['average_focus'] == 0.0
+    assert stats['average_stress_level'] == 0.0
+
+def test_explicit_daily_bucket_keeps_every_day():
+    end = int(time.time())
+    start = end - 7 * 86400
+    timestamps = list(range(start, end, 3600))
+    series = TelemetrySeries.from_batches([{
+        'user_id': 'dev1',
+        'device_id': 'laptop',
+        'device_type': 'desktop',
+        'batch_id': 'batch-1',
+        'timestamps': timestamps,
+        'series': {'screen_seconds': [60] * len(timestamps)}
+    }])
+    # A 7-day range that does not start at midnight touches 8 days
+    daily = series_from_samples(series, 'screen_seconds', start, end, 7, bucket=86400)
+    assert daily['bucket_seconds'] == 86400
+    assert len(daily['points']) == 8
@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+COMMIT = 'commit'
+MERGE_REQUEST = 'merge_request'
+ISSUE = 'issue'
+
+# Weight of each kind in the weekly contribution trend
+TREND_WEIGHTS = {COMMIT: 1, MERGE_REQUEST: 2, ISSUE: 1}
+TREND_DAYS = 7
+# Commits at most this many whole days old count as this week's
+THIS_WEEK_DAYS = 7
+
+# Newest items of each kind offered to the recent activity feed, and its length
+RECENT_PER_KIND = {COMMIT: 3, MERGE_REQUEST: 2, ISSUE: 2}
+RECENT_ACTIVITY_LIMIT = 5
+RECENT_PREFIXES = {COMMIT: 'Committed', MERGE_REQUEST: 'Merge Request', ISSUE: 'Issue'}
+
+DEFAULT_MERGE_HOURS = 24.0
+LINES_PER_COMMIT = 75
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a GitLab ISO 8601 timestamp ('Z' or offset suffix)"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _parse_or_none(value: Any) -> Optional[datetime]:
+    try:
+        return parse_timestamp(value)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+class ActivityRecords:
+    """GitLab items of one kind with their timestamps parsed once, as columns
+
+    created and merged hold datetimes in the items' order (newest first as
+    fetched); merged is only parsed for merged MRs. Commits need a valid
+    created_at and MRs and issues a state, or construction raises; other
+    unusable timestamps are kept as None, which the metrics below treat the
+    way the per-metric GitLabAPI helpers treat an unparseable value.
+    """
+
+    def __init__(self, kind: str, items: List[Dict]):
+        self.kind = kind
+        self.items = items
+        if kind == COMMIT:
+            self.states = []
+            self.created = [parse_timestamp(item['created_at']) for item in items]
+        else:
+            self.states = [item['state'] for item in items]
+            try:
+                self.created = [parse_timestamp(item['created_at']) for item in items]
+            except (KeyError, AttributeError, TypeError, ValueError):
+                self.created = [_parse_or_none(item.get('created_at')) for item in items]
+        if kind == MERGE_REQUEST:
+            self.merged = [_parse_or_none(item.get('merged_at')) if state == 'merged' else None
+                           for item, state in zip(items, self.states)]
+        else:
+            self.merged = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def count(self, state: str) -> int:
+        return self.states.count(state)
+
+    def add_trend(self, trend: List[int], now: datetime) -> bool:
+        """Add this kind's weighted counts per day ago into trend; False if a timestamp is unusable"""
+        weight = TREND_WEIGHTS[self.kind]
+        days = len(trend)
+        try:
+            for created in self.created:
+                days_ago = (now - created).days
+                if 0 <= days_ago < days:
+                    trend[days_ago] += weight
+        except TypeError:
+            return False
+        return True
+
+    def merge_hours(self) -> Optional[List[float]]:
+        """Hours from creation to merge of each merged MR, None if any lacks usable timestamps"""
+        try:
+            return [(merged - created).total_seconds() / 3600
+                    for state, created, merged in zip(self.states, self.created, self.merged)
+                    if state == 'merged']
+        except TypeError:
+            return None
+
+    def recent(self) -> List[Dict[str, str]]:
+        """Activity feed entries for this kind's newest items"""
+        prefix = RECENT_PREFIXES[self.kind]
+        return [{
+            'type': self.kind,
+            'action': f"{prefix}: {item.get('title', '')}",
+            'timestamp': item.get('created_at', '')
+        } for item in self.items[:RECENT_PER_KIND[self.kind]]]
+
+def productivity_score(commits: int, merge_requests: int, issues: int) -> float:
+    """Activity score out of 10 from item counts"""
+    commit_score = min(commits * 0.5, 5.0)
+    mr_score = min(merge_requests * 0.3, 3.0)
+    issue_score = min(issues * 0.2, 2.0)
+    return min(commit_score + mr_score + issue_score, 10.0)
+
+def collaboration_score(merge_requests: int, issues: int) -> float:
+    """Collaboration score out of 10 from MR and issue counts"""
+    mr_score = min(merge_requests * 0.6, 6.0)
+    issue_score = min(issues * 0.4, 4.0)
+    return min(mr_score + issue_score, 10.0)
+
+def aggregate(commits: ActivityRecords, merge_requests: ActivityRecords, issues: ActivityRecords,
+              now: datetime) -> Dict[str, Any]:
+    """Every event-derived developer metric from parsed records
+
+    Values match GitLabAPI's per-metric helpers, with this week's commits
+    and the weekly trend both measured back from now.
+    """
+    commits_this_week = 0
+    trend = [0] * TREND_DAYS
+    for created in commits.created:
+        days_ago = (now - created).days
+        if days_ago <= THIS_WEEK_DAYS:
+            commits_this_week += 1
+            if 0 <= days_ago < TREND_DAYS:
+                trend[days_ago] += 1
+    if not (merge_requests.add_trend(trend, now) and issues.add_trend(trend, now)):
+        trend = [0] * TREND_DAYS
+
+    merge_hours = merge_requests.merge_hours()
+    if merge_hours:
+        total_hours = 0
+        for hours in merge_hours:
+            total_hours += hours
+        avg_merge_time = round(total_hours / len(merge_hours), 1)
+    else:
+        avg_merge_time = DEFAULT_MERGE_HOURS
+
+    activities = commits.recent() + merge_requests.recent() + issues.recent()
+    return {
+        'commits_this_week': commits_this_week,
+        'merge_requests_open': merge_requests.count('opened'),
+        'merge_requests_merged': merge_requests.count('merged'),
+        'issues_assigned': issues.count('opened'),
+        'issues_closed': issues.count('closed'),
+        'productivity_score': productivity_score(len(commits), len(merge_requests), len(issues)),
+        'collaboration_score': collaboration_score(len(merge_requests), len(issues)),
+        'recent_activity': sorted(activities, key=lambda x: x['timestamp'], reverse=True)[:RECENT_ACTIVITY_LIMIT],
+        'weekly_contribution_trend': trend,
+        'lines_of_code': len(commits) * LINES_PER_COMMIT,
+        'avg_merge_time_hours': avg_merge_time
+    }
+
+def aggregate_items(commits: List[Dict], merge_requests: List[Dict], issues: List[Dict],
+                    now: datetime) -> Dict[str, Any]:
+    """aggregate() over raw GitLab items, parsing each timestamp once"""
+    return aggregate(ActivityRecords(COMMIT, commits), ActivityRecords(MERGE_REQUEST, merge_requests),
+                     ActivityRecords(ISSUE, issues), now)
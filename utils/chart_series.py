@@ -0,0 +1,221 @@
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.telemetry_series import METRICS, SECONDS_PER_DAY, TelemetrySeries
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Point counts a client may ask for per series
+DEFAULT_POINTS = 120
+MAX_POINTS = 1000
+# Buckets per output point fed to LTTB, so it has shape to choose from
+OVERSAMPLE = 4
+MIN_BUCKET_SECONDS = 60
+DEFAULT_RANGE_SECONDS = 7 * SECONDS_PER_DAY
+MAX_SERIES_USERS = 50
+
+# Level metrics are averaged per bucket; everything else is a per-bucket total
+MEAN_METRICS = ('focus_score', 'heart_rate', 'stress_level', 'sleep_quality')
+
+# Daily sample-data fields standing in for metrics when a user has no device samples
+_DAILY_FIELDS = {
+    'screen_seconds': ('screen_time_hours', 3600),
+    'focus_score': ('focus_score', 1),
+    'deep_work_seconds': ('deep_work_hours', 3600),
+    'breaks': ('break_count', 1)
+}
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last point and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next bucket. Peaks and
+    dips survive, unlike with plain averaging or striding.
+    """
+    n = len(x)
+    threshold = max(threshold, 3)
+    if threshold >= n:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[hi:next_hi].mean()
+        next_y = y[hi:next_hi].mean()
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous]) -
+            (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int) -> List[List[float]]:
+    """[[x, y], ...] with at most points entries, NaNs dropped"""
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    kept = lttb(x, y, points)
+    return [[int(x[i]), round(float(y[i]), 2)] for i in kept]
+
+def bucket_seconds(start: int, end: int, points: int) -> int:
+    """Pre-aggregation bucket so a range yields about points * OVERSAMPLE buckets"""
+    return max(MIN_BUCKET_SECONDS, math.ceil((end - start) / (points * OVERSAMPLE)))
+
+def aggregation(metric: str) -> str:
+    return 'mean' if metric in MEAN_METRICS else 'sum'
+
+def series_from_samples(series: TelemetrySeries, metric: str, start: int, end: int, points: int,
+                        utc_offset_seconds: int = 0, bucket: Optional[int] = None) -> Dict[str, Any]:
+    """Bucketed, LTTB-downsampled points of one metric from device samples
+
+    When the caller's bucket is the one used, every bucket is kept: a range
+    rarely aligns with local days, so 7 days of daily buckets span 8.
+    """
+    explicit = bucket is not None and bucket >= bucket_seconds(start, end, points)
+    bucket = max(bucket or 0, bucket_seconds(start, end, points))
+    rolled = series.rollup(bucket, utc_offset_seconds, start, end)
+    values = rolled[aggregation(metric)][metric]
+    if explicit:
+        points = max(points, len(rolled['start']))
+    return {
+        'bucket_seconds': bucket,
+        'points': downsample(rolled['start'].astype(np.float64), np.asarray(values, dtype=np.float64), points)
+    }
+
+def series_from_daily(daily_data: List[Dict[str, Any]], metric: str, start: int, end: int,
+                      points: int, bucket: Optional[int] = None) -> Dict[str, Any]:
+    """Points of one metric from the daily rows of the generated sample telemetry
+
+    Every row is kept when the caller asked for daily (or coarser) buckets.
+    """
+    field, scale = _DAILY_FIELDS[metric]
+    rows = []
+    for day in daily_data:
+        if day.get(field) is None:
+            continue
+        timestamp = int(datetime.strptime(day['date'], '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+        if start <= timestamp < end:
+            rows.append((timestamp, float(day[field]) * scale))
+    rows.sort()
+    x = np.array([row[0] for row in rows], dtype=np.float64)
+    y = np.array([row[1] for row in rows], dtype=np.float64)
+    if bucket is not None and bucket >= SECONDS_PER_DAY:
+        points = max(points, len(rows))
+    return {'bucket_seconds': SECONDS_PER_DAY, 'points': downsample(x, y, points)}
+
+def query_series(mongo_manager, user_id: str, metric: str, start: int, end: int, points: int,
+                 utc_offset_seconds: int = 0, bucket: Optional[int] = None,
+                 fallback: Optional[Callable[[str], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """One user's series for a chart: at most points [epoch, value] pairs over [start, end)
+
+    Device samples are rolled up into buckets with prefix sums and then
+    downsampled with LTTB, so the payload size depends on points, not on how
+    much history the range covers. bucket asks for coarser buckets (e.g. a
+    day for daily totals). Users without samples fall back to the daily rows
+    of fallback(user_id), where that metric has one.
+    """
+    result = {
+        'user_id': user_id,
+        'metric': metric,
+        'aggregation': aggregation(metric),
+        'start': start,
+        'end': end,
+        'source': 'samples'
+    }
+    batches = mongo_manager.get_telemetry_samples(user_id, since=start, until=end)
+    if batches:
+        result.update(series_from_samples(TelemetrySeries.from_batches(batches), metric,
+                                          start, end, points, utc_offset_seconds, bucket))
+        return result
+
+    if fallback and metric in _DAILY_FIELDS:
+        result['source'] = 'generated'
+        result.update(series_from_daily(fallback(user_id).get('daily_data', []), metric, start, end, points,
+                                         bucket))
+        return result
+
+    result.update({'source': None, 'bucket_seconds': None, 'points': []})
+    return result
+
+def validate_metric(metric: str) -> Optional[str]:
+    """Error message for an unknown series metric, else None"""
+    if metric not in METRICS:
+        return f"Unknown metric: {metric}. Expected one of {', '.join(METRICS)}"
+    return None
+
+def health_score(health_data: Dict[str, Any]) -> int:
+    """0-100 health score from sleep, stress and activity"""
+    sleep_score = min(100.0, (health_data.get('sleep_hours') or 0) / 8 * 100)
+    stress_score = 100 - (health_data.get('stress_level') or 0)
+    activity_score = min(100.0, (health_data.get('active_minutes') or 0) / 60 * 100)
+    return round((sleep_score + stress_score + activity_score) / 3)
+
+def _mean(values: List[Optional[float]], digits: int = 1) -> float:
+    """Mean of the reported values; metrics a developer never sent are None and skipped"""
+    values = [value for value in values if value is not None]
+    return round(sum(values) / len(values), digits) if values else 0.0
+
+def team_stats(team_metrics: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Team overview for the admin page, one row per developer plus team totals
+
+    team_metrics maps user_id to {'gitlab', 'telemetry', 'user_info'}. The
+    result grows with the team, not with history: each developer contributes
+    a fixed set of latest scores.
+    """
+    developers = []
+    for user_id, data in team_metrics.items():
+        gitlab = data.get('gitlab') or {}
+        telemetry = data.get('telemetry') or {}
+        health = telemetry.get('health_data') or {}
+        today = (telemetry.get('daily_data') or [{}])[0]
+        developers.append({
+            'user_id': user_id,
+            'name': (data.get('user_info') or {}).get('name', user_id),
+            'productivity_score': gitlab.get('productivity_score', 0.0),
+            'collaboration_score': gitlab.get('collaboration_score', 0.0),
+            'commits_this_week': gitlab.get('commits_this_week', 0),
+            'merge_requests_merged': gitlab.get('merge_requests_merged', 0),
+            'merge_requests_open': gitlab.get('merge_requests_open', 0),
+            'health_score': health_score(health),
+            'focus_score': today.get('focus_score', 0),
+            'screen_time_hours': today.get('screen_time_hours', 0),
+            'sleep_hours': health.get('sleep_hours', 0),
+            'stress_level': health.get('stress_level', 0)
+        })
+
+    def column(key):
+        return [developer[key] for developer in developers]
+
+    return {
+        'total_developers': len(developers),
+        'average_productivity': _mean(column('productivity_score')),
+        'average_collaboration': _mean(column('collaboration_score')),
+        'average_health': round(_mean(column('health_score'), 2)),
+        'average_focus': _mean(column('focus_score')),
+        'average_sleep_hours': _mean(column('sleep_hours')),
+        'average_stress_level': _mean(column('stress_level')),
+        'average_screen_time_hours': _mean(column('screen_time_hours')),
+        'total_commits': sum(column('commits_this_week')),
+        'total_merge_requests_merged': sum(column('merge_requests_merged')),
+        'open_merge_requests': sum(column('merge_requests_open')),
+        'high_performers': sum(
+            1 for d in developers if d['productivity_score'] >= 8.0 and d['health_score'] >= 80),
+        'needs_support': sum(
+            1 for d in developers
+            if not (d['productivity_score'] >= 8.0 and d['health_score'] >= 80)
+            and (d['productivity_score'] < 6.0 or d['health_score'] < 60)),
+        'developers': developers
+    }
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from utils.activity_metrics import RECENT_ACTIVITY_LIMIT
+
+from utils.data_generator import get_hardcoded_users, get_achievements, get_recommendations as get_rule_recommendations
+from ai.prompts import PROFILE_METRICS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of historical items kept per tab in a dashboard model
+DASHBOARD_HISTORY_LIMIT = 50
+
+def get_developer_details(user_id: str, gitlab_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the developer profile sent to Gemini for recommendations"""
+    users = get_hardcoded_users()
+    current_user = users.get(user_id, users['dev1'])
+    return {
+        'name': current_user.get('name', 'Unknown'),
+        'team': current_user.get('team', 'Unknown'),
+        'role': current_user.get('role', 'developer'),
+        'recent_activity': gitlab_metrics.get('recent_activity', []),
+        'skills': gitlab_metrics.get('skills', []),
+        'metrics': {key: gitlab_metrics[key] for key, _ in PROFILE_METRICS if key in gitlab_metrics}
+    }
+
+class DashboardModelCache:
+    """Per-user precomputed view models for the dashboard route
+
+    Models are kept in memory for a short TTL and persisted to MongoDB, so a
+    refresh done by the sync job in another process is picked up by the web
+    workers. Gemini is not called here; the dashboard renders the last stored
+    (or rule-based) recommendations and loads fresh ones asynchronously.
+    """
+
+    def __init__(self, gitlab_api, mongo_manager=None, ttl_seconds: int = 60,
+                 max_age_seconds: int = 24 * 3600):
+        self.gitlab_api = gitlab_api
+        self.mongo_manager = mongo_manager
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """Get the dashboard model for a user, building it only on a cold miss"""
+        with self._lock:
+            model = self._models.get(user_id)
+            if model and time.monotonic() - self._loaded_at[user_id] < self.ttl_seconds:
+                return model
+
+        model = self._load_stored(user_id) or self.refresh(user_id)
+        self._remember(user_id, model)
+        return model
+
+    def refresh(self, user_id: str, gitlab_metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Rebuild and store the dashboard model for a user"""
+        if gitlab_metrics is None:
+            gitlab_metrics = self.gitlab_api.get_developer_metrics(
+                user_id, history_limit=DASHBOARD_HISTORY_LIMIT
+            ) or {}
+        model = self.build(user_id, gitlab_metrics)
+        self._remember(user_id, model)
+        if self.mongo_manager:
+            self.mongo_manager.save_dashboard_model(user_id, model)
+        logger.info(f"Refreshed dashboard model for user {user_id}")
+        return model
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop cached models so the next request picks up fresh data"""
+        with self._lock:
+            if user_id is None:
+                self._models.clear()
+                self._loaded_at.clear()
+            else:
+                self._models.pop(user_id, None)
+                self._loaded_at.pop(user_id, None)
+        if self.mongo_manager:
+            self.mongo_manager.delete_dashboard_model(user_id)
+
+    def patch(self, user_id: str, updates: Dict[str, Any], counts: Optional[Dict[str, int]] = None,
+              history: Optional[Dict[str, Dict[str, Any]]] = None,
+              activity: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """Apply incremental changes (webhook events) to a user's current model without fetching GitLab
+
+        updates replaces metric values, counts adds to counters, history maps
+        a kind to a formatted item that replaces its copy or goes first (the
+        list keeps DASHBOARD_HISTORY_LIMIT items), and activity is a new
+        recent activity entry. Returns the new model, or None when the user
+        has no current model (the next request builds one).
+        """
+        while True:
+            with self._lock:
+                current = self._models.get(user_id)
+            model = current or self._load_stored(user_id)
+            if not model:
+                return None
+            model = self.build(user_id, self._patched_metrics(model['gitlab_metrics'], updates, counts,
+                                                              history, activity))
+            with self._lock:
+                # Rebuild on top of a refresh or patch that landed meanwhile instead of overwriting it
+                if self._models.get(user_id) is not current:
+                    continue
+                self._models[user_id] = model
+                self._loaded_at[user_id] = time.monotonic()
+            break
+        if self.mongo_manager:
+            self.mongo_manager.save_dashboard_model(user_id, model)
+        return model
+
+    @staticmethod
+    def _patched_metrics(gitlab_metrics: Dict[str, Any], updates: Dict[str, Any],
+                         counts: Optional[Dict[str, int]], history: Optional[Dict[str, Dict[str, Any]]],
+                         activity: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """A copy of gitlab_metrics with the changes of patch() applied"""
+        gitlab_metrics = dict(gitlab_metrics)
+        gitlab_metrics.update(updates)
+        for key, delta in (counts or {}).items():
+            gitlab_metrics[key] = max(gitlab_metrics.get(key, 0) + delta, 0)
+        historical_data = dict(gitlab_metrics.get('historical_data') or {})
+        for kind, item in (history or {}).items():
+            items = list(historical_data.get(kind, []))
+            position = next((i for i, existing in enumerate(items) if existing.get('id') == item.get('id')), None)
+            if position is None:
+                items.insert(0, item)
+            else:
+                items[position] = item
+            historical_data[kind] = items[:DASHBOARD_HISTORY_LIMIT]
+        gitlab_metrics['historical_data'] = historical_data
+        if activity:
+            gitlab_metrics['recent_activity'] = sorted([activity] + list(gitlab_metrics.get('recent_activity', [])),
+                                                       key=lambda x: x['timestamp'],
+                                                       reverse=True)[:RECENT_ACTIVITY_LIMIT]
+        return gitlab_metrics
+
+    def build(self, user_id: str, gitlab_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the dashboard view model from GitLab metrics"""
+        users = get_hardcoded_users()
+        current_user = users.get(user_id, users['dev1'])
+        gitlab_metrics = dict(gitlab_metrics)
+        historical_data = gitlab_metrics.get('historical_data') or {}
+        gitlab_metrics['historical_data'] = {
+            kind: list(historical_data.get(kind, []))[:DASHBOARD_HISTORY_LIMIT]
+            for kind in ('commits', 'merge_requests', 'issues')
+        }
+
+        # Reuse the last stored Gemini recommendations, falling back to the
+        # rule-based ones; the page upgrades them asynchronously
+        recommendations = []
+        if self.mongo_manager:
+            stored = self.mongo_manager.get_latest_recommendations(user_id) or {}
+            recommendations = stored.get('recommendations', [])
+        recommendations_source = 'gemini'
+        if not recommendations:
+            recommendations = get_rule_recommendations(user_id, gitlab_metrics)
+            recommendations_source = 'rules'
+
+        return {
+            'user_id': user_id,
+            'current_user': current_user,
+            'gitlab_metrics': gitlab_metrics,
+            'developer_details': get_developer_details(user_id, gitlab_metrics),
+            'recommendations': recommendations,
+            'recommendations_source': recommendations_source,
+            'achievements': get_achievements(user_id) or [],
+            'productivity_insights': {
+                'productivity_score': gitlab_metrics.get('productivity_score', 7),
+                'collaboration_score': gitlab_metrics.get('collaboration_score', 6),
+                'strengths': [
+                    'Active project participation',
+                    'Multiple project contributions',
+                    'Regular code commits'
+                ],
+                'areas_for_improvement': [
+                    'Issue tracking',
+                    'Documentation',
+                    'Code review participation'
+                ]
+            },
+            'weekly_goals': [
+                {
+                    'goal': 'Improve Issue Management',
+                    'metric': 'Number of issues created',
+                    'target': '5'
+                },
+                {
+                    'goal': 'Enhance Documentation',
+                    'metric': 'Documentation updates',
+                    'target': '3'
+                }
+            ],
+            'skill_development': {
+                'current_level': 'intermediate',
+                'recommended_focus': ['Project Management', 'Documentation'],
+                'learning_resources': ['GitLab Documentation', 'Project Management Best Practices']
+            },
+            'built_at': datetime.now(timezone.utc).isoformat()
+        }
+
+    def _load_stored(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Load a model persisted by another process, if any"""
+        if not self.mongo_manager:
+            return None
+        model = self.mongo_manager.get_dashboard_model(user_id)
+        if not model:
+            return None
+        try:
+            built_at = datetime.fromisoformat(model['built_at'])
+            age = (datetime.now(timezone.utc) - built_at).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return None
+        return model if age < self.max_age_seconds else None
+
+    def _remember(self, user_id: str, model: Dict[str, Any]):
+        """Keep a model in the in-memory tier"""
+        with self._lock:
+            self._models[user_id] = model
+            self._loaded_at[user_id] = time.monotonic()
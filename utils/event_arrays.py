@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from utils.activity_metrics import COMMIT, MERGE_REQUEST, ISSUE, TREND_WEIGHTS, parse_timestamp
+
+# Categorical codes; a state outside STATES is coded -1
+KINDS = (COMMIT, MERGE_REQUEST, ISSUE)
+STATES = ('opened', 'closed', 'merged', 'locked')
+_STATE_CODES = {state: code for code, state in enumerate(STATES)}
+MERGED = _STATE_CODES['merged']
+
+# Trend windows in days, and merge-time percentiles, reported by default
+DEFAULT_WINDOWS = (7, 30, 90)
+MERGE_PERCENTILES = (50, 75, 90, 95)
+
+US_PER_HOUR = 3600 * 10 ** 6
+US_PER_DAY = 24 * US_PER_HOUR
+# Timestamp or duration that was missing or could not be parsed (NumPy's NaT)
+MISSING = np.iinfo(np.int64).min
+# 1970-01-01 was a Thursday; weekday 0 is Monday as in datetime.weekday()
+_EPOCH_WEEKDAY = 3
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_KIND_WEIGHTS = np.array([TREND_WEIGHTS[kind] for kind in KINDS], dtype=np.int64)
+
+def epoch_microseconds(values: Sequence[Any]) -> np.ndarray:
+    """int64 microseconds since the epoch of GitLab timestamps, MISSING where unusable
+
+    UTC 'Z' timestamps, which is what GitLab returns, are parsed by NumPy in
+    one call; anything else falls back to parsing value by value.
+    """
+    if all(isinstance(value, str) and value.endswith('Z') for value in values):
+        try:
+            return np.array([value[:-1] for value in values], dtype='datetime64[us]').astype(np.int64)
+        except ValueError:
+            pass
+    result = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        try:
+            result[i] = (parse_timestamp(value) - _EPOCH) // _MICROSECOND
+        except (AttributeError, TypeError, ValueError):
+            result[i] = MISSING
+    return result
+
+def _epoch_us(moment: datetime) -> int:
+    return (moment - _EPOCH) // _MICROSECOND
+
+class EventArrays:
+    """GitLab commits, MRs and issues as parallel NumPy columns
+
+    created is int64 epoch microseconds, kind and state are categorical
+    codes (KINDS, STATES), merge_us is the creation-to-merge duration of
+    merged MRs (MISSING elsewhere) and owner indexes the developer when
+    several developers' arrays are concatenated.
+    """
+
+    def __init__(self, created: np.ndarray, kind: np.ndarray, state: np.ndarray,
+                 merge_us: np.ndarray, owner: Optional[np.ndarray] = None, owners: Sequence[str] = ('',)):
+        self.created = created
+        self.kind = kind
+        self.state = state
+        self.merge_us = merge_us
+        self.owner = owner if owner is not None else np.zeros(len(created), dtype=np.int32)
+        self.owners = list(owners)
+
+    def __len__(self) -> int:
+        return len(self.created)
+
+    @classmethod
+    def from_items(cls, commits: List[Dict], merge_requests: List[Dict], issues: List[Dict],
+                   owner: str = '') -> 'EventArrays':
+        """Arrays for one developer from raw GitLab items"""
+        items = [commits, merge_requests, issues]
+        created = epoch_microseconds([item.get('created_at') for group in items for item in group])
+        kind = np.repeat(np.arange(len(KINDS), dtype=np.int8), [len(group) for group in items])
+        state = np.array([_STATE_CODES.get(item.get('state'), -1) for group in items for item in group],
+                         dtype=np.int8)
+
+        merge_us = np.full(len(created), MISSING, dtype=np.int64)
+        rows = np.flatnonzero((kind == KINDS.index(MERGE_REQUEST)) & (state == MERGED))
+        if len(rows):
+            offset = len(commits)
+            merged = epoch_microseconds([merge_requests[row - offset].get('merged_at') for row in rows.tolist()])
+            valid = (merged != MISSING) & (created[rows] != MISSING)
+            merge_us[rows[valid]] = merged[valid] - created[rows[valid]]
+        return cls(created, kind, state, merge_us, owners=[owner])
+
+    @classmethod
+    def concatenate(cls, arrays_by_owner: Dict[str, 'EventArrays']) -> 'EventArrays':
+        """One set of arrays over several developers, owner indexing their names"""
+        owners = list(arrays_by_owner)
+        parts = list(arrays_by_owner.values())
+        if not parts:
+            return cls.empty(owners)
+        return cls(
+            np.concatenate([part.created for part in parts]),
+            np.concatenate([part.kind for part in parts]),
+            np.concatenate([part.state for part in parts]),
+            np.concatenate([part.merge_us for part in parts]),
+            np.repeat(np.arange(len(parts), dtype=np.int32), [len(part) for part in parts]),
+            owners
+        )
+
+    @classmethod
+    def empty(cls, owners: Sequence[str] = ('',)) -> 'EventArrays':
+        return cls(np.empty(0, np.int64), np.empty(0, np.int8), np.empty(0, np.int8),
+                   np.empty(0, np.int64), owners=owners)
+
+    def trends(self, now: datetime, days: int) -> np.ndarray:
+        """(owners, days) weighted contributions per day ago, as the weekly trend weighs them"""
+        groups = len(self.owners)
+        days_ago = (_epoch_us(now) - self.created) // US_PER_DAY
+        keep = (self.created != MISSING) & (days_ago >= 0) & (days_ago < days)
+        index = self.owner[keep].astype(np.int64) * days + days_ago[keep]
+        counts = np.bincount(index, weights=_KIND_WEIGHTS[self.kind[keep]], minlength=groups * days)
+        return counts.astype(np.int64).reshape(groups, days)
+
+    def histograms(self, utc_offset_seconds: int = 0) -> np.ndarray:
+        """(owners, 7, 24) item counts by local weekday (Monday first) and hour"""
+        groups = len(self.owners)
+        local = self.created[self.created != MISSING] + utc_offset_seconds * 10 ** 6
+        owner = self.owner[self.created != MISSING].astype(np.int64)
+        weekday = (local // US_PER_DAY + _EPOCH_WEEKDAY) % 7
+        hour = (local % US_PER_DAY) // US_PER_HOUR
+        counts = np.bincount(owner * 168 + weekday * 24 + hour, minlength=groups * 168)
+        return counts.reshape(groups, 7, 24)
+
+    def merge_time_stats(self, percentiles: Sequence[float] = MERGE_PERCENTILES) -> List[Dict[str, Any]]:
+        """Per-owner merge-time count, mean and percentiles in hours (None without merges)
+
+        Percentiles interpolate linearly between closest ranks, as
+        np.percentile does, computed for all owners in one sort.
+        """
+        groups = len(self.owners)
+        timed = self.merge_us != MISSING
+        owner = self.owner[timed]
+        hours = self.merge_us[timed] / US_PER_HOUR
+        order = np.lexsort((hours, owner))
+        hours, owner = hours[order], owner[order]
+        counts = np.bincount(owner, minlength=groups)
+        starts = np.cumsum(counts) - counts
+        sums = np.bincount(owner, weights=hours, minlength=groups)
+
+        stats = [{'count': int(count)} for count in counts]
+        present = counts > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        columns = {'mean': means}
+        for q in percentiles:
+            position = starts + (q / 100.0) * np.maximum(counts - 1, 0)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, starts + counts - 1)
+            fraction = position - low
+            low, high = np.where(present, low, 0), np.where(present, high, 0)
+            values = hours[low] + (hours[high] - hours[low]) * fraction if len(hours) else np.zeros(groups)
+            columns['median' if q == 50 else f"p{q:g}"] = values
+        for name, values in columns.items():
+            for i, entry in enumerate(stats):
+                entry[name] = round(float(values[i]), 1) if present[i] else None
+        return stats
+
+def _window_summary(trends: np.ndarray, windows: Sequence[int]) -> Dict[str, Any]:
+    return {
+        'trends': {str(days): trends[:days].tolist() for days in windows},
+        'totals': {str(days): int(trends[:days].sum()) for days in windows}
+    }
+
+def activity_stats(arrays_by_user: Dict[str, EventArrays], now: Optional[datetime] = None,
+                   windows: Iterable[int] = DEFAULT_WINDOWS, utc_offset_seconds: int = 0,
+                   percentiles: Sequence[float] = MERGE_PERCENTILES) -> Dict[str, Any]:
+    """Trends, weekday/hour histograms and merge-time statistics for a team
+
+    Every developer is computed in one batch over the concatenated arrays;
+    'team' aggregates all of them. trends['7'] equals the dashboard's
+    weekly_contribution_trend.
+    """
+    now = now or datetime.now(timezone.utc)
+    windows = sorted({int(days) for days in windows if int(days) > 0}) or list(DEFAULT_WINDOWS)
+    team = EventArrays.concatenate(arrays_by_user)
+    trends = team.trends(now, windows[-1])
+    histograms = team.histograms(utc_offset_seconds)
+    merge_stats = team.merge_time_stats(percentiles)
+
+    whole = EventArrays(team.created, team.kind, team.state, team.merge_us)
+    developers = {}
+    for i, user_id in enumerate(team.owners):
+        developers[user_id] = _window_summary(trends[i], windows)
+        developers[user_id].update({
+            'by_weekday': histograms[i].sum(axis=1).tolist(),
+            'by_hour': histograms[i].sum(axis=0).tolist(),
+            'merge_time_hours': merge_stats[i]
+        })
+    summary = _window_summary(trends.sum(axis=0), windows)
+    summary.update({
+        'by_weekday': histograms.sum(axis=(0, 2)).tolist(),
+        'by_hour': histograms.sum(axis=(0, 1)).tolist(),
+        'merge_time_hours': whole.merge_time_stats(percentiles)[0]
+    })
+    return {
+        'generated_at': now.isoformat(),
+        'windows': windows,
+        'utc_offset': utc_offset_seconds,
+        'developers': developers,
+        'team': summary
+    }
@@ -0,0 +1,379 @@
+import hmac
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from utils.activity_metrics import COMMIT, MERGE_REQUEST, ISSUE, LINES_PER_COMMIT, RECENT_PREFIXES, parse_timestamp
+from utils.latency_sketches import (FINISHED_PIPELINE_STATUSES, merge_time_samples, pipeline_duration_samples,
+                                    review_latency_samples)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# X-Gitlab-Event header values handled, by the history kind they feed (None: pipelines)
+WEBHOOK_EVENTS = {
+    'Push Hook': 'commits',
+    'Merge Request Hook': 'merge_requests',
+    'Issue Hook': 'issues',
+    'Pipeline Hook': None
+}
+# Events waiting to be applied; once full the receiver answers 503 and GitLab retries
+MAX_QUEUED_EVENTS = int(os.getenv('GITLAB_WEBHOOK_QUEUE_SIZE', '10000'))
+# Recent deliveries remembered to drop GitLab's retries of an event already applied
+SEEN_DELIVERIES = 10000
+
+# Dashboard counters that follow an item's state, by history kind
+STATE_COUNTERS = {
+    'merge_requests': {'opened': 'merge_requests_open', 'merged': 'merge_requests_merged'},
+    'issues': {'opened': 'issues_assigned', 'closed': 'issues_closed'}
+}
+# State an item must have had before a webhook action, when the history does not say
+_PREVIOUS_STATES = {'reopen': 'closed', 'close': 'opened', 'merge': 'opened'}
+_ACTIVITY_KINDS = {'commits': COMMIT, 'merge_requests': MERGE_REQUEST, 'issues': ISSUE}
+_NO_COMMIT = '0' * 40
+
+def verify_token(received: Optional[str], secret: str) -> bool:
+    """Whether an X-Gitlab-Token header matches the configured secret, in constant time"""
+    if not received or not secret:
+        return False
+    return hmac.compare_digest(received.encode('utf-8'), secret.encode('utf-8'))
+
+def normalize_timestamp(value: Any) -> Optional[str]:
+    """GitLab webhook timestamp ('2013-12-03 17:23:34 UTC' or ISO 8601) as the API's UTC 'Z' form
+
+    History items are ordered by comparing created_at strings, so webhook
+    items must be stamped the way fetched ones are.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        moment = parse_timestamp(value.replace(' UTC', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    millis = f".{moment.microsecond // 1000:03d}" if moment.microsecond else ''
+    return moment.strftime('%Y-%m-%dT%H:%M:%S') + millis + 'Z'
+
+def _now() -> str:
+    return normalize_timestamp(datetime.now(timezone.utc).isoformat())
+
+def _user_ref(user: Optional[Dict]) -> Optional[Dict[str, Any]]:
+    if not user:
+        return None
+    return {'id': user.get('id'), 'username': user.get('username'), 'name': user.get('name')}
+
+def _author(attributes: Dict, actor: Dict, username_for_id: Callable[[Any], Optional[str]]) -> Dict[str, Any]:
+    """The item author; hooks only carry the author's id unless they were also the actor"""
+    author_id = attributes.get('author_id')
+    if author_id is not None and author_id == actor.get('id'):
+        return _user_ref(actor)
+    return {'id': author_id, 'username': username_for_id(author_id) if author_id is not None else None}
+
+def push_update(payload: Dict, username_for_id: Callable[[Any], Optional[str]]) -> Dict[str, Any]:
+    """Push Hook as a /users/:id/events 'pushed to' event"""
+    after = payload.get('after') or ''
+    commits = payload.get('commits') or []
+    # GitLab lists commits oldest first
+    title = (commits[-1].get('title') or commits[-1].get('message') or '').split('\n')[0] if commits else ''
+    ref = payload.get('ref') or ''
+    ref_type = 'tag' if ref.startswith('refs/tags/') else 'branch'
+    username = payload.get('user_username')
+    removed = after == _NO_COMMIT
+    document = {
+        'id': f"push:{payload.get('project_id')}:{payload.get('before')}:{after}",
+        'project_id': payload.get('project_id'),
+        'action_name': 'deleted' if removed else 'pushed to',
+        'author_id': payload.get('user_id'),
+        'author_username': username,
+        'created_at': _now(),
+        'title': title,
+        'push_data': {
+            'commit_count': payload.get('total_commits_count', len(commits)),
+            'action': 'removed' if removed else 'pushed',
+            'ref_type': ref_type,
+            'ref': ref.split('/', 2)[-1],
+            'commit_from': payload.get('before'),
+            'commit_to': None if removed else after,
+            'commit_title': title
+        }
+    }
+    # Branch deletions are events but not contributions
+    users = [username] if username and not removed else []
+    return {
+        'collection': 'gitlab_events',
+        'kind': 'commits',
+        'document': document,
+        'delivery': ('push', document['id']),
+        'users': users,
+        'created_for': users,
+        'previous_state': None,
+        'samples': {}
+    }
+
+def merge_request_update(payload: Dict, username_for_id: Callable[[Any], Optional[str]]) -> Dict[str, Any]:
+    """Merge Request Hook as a /merge_requests item, with merge time and review samples once resolved"""
+    attributes = payload.get('object_attributes') or {}
+    action = attributes.get('action')
+    author = _author(attributes, payload.get('user') or {}, username_for_id)
+    updated_at = normalize_timestamp(attributes.get('updated_at')) or _now()
+    state = attributes.get('state')
+    document = {
+        'id': attributes.get('id'),
+        'iid': attributes.get('iid'),
+        'project_id': attributes.get('target_project_id') or (payload.get('project') or {}).get('id'),
+        'title': attributes.get('title', ''),
+        'description': attributes.get('description') or '',
+        'state': state,
+        'created_at': normalize_timestamp(attributes.get('created_at')),
+        'updated_at': updated_at,
+        'merged_at': (normalize_timestamp(attributes.get('merged_at')) or updated_at) if state == 'merged' else None,
+        'closed_at': (normalize_timestamp(attributes.get('closed_at')) or updated_at) if state == 'closed' else None,
+        'author': author,
+        'reviewers': [_user_ref(reviewer) for reviewer in payload.get('reviewers') or []],
+        'source_branch': attributes.get('source_branch'),
+        'target_branch': attributes.get('target_branch'),
+        'web_url': attributes.get('url', '')
+    }
+
+    samples: Dict[str, Dict[str, list]] = {}
+    if author.get('username'):
+        merged = merge_time_samples([document])
+        if merged:
+            samples[author['username']] = {'merge_time_hours': merged}
+    reviewed = review_latency_samples([document])
+    for reviewer in document['reviewers'] if reviewed else []:
+        if reviewer.get('username'):
+            samples.setdefault(reviewer['username'], {})['review_latency_hours'] = reviewed
+
+    users = [author['username']] if author.get('username') else []
+    return {
+        'collection': 'gitlab_merge_requests',
+        'kind': 'merge_requests',
+        'document': document,
+        'delivery': ('merge_request', document['id'], action, updated_at, state),
+        'users': users,
+        'created_for': users if action == 'open' else [],
+        'previous_state': _PREVIOUS_STATES.get(action, state),
+        'samples': samples
+    }
+
+def issue_update(payload: Dict, username_for_id: Callable[[Any], Optional[str]]) -> Dict[str, Any]:
+    """Issue Hook as an /issues item, for each of its assignees"""
+    attributes = payload.get('object_attributes') or {}
+    action = attributes.get('action')
+    assignees = [_user_ref(user) for user in payload.get('assignees') or []]
+    updated_at = normalize_timestamp(attributes.get('updated_at')) or _now()
+    state = attributes.get('state')
+    document = {
+        'id': attributes.get('id'),
+        'iid': attributes.get('iid'),
+        'project_id': attributes.get('project_id') or (payload.get('project') or {}).get('id'),
+        'title': attributes.get('title', ''),
+        'description': attributes.get('description') or '',
+        'state': state,
+        'created_at': normalize_timestamp(attributes.get('created_at')),
+        'updated_at': updated_at,
+        'closed_at': (normalize_timestamp(attributes.get('closed_at')) or updated_at) if state == 'closed' else None,
+        'author': _author(attributes, payload.get('user') or {}, username_for_id),
+        'assignee': assignees[0] if assignees else None,
+        'assignees': assignees,
+        'web_url': attributes.get('url', '')
+    }
+
+    users = [user['username'] for user in assignees if user.get('username')]
+    if action == 'open':
+        created_for = users
+    else:
+        # Newly assigned developers get the issue as a new item
+        change = (payload.get('changes') or {}).get('assignees') or {}
+        previous = {user.get('username') for user in change.get('previous') or []}
+        created_for = [username for username in users if change and username not in previous]
+    return {
+        'collection': 'gitlab_issues',
+        'kind': 'issues',
+        'document': document,
+        'delivery': ('issue', document['id'], action, updated_at, state, tuple(users)),
+        'users': users,
+        'created_for': created_for,
+        'previous_state': _PREVIOUS_STATES.get(action, state),
+        'samples': {}
+    }
+
+def pipeline_update(payload: Dict, username_for_id: Callable[[Any], Optional[str]]) -> Dict[str, Any]:
+    """Pipeline Hook as a project /pipelines item, with a duration sample once finished"""
+    attributes = payload.get('object_attributes') or {}
+    user = _user_ref(payload.get('user'))
+    status = attributes.get('status')
+    created_at = normalize_timestamp(attributes.get('created_at'))
+    finished_at = normalize_timestamp(attributes.get('finished_at'))
+    document = {
+        'id': attributes.get('id'),
+        'project_id': (payload.get('project') or {}).get('id'),
+        'sha': attributes.get('sha'),
+        'ref': attributes.get('ref'),
+        'status': status,
+        'source': attributes.get('source'),
+        'created_at': created_at,
+        'updated_at': finished_at or created_at,
+        'duration': attributes.get('duration'),
+        'user': user
+    }
+    samples = {}
+    if user and user.get('username') and status in FINISHED_PIPELINE_STATUSES:
+        finished = pipeline_duration_samples([document])
+        if finished:
+            samples[user['username']] = {'pipeline_duration_minutes': finished}
+    return {
+        'collection': 'gitlab_pipelines',
+        'kind': None,
+        'document': document,
+        'delivery': ('pipeline', document['id'], status, document['updated_at']),
+        'users': [],
+        'created_for': [],
+        'previous_state': None,
+        'samples': samples
+    }
+
+_TRANSLATORS = {
+    'Push Hook': push_update,
+    'Merge Request Hook': merge_request_update,
+    'Issue Hook': issue_update,
+    'Pipeline Hook': pipeline_update
+}
+
+class GitLabWebhookProcessor:
+    """Applies GitLab webhook events to stored items and per-developer metrics as they arrive
+
+    The receiver only queues events; one worker thread applies them in
+    arrival order. Each event is upserted into its GitLab entity collection
+    and, for the developers it concerns, updates the history index, the
+    rolling activity counts, the duration sketches and the stored dashboard
+    model, so dashboards follow GitLab within seconds without polling it.
+    Team and org percentiles are still rolled up by the sync job. GitLab
+    retries deliveries it saw fail; recently applied ones are skipped.
+    """
+
+    def __init__(self, gitlab_api, mongo_manager=None, dashboard_cache=None, latency_sketches=None,
+                 rolling_metrics=None, max_queued: int = MAX_QUEUED_EVENTS):
+        self.gitlab_api = gitlab_api
+        self.mongo_manager = mongo_manager
+        self.dashboard_cache = dashboard_cache
+        self.latency_sketches = latency_sketches
+        self.rolling_metrics = rolling_metrics if rolling_metrics is not None else gitlab_api.rolling_metrics
+        self._queue: 'queue.Queue' = queue.Queue(max_queued)
+        self._seen: 'OrderedDict[tuple, None]' = OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {'queued': 0, 'applied': 0, 'duplicates': 0, 'failed': 0, 'rejected': 0}
+
+    def submit(self, event_name: str, payload: Dict[str, Any]) -> bool:
+        """Queue an event for the worker; False when the queue is full"""
+        with self._lock:
+            self._ensure_worker()
+            try:
+                self._queue.put_nowait((event_name, payload))
+            except queue.Full:
+                self._stats['rejected'] += 1
+                return False
+            self._stats['queued'] += 1
+        return True
+
+    def join(self):
+        """Wait until every queued event has been applied"""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'pending': self._queue.qsize()}
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use (caller holds the lock)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._work_loop, name='gitlab-webhooks', daemon=True)
+            self._thread.start()
+
+    def _work_loop(self):
+        while True:
+            event_name, payload = self._queue.get()
+            try:
+                self.apply(event_name, payload)
+            except Exception as e:
+                logger.error(f"Error applying {event_name}: {str(e)}")
+                with self._lock:
+                    self._stats['failed'] += 1
+            finally:
+                self._queue.task_done()
+
+    def _first_delivery(self, delivery: tuple) -> bool:
+        with self._lock:
+            if delivery in self._seen:
+                self._stats['duplicates'] += 1
+                return False
+            self._seen[delivery] = None
+            if len(self._seen) > SEEN_DELIVERIES:
+                self._seen.popitem(last=False)
+            return True
+
+    def apply(self, event_name: str, payload: Dict[str, Any]) -> bool:
+        """Apply one event now; False when it is not handled or was already applied"""
+        translate = _TRANSLATORS.get(event_name)
+        if translate is None:
+            return False
+        update = translate(payload, self.gitlab_api.username_for_id)
+        document = update['document']
+        if document.get('id') is None or not self._first_delivery(update['delivery']):
+            return False
+
+        if self.mongo_manager:
+            self.mongo_manager.upsert_documents(update['collection'], [document])
+        for username in update['users']:
+            self._apply_to_user(username, update)
+        if self.latency_sketches:
+            for username, samples in update['samples'].items():
+                self.latency_sketches.update_user(username, samples)
+        with self._lock:
+            self._stats['applied'] += 1
+        return True
+
+    def _apply_to_user(self, username: str, update: Dict[str, Any]):
+        """Fold one item into a developer's history, rolling counts and dashboard model"""
+        kind, document = update['kind'], update['document']
+        previous = self.gitlab_api.record_history_item(username, kind, document)
+        created = username in update['created_for'] and previous is None
+        if created:
+            self.rolling_metrics.record(username, _ACTIVITY_KINDS[kind], document['created_at'])
+        if not self.dashboard_cache:
+            return
+
+        counts: Dict[str, int] = {}
+        counters = STATE_COUNTERS.get(kind, {})
+        if previous is not None:
+            previous_state = previous.get('state')
+        else:
+            previous_state = None if created else update['previous_state']
+        if previous_state != document.get('state'):
+            if previous_state in counters:
+                counts[counters[previous_state]] = -1
+            if document.get('state') in counters:
+                counts[counters[document['state']]] = counts.get(counters[document['state']], 0) + 1
+        if created and kind == 'commits':
+            counts['lines_of_code'] = LINES_PER_COMMIT
+        activity = {
+            'type': _ACTIVITY_KINDS[kind],
+            'action': f"{RECENT_PREFIXES[_ACTIVITY_KINDS[kind]]}: {document.get('title', '')}",
+            'timestamp': document.get('created_at') or ''
+        } if created else None
+        self.dashboard_cache.patch(
+            username,
+            self.rolling_metrics.read(username) or {},
+            counts=counts,
+            history={kind: self.gitlab_api._format_historical_item(document)},
+            activity=activity
+        )
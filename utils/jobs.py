@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+class JobQueue:
+    """In-process background job queue backed by a thread pool
+
+    Slow work (Gemini generation) is submitted under a key; while a job for a
+    key is pending or running, further submissions return the same job id.
+    The last successful result per key is kept so routes can answer
+    immediately. Job records are mirrored to MongoDB when a manager is given,
+    so a poll that lands on another gunicorn worker still finds the job.
+    """
+
+    def __init__(self, max_workers: int = 4, mongo_manager=None, job_ttl_seconds: int = 3600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='devx-job')
+        self.mongo_manager = mongo_manager
+        self.job_ttl_seconds = job_ttl_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active: Dict[str, str] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: str, func: Callable, *args, **kwargs) -> str:
+        """Enqueue func(*args, **kwargs) unless a job for key is already in flight"""
+        with self._lock:
+            self._prune()
+            active_id = self._active.get(key)
+            if active_id:
+                return active_id
+            job_id = uuid.uuid4().hex
+            job = {
+                'job_id': job_id,
+                'kind': kind,
+                'key': key,
+                'status': JOB_PENDING,
+                'result': None,
+                'error': None,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                '_created': time.monotonic()
+            }
+            self._jobs[job_id] = job
+            self._active[key] = job_id
+        self._persist(job)
+        future = self.executor.submit(self._run, job_id, func, args, kwargs)
+        with self._lock:
+            self._futures[job_id] = future
+        logger.info(f"Queued {kind} job {job_id} for {key}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the public record of a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return self._public(job)
+        if self.mongo_manager:
+            return self.mongo_manager.get_job(job_id)
+        return None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to timeout seconds for a job to finish, then return its record"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            wait_futures([future], timeout=timeout)
+        return self.get(job_id)
+
+    def latest_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the last successful result for a key, with the time it finished"""
+        with self._lock:
+            return self._results.get(key)
+
+    def is_active(self, key: str) -> bool:
+        """Whether a job for key is pending or running"""
+        with self._lock:
+            return key in self._active
+
+    def _run(self, job_id: str, func: Callable, args, kwargs):
+        """Execute a job on a worker thread and record its outcome"""
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = JOB_RUNNING
+            job['started_at'] = datetime.now(timezone.utc).isoformat()
+        self._persist(job)
+        try:
+            result = func(*args, **kwargs)
+            with self._lock:
+                job['status'] = JOB_DONE
+                job['result'] = result
+                self._results[job['key']] = {
+                    'result': result,
+                    'finished_at': time.time()
+                }
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            with self._lock:
+                job['status'] = JOB_FAILED
+                job['error'] = str(e)
+        finally:
+            with self._lock:
+                job['finished_at'] = datetime.now(timezone.utc).isoformat()
+                if self._active.get(job['key']) == job_id:
+                    del self._active[job['key']]
+            self._persist(job)
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (caller holds the lock)"""
+        cutoff = time.monotonic() - self.job_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in (JOB_DONE, JOB_FAILED) and job['_created'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+    def _persist(self, job: Dict[str, Any]):
+        """Mirror a job record to MongoDB"""
+        if self.mongo_manager:
+            with self._lock:
+                record = self._public(job)
+            self.mongo_manager.save_job(record)
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip internal bookkeeping fields from a job record"""
+        return {k: v for k, v in job.items() if not k.startswith('_')}
@@ -0,0 +1,179 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.activity_metrics import parse_timestamp
+from utils.quantile_sketch import DDSketch, SUMMARY_QUANTILES
+
+logger = logging.getLogger(__name__)
+
+# Durations tracked per developer, in the unit named by the suffix
+SKETCH_METRICS = ('merge_time_hours', 'review_latency_hours', 'pipeline_duration_minutes')
+
+USER_SCOPE = 'user'
+TEAM_SCOPE = 'team'
+ORG_SCOPE = 'org'
+ORG_KEY = 'all'
+UNASSIGNED_TEAM = 'Unassigned'
+
+FINISHED_PIPELINE_STATUSES = ('success', 'failed', 'canceled')
+
+# (completed at as epoch microseconds, item id, duration)
+Sample = Tuple[int, Any, float]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _epoch_us(value: Optional[str]) -> Optional[int]:
+    try:
+        return (parse_timestamp(value) - _EPOCH) // _MICROSECOND
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def _lifetime_samples(items: Iterable[Dict], completed_field: Callable[[Dict], Optional[str]],
+                      unit_seconds: float) -> List[Sample]:
+    samples = []
+    for item in items:
+        created = _epoch_us(item.get('created_at'))
+        completed = _epoch_us(completed_field(item))
+        if created is None or completed is None:
+            continue
+        samples.append((completed, item.get('id'), max(completed - created, 0) / 10 ** 6 / unit_seconds))
+    return samples
+
+def merge_time_samples(merge_requests: Iterable[Dict]) -> List[Sample]:
+    """Creation to merge, in hours, of merged MRs"""
+    return _lifetime_samples((mr for mr in merge_requests if mr.get('state') == 'merged'),
+                             lambda mr: mr.get('merged_at'), 3600)
+
+def review_latency_samples(reviewed_merge_requests: Iterable[Dict]) -> List[Sample]:
+    """Creation to merge or close, in hours, of MRs a developer was reviewer on
+
+    GitLab's list endpoints carry no review timestamps, so the time until
+    the reviewed MR was resolved stands in for review latency.
+    """
+    return _lifetime_samples((mr for mr in reviewed_merge_requests if mr.get('state') in ('merged', 'closed')),
+                             lambda mr: mr.get('merged_at') or mr.get('closed_at'), 3600)
+
+def pipeline_duration_samples(pipelines: Iterable[Dict]) -> List[Sample]:
+    """Run time, in minutes, of finished pipelines
+
+    Uses the pipeline's duration when the API includes it, else the time
+    from creation to its last update.
+    """
+    samples = []
+    finished = [pipeline for pipeline in pipelines if pipeline.get('status') in FINISHED_PIPELINE_STATUSES]
+    for pipeline in finished:
+        completed = _epoch_us(pipeline.get('updated_at'))
+        if completed is not None and pipeline.get('duration') is not None:
+            samples.append((completed, pipeline.get('id'), pipeline['duration'] / 60))
+    samples.extend(_lifetime_samples((p for p in finished if p.get('duration') is None),
+                                     lambda p: p.get('updated_at'), 60))
+    return samples
+
+def duration_samples(items: Dict[str, List[Dict]]) -> Dict[str, List[Sample]]:
+    """Samples for every SKETCH_METRICS entry from GitLabAPI.get_duration_items() output"""
+    return {
+        'merge_time_hours': merge_time_samples(items.get('merge_requests', [])),
+        'review_latency_hours': review_latency_samples(items.get('reviewed_merge_requests', [])),
+        'pipeline_duration_minutes': pipeline_duration_samples(items.get('pipelines', []))
+    }
+
+class LatencySketches:
+    """Per-developer, per-team and org duration sketches kept current by the sync job
+
+    Each stored sketch remembers the completion time of the newest sample it
+    holds (and the ids completed at that instant), so re-fetching the same
+    90-day window on every sync only adds what completed since. Team and org
+    sketches are merged from the developers' ones, and dashboards read
+    percentiles from them in O(buckets) instead of rescanning history.
+    """
+
+    def __init__(self, mongo_manager=None):
+        self.mongo_manager = mongo_manager
+        self._sketches: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, scope: str, key: str, metric: str, refresh: bool = False) -> Dict[str, Any]:
+        """A sketch with its watermark, from memory unless refresh asks for the stored one"""
+        entry = None if refresh and self.mongo_manager else self._sketches.get((scope, key, metric))
+        if entry is None and self.mongo_manager:
+            stored = self.mongo_manager.get_metric_sketch(scope, key, metric)
+            if stored:
+                entry = {
+                    'sketch': DDSketch.from_dict(stored['sketch']),
+                    'watermark': stored.get('watermark'),
+                    'watermark_ids': stored.get('watermark_ids', [])
+                }
+        if entry is None:
+            entry = {'sketch': DDSketch(), 'watermark': None, 'watermark_ids': []}
+        self._sketches[(scope, key, metric)] = entry
+        return entry
+
+    def _save(self, scope: str, key: str, metric: str, entry: Dict[str, Any]):
+        if self.mongo_manager:
+            self.mongo_manager.save_metric_sketch(scope, key, metric, {
+                'sketch': entry['sketch'].to_dict(),
+                'watermark': entry['watermark'],
+                'watermark_ids': entry['watermark_ids']
+            })
+
+    def update_user(self, user_id: str, samples: Dict[str, List[Sample]]) -> Dict[str, int]:
+        """Add samples completed after each sketch's watermark; returns how many were new per metric"""
+        added = {}
+        with self._lock:
+            for metric in SKETCH_METRICS:
+                entry = self._load(USER_SCOPE, user_id, metric)
+                watermark, seen = entry['watermark'], set(entry['watermark_ids'])
+                new = [sample for sample in samples.get(metric, [])
+                       if watermark is None or sample[0] > watermark
+                       or (sample[0] == watermark and sample[1] not in seen)]
+                added[metric] = len(new)
+                if not new:
+                    continue
+                entry['sketch'].add_many([value for _, _, value in new])
+                newest = max(completed for completed, _, _ in new)
+                if watermark is not None and newest == watermark:
+                    ids = seen
+                else:
+                    ids = set()
+                ids.update(item_id for completed, item_id, _ in new if completed == newest)
+                entry['watermark'], entry['watermark_ids'] = newest, sorted(ids, key=str)
+                self._save(USER_SCOPE, user_id, metric, entry)
+        return added
+
+    def rollup(self, teams: Dict[str, str]):
+        """Rebuild team and org sketches by merging the developers' (teams maps user_id to team)"""
+        with self._lock:
+            for metric in SKETCH_METRICS:
+                merged: Dict[str, DDSketch] = {}
+                org = DDSketch()
+                for user_id, team in teams.items():
+                    sketch = self._load(USER_SCOPE, user_id, metric)['sketch']
+                    merged.setdefault(team or UNASSIGNED_TEAM, DDSketch()).merge(sketch)
+                    org.merge(sketch)
+                for team, sketch in merged.items():
+                    self._store(TEAM_SCOPE, team, metric, sketch)
+                self._store(ORG_SCOPE, ORG_KEY, metric, org)
+
+    def _store(self, scope: str, key: str, metric: str, sketch: DDSketch):
+        entry = {'sketch': sketch, 'watermark': None, 'watermark_ids': []}
+        self._sketches[(scope, key, metric)] = entry
+        self._save(scope, key, metric, entry)
+
+    def summaries(self, scope: str, key: str, quantiles=SUMMARY_QUANTILES) -> Dict[str, Dict[str, Any]]:
+        """Count, mean and percentiles of every metric for one developer, team or the org"""
+        with self._lock:
+            # Read what the sync process last stored rather than this process's copy
+            return {metric: self._load(scope, key, metric, refresh=True)['sketch'].summary(quantiles)
+                    for metric in SKETCH_METRICS}
+
+    def team_summaries(self, quantiles=SUMMARY_QUANTILES) -> Dict[str, Any]:
+        """Org and per-team summaries from the stored sketches"""
+        teams = self.mongo_manager.get_metric_sketch_keys(TEAM_SCOPE) if self.mongo_manager else sorted(
+            {key for scope, key, _ in self._sketches if scope == TEAM_SCOPE})
+        return {
+            'org': self.summaries(ORG_SCOPE, ORG_KEY, quantiles),
+            'teams': {team: self.summaries(TEAM_SCOPE, team, quantiles) for team in teams}
+        }
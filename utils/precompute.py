@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Metrics whose movement decides whether AI results need regenerating
+ACTIVITY_FIELDS = (
+    'commits_this_week',
+    'merge_requests_open',
+    'merge_requests_merged',
+    'issues_assigned',
+    'issues_closed',
+    'lines_of_code',
+    'avg_merge_time_hours',
+    'code_review_participation'
+)
+
+# Relative change in any activity field that makes a stored result stale
+ACTIVITY_CHANGE_THRESHOLD = float(os.getenv('AI_PRECOMPUTE_CHANGE_THRESHOLD', '0.2'))
+# Stored results older than this are regenerated even without activity changes
+PRECOMPUTE_MAX_AGE_SECONDS = int(os.getenv('AI_PRECOMPUTE_MAX_AGE_SECONDS', str(7 * 24 * 3600)))
+# Local time of day for the nightly precompute run
+PRECOMPUTE_AT = os.getenv('AI_PRECOMPUTE_AT', '03:00')
+
+def activity_snapshot(gitlab_metrics: Dict[str, Any]) -> Dict[str, float]:
+    """Numeric summary of the metrics that drive AI results"""
+    snapshot = {}
+    for field in ACTIVITY_FIELDS:
+        value = gitlab_metrics.get(field)
+        snapshot[field] = float(value) if isinstance(value, (int, float)) else 0.0
+    snapshot['recent_activity'] = float(len(gitlab_metrics.get('recent_activity') or []))
+    return snapshot
+
+def activity_hash(gitlab_metrics: Dict[str, Any]) -> str:
+    """Hash of the activity snapshot and the recent activity fed to the prompts"""
+    material = json.dumps({
+        'snapshot': activity_snapshot(gitlab_metrics),
+        'recent_activity': gitlab_metrics.get('recent_activity') or [],
+        'skills': gitlab_metrics.get('skills') or []
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def activity_change(previous: Dict[str, float], current: Dict[str, float]) -> float:
+    """Largest relative change of any activity field between two snapshots"""
+    change = 0.0
+    for field, value in current.items():
+        before = previous.get(field, 0.0)
+        change = max(change, abs(value - before) / max(abs(before), 1.0))
+    return change
+
+def stamp_activity(result: Dict[str, Any], gitlab_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Record the activity a result was generated from, for later staleness checks"""
+    return {
+        **result,
+        'activity_hash': activity_hash(gitlab_metrics),
+        'activity_snapshot': activity_snapshot(gitlab_metrics)
+    }
+
+def staleness_reason(stored: Optional[Dict[str, Any]], gitlab_metrics: Dict[str, Any],
+                     change_threshold: float = ACTIVITY_CHANGE_THRESHOLD,
+                     max_age_seconds: float = PRECOMPUTE_MAX_AGE_SECONDS) -> Optional[str]:
+    """Why a stored AI result should be regenerated, or None when it is current"""
+    if not stored:
+        return 'missing'
+    try:
+        generated_at = datetime.fromisoformat(stored['timestamp'])
+    except (KeyError, TypeError, ValueError):
+        return 'undated'
+    if generated_at.tzinfo is None:
+        generated_at = generated_at.replace(tzinfo=timezone.utc)
+    if (datetime.now(timezone.utc) - generated_at).total_seconds() >= max_age_seconds:
+        return 'expired'
+    if stored.get('activity_hash') == activity_hash(gitlab_metrics):
+        return None
+    if 'activity_snapshot' not in stored:
+        return 'unstamped'
+    change = activity_change(stored['activity_snapshot'], activity_snapshot(gitlab_metrics))
+    if change >= change_threshold:
+        return f"activity changed {change:.0%}"
+    return None
+
+class AIPrecomputer:
+    """Regenerates AI insights and recommendations for users whose activity moved
+
+    Each stored result carries the activity hash and snapshot it was built
+    from. A run compares them with the latest synced metrics and regenerates
+    only users with missing, expired or materially changed results, so the
+    nightly pass costs Gemini calls in proportion to real activity and the
+    dashboard serves the stored results instantly.
+    """
+
+    def __init__(self, mongo_manager, recommend_batch: Callable[[Dict[str, Dict[str, Any]]], Dict[str, Any]],
+                 generate_insights: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+                 dashboard_cache=None, change_threshold: float = ACTIVITY_CHANGE_THRESHOLD,
+                 max_age_seconds: float = PRECOMPUTE_MAX_AGE_SECONDS):
+        self.mongo_manager = mongo_manager
+        self.recommend_batch = recommend_batch
+        self.generate_insights = generate_insights
+        self.dashboard_cache = dashboard_cache
+        self.change_threshold = change_threshold
+        self.max_age_seconds = max_age_seconds
+
+    def plan(self, metrics_by_user: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Decide which users need new insights and recommendations"""
+        plan = {'insights': {}, 'recommendations': {}}
+        for user_id, metrics in metrics_by_user.items():
+            stored = {
+                'insights': self.mongo_manager.get_latest_insights(user_id),
+                'recommendations': self.mongo_manager.get_latest_recommendations(user_id)
+            }
+            for kind, result in stored.items():
+                reason = staleness_reason(result, metrics, self.change_threshold, self.max_age_seconds)
+                if reason:
+                    plan[kind][user_id] = reason
+        return plan
+
+    def run(self, user_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Regenerate stale results from the latest synced metrics"""
+        if user_ids is None:
+            user_ids = [user['user_id'] for user in self.mongo_manager.get_all_users()]
+        metrics_by_user = {}
+        for user_id in user_ids:
+            metrics = self.mongo_manager.get_latest_gitlab_metrics(user_id)
+            if metrics:
+                metrics_by_user[user_id] = metrics
+
+        plan = self.plan(metrics_by_user)
+        for kind, reasons in plan.items():
+            for user_id, reason in reasons.items():
+                logger.info(f"Precomputing {kind} for {user_id}: {reason}")
+
+        refreshed = set()
+        stale_recommendations = {user_id: metrics_by_user[user_id] for user_id in plan['recommendations']}
+        if stale_recommendations:
+            results = self.recommend_batch(stale_recommendations)
+            for user_id, result in results.items():
+                if result.get('recommendations') and not result.get('error'):
+                    self.mongo_manager.save_recommendations(
+                        user_id, stamp_activity(result, metrics_by_user[user_id]))
+                    refreshed.add(user_id)
+
+        for user_id in plan['insights']:
+            try:
+                result = self.generate_insights(user_id, metrics_by_user[user_id])
+            except Exception as e:
+                logger.error(f"Error precomputing insights for {user_id}: {str(e)}")
+                continue
+            if not result.get('error'):
+                self.mongo_manager.save_insights(user_id, stamp_activity(result, metrics_by_user[user_id]))
+                refreshed.add(user_id)
+
+        if self.dashboard_cache:
+            for user_id in refreshed:
+                self.dashboard_cache.refresh(user_id, metrics_by_user[user_id])
+
+        summary = {
+            'users': len(metrics_by_user),
+            'insights': len(plan['insights']),
+            'recommendations': len(plan['recommendations']),
+            'refreshed': len(refreshed)
+        }
+        logger.info(f"AI precompute finished: {summary}")
+        return summary
@@ -0,0 +1,154 @@
+import math
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Bucket cap; with 1% accuracy 2048 buckets span 1e-9 to 1e9 before the lowest collapse
+DEFAULT_MAX_BUCKETS = 2048
+# Values at or below this (including negative clock skew) are counted as zero
+MIN_INDEXABLE_VALUE = 1e-9
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+class DDSketch:
+    """Mergeable quantile sketch with relative error guarantees (DDSketch)
+
+    A value v is counted in bucket ceil(log(v) / log(gamma)) with
+    gamma = (1 + a) / (1 - a), so any quantile is returned within relative
+    accuracy a of a value that was added, whatever the distribution.
+    Sketches with the same accuracy merge exactly by adding bucket counts,
+    which is how per-user sketches roll up into team and org ones. Memory is
+    the number of distinct buckets, capped by collapsing the lowest ones.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        """Representative value of a bucket, within relative_accuracy of all its values"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1):
+        """Count a value weight times"""
+        if value > MIN_INDEXABLE_VALUE:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + weight
+        else:
+            self.zero_count += weight
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.bins) > self.max_buckets:
+            self._collapse()
+
+    def add_many(self, values: Iterable[float]):
+        """Count many values at once, bucketing them with NumPy"""
+        values = np.asarray(list(values) if not isinstance(values, np.ndarray) else values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        positive = values[values > MIN_INDEXABLE_VALUE]
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if len(self.bins) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: 'DDSketch'):
+        """Add another sketch's counts into this one (both must share relative_accuracy)"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.bins) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """Fold the lowest buckets into one so at most max_buckets remain"""
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        self.bins[target] += sum(self.bins.pop(key) for key in keys[:excess])
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0 to 1), None when the sketch is empty"""
+        if not self.count:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return min(max(0.0, self.min), self.max)
+        running = self.zero_count
+        for key in sorted(self.bins):
+            running += self.bins[key]
+            if running > rank:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def summary(self, quantiles: Sequence[float] = SUMMARY_QUANTILES, digits: int = 2) -> Dict[str, Any]:
+        """Count, mean, min, max and p50/p90/p99-style quantiles for dashboards"""
+        result = {
+            'count': self.count,
+            'mean': round(self.sum / self.count, digits) if self.count else None,
+            'min': round(self.min, digits) if self.count else None,
+            'max': round(self.max, digits) if self.count else None
+        }
+        for q in quantiles:
+            value = self.quantile(q)
+            result[f"p{q * 100:g}"] = round(value, digits) if value is not None else None
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON/BSON form; keys are stored as a sorted list next to their counts"""
+        keys = sorted(self.bins)
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'keys': keys,
+            'counts': [self.bins[key] for key in keys],
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DDSketch':
+        sketch = cls(data.get('relative_accuracy', DEFAULT_RELATIVE_ACCURACY),
+                     data.get('max_buckets', DEFAULT_MAX_BUCKETS))
+        sketch.bins = dict(zip(data.get('keys', []), data.get('counts', [])))
+        sketch.zero_count = data.get('zero_count', 0)
+        sketch.count = data.get('count', 0)
+        sketch.sum = data.get('sum', 0.0)
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Union
+
+from utils.activity_metrics import (COMMIT, MERGE_REQUEST, ISSUE, TREND_DAYS, TREND_WEIGHTS, THIS_WEEK_DAYS,
+                                    ActivityRecords, collaboration_score, parse_timestamp, productivity_score)
+
+logger = logging.getLogger(__name__)
+
+# Days of activity held per user, as far back as the metrics history goes
+WINDOW_DAYS = 90
+SECONDS_PER_DAY = 86400
+
+KINDS = (COMMIT, MERGE_REQUEST, ISSUE)
+_KIND_INDEX = {kind: i for i, kind in enumerate(KINDS)}
+_WEIGHTS = [TREND_WEIGHTS[kind] for kind in KINDS]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def epoch_day(moment: Union[datetime, str, int, float]) -> int:
+    """UTC day number (days since 1970-01-01) of a datetime, GitLab timestamp or epoch seconds"""
+    if isinstance(moment, str):
+        moment = parse_timestamp(moment)
+    if isinstance(moment, datetime):
+        return (moment - _EPOCH).days
+    return int(moment // SECONDS_PER_DAY)
+
+class RollingMetrics:
+    """One developer's activity counts in a ring of WINDOW_DAYS UTC day buckets
+
+    Each bucket counts commits, MRs and issues created that day, and running
+    totals cover the whole window. Adding an item and reading the metrics
+    are O(1) (a read touches the last 8 buckets); moving to a new day clears
+    the buckets that fell out of the window from the totals. Days here are
+    UTC calendar days, where a full recompute counts 24-hour periods back
+    from the moment it runs.
+    """
+
+    def __init__(self):
+        self.head_day: Optional[int] = None
+        self.counts = [0] * (WINDOW_DAYS * len(KINDS))
+        self.totals = [0] * len(KINDS)
+
+    def advance(self, day: int):
+        """Make day the newest bucket, expiring those that leave the window"""
+        if self.head_day is None:
+            self.head_day = day
+            return
+        if day <= self.head_day:
+            return
+        for expired in range(self.head_day + 1, min(day, self.head_day + WINDOW_DAYS) + 1):
+            base = (expired % WINDOW_DAYS) * len(KINDS)
+            for k in range(len(KINDS)):
+                self.totals[k] -= self.counts[base + k]
+                self.counts[base + k] = 0
+        self.head_day = day
+
+    def add(self, kind: str, created: Union[datetime, str, int, float], count: int = 1) -> bool:
+        """Count an item created at created; False when it is older than the window"""
+        day = epoch_day(created)
+        if self.head_day is None or day > self.head_day:
+            self.advance(day)
+        if day <= self.head_day - WINDOW_DAYS:
+            return False
+        k = _KIND_INDEX[kind]
+        self.counts[(day % WINDOW_DAYS) * len(KINDS) + k] += count
+        self.totals[k] += count
+        return True
+
+    def read(self, now: Union[datetime, int, float, None] = None) -> Dict[str, Any]:
+        """This week's commits, the weekly trend and the activity scores as of now"""
+        today = epoch_day(now if now is not None else time.time())
+        self.advance(today)
+        commits_this_week = 0
+        trend = [0] * TREND_DAYS
+        # Buckets newer than today only hold items stamped in the future
+        for day in range(max(today - THIS_WEEK_DAYS, self.head_day - WINDOW_DAYS + 1), self.head_day + 1):
+            base = (day % WINDOW_DAYS) * len(KINDS)
+            days_ago = today - day
+            commits_this_week += self.counts[base]
+            if 0 <= days_ago < TREND_DAYS:
+                trend[days_ago] += sum(self.counts[base + k] * _WEIGHTS[k] for k in range(len(KINDS)))
+        commits, merge_requests, issues = self.totals
+        return {
+            'commits_this_week': commits_this_week,
+            'weekly_contribution_trend': trend,
+            'productivity_score': productivity_score(commits, merge_requests, issues),
+            'collaboration_score': collaboration_score(merge_requests, issues)
+        }
+
+    @classmethod
+    def from_records(cls, commits: ActivityRecords, merge_requests: ActivityRecords, issues: ActivityRecords,
+                     now: Optional[datetime] = None) -> 'RollingMetrics':
+        """State rebuilt from a full history, using its already parsed timestamps"""
+        state = cls()
+        state.advance(epoch_day(now or datetime.now(timezone.utc)))
+        for records in (commits, merge_requests, issues):
+            for created in records.created:
+                if created is not None:
+                    state.add(records.kind, created)
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window_days': WINDOW_DAYS,
+            'head_day': self.head_day,
+            'counts': self.counts,
+            'totals': self.totals
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional['RollingMetrics']:
+        """State from to_dict() output; None when it was built for another window size"""
+        if data.get('window_days') != WINDOW_DAYS:
+            return None
+        state = cls()
+        state.head_day = data.get('head_day')
+        state.counts = list(data['counts'])
+        state.totals = list(data['totals'])
+        return state
+
+class RollingMetricsStore:
+    """Per-user RollingMetrics, shared between processes through MongoDB when attached
+
+    A user's state is created by rebuild() from a full history fetch; items
+    recorded afterwards (incremental sync, webhooks) update it in place.
+    Items for users never rebuilt are ignored, as counts without the
+    history behind them would understate every metric.
+    """
+
+    def __init__(self, mongo_manager=None):
+        self.mongo_manager = mongo_manager
+        self._states: Dict[str, RollingMetrics] = {}
+        self._lock = threading.Lock()
+
+    def attach_mongo(self, mongo_manager):
+        """Persist states to MongoDB so the web and sync processes share them"""
+        self.mongo_manager = mongo_manager
+
+    def _load(self, user_id: str) -> Optional[RollingMetrics]:
+        if self.mongo_manager:
+            stored = self.mongo_manager.get_rolling_metrics(user_id)
+            state = RollingMetrics.from_dict(stored) if stored else None
+            if state is not None:
+                self._states[user_id] = state
+                return state
+        return self._states.get(user_id)
+
+    def _save(self, user_id: str, state: RollingMetrics):
+        self._states[user_id] = state
+        if self.mongo_manager:
+            self.mongo_manager.save_rolling_metrics(user_id, state.to_dict())
+
+    def rebuild(self, user_id: str, commits: ActivityRecords, merge_requests: ActivityRecords,
+                issues: ActivityRecords, now: Optional[datetime] = None):
+        """Replace a user's state with one built from their full history"""
+        state = RollingMetrics.from_records(commits, merge_requests, issues, now)
+        with self._lock:
+            self._save(user_id, state)
+
+    def record(self, user_id: str, kind: str, created: Union[datetime, str, int, float], count: int = 1) -> bool:
+        """Count one new item for a user; False if the user has no state or the item is too old"""
+        with self._lock:
+            state = self._load(user_id)
+            if state is None:
+                return False
+            try:
+                added = state.add(kind, created, count)
+            except (AttributeError, TypeError, ValueError) as e:
+                logger.warning(f"Ignoring {kind} for {user_id} with bad created_at: {str(e)}")
+                return False
+            if added:
+                self._save(user_id, state)
+            return added
+
+    def read(self, user_id: str, now: Union[datetime, int, float, None] = None) -> Optional[Dict[str, Any]]:
+        """Current rolling metrics for a user, None until their state was first rebuilt"""
+        with self._lock:
+            state = self._load(user_id)
+            return state.read(now) if state is not None else None
+
+rolling_metrics = RollingMetricsStore()
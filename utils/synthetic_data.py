@@ -0,0 +1,515 @@
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.telemetry_series import APP_PREFIX, SECONDS_PER_DAY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Output collections, in the order documents are written
+COLLECTIONS = (
+    'users',
+    'gitlab_events',
+    'gitlab_merge_requests',
+    'gitlab_issues',
+    'gitlab_pipelines',
+    'telemetry_samples'
+)
+
+# Users drawn per block; part of the seed contract, as each block has its own generator
+DEFAULT_BLOCK_USERS = 250
+# Telemetry is generated for the most recent days only; it dwarfs the GitLab history
+DEFAULT_TELEMETRY_DAYS = 7
+TELEMETRY_INTERVAL_SECONDS = 900
+# Desktop agents report during the working day (local hours)
+WORKDAY_START_HOUR = 8
+WORKDAY_HOURS = 10
+
+FIRST_NAMES = np.array(['Alex', 'Sarah', 'Marcus', 'Emily', 'David', 'Priya', 'Jonas', 'Mei', 'Omar', 'Lena',
+                        'Carlos', 'Aiko', 'Noah', 'Fatima', 'Ivan', 'Grace', 'Tariq', 'Sofia', 'Ravi', 'Hannah'])
+LAST_NAMES = np.array(['Thompson', 'Chen', 'Rodriguez', 'Zhang', 'Kim', 'Patel', 'Weber', 'Lin', 'Haddad', 'Novak',
+                       'Silva', 'Tanaka', 'Brown', 'Khan', 'Petrov', 'Okafor', 'Ali', 'Rossi', 'Iyer', 'Schmidt'])
+TEAMS = np.array(['Platform Team', 'UI/UX Team', 'API Team', 'Infrastructure Team', 'Data Team',
+                  'Mobile Team', 'Security Team', 'Growth Team'])
+TITLES = np.array(['Junior Developer', 'Developer', 'Senior Developer', 'Staff Engineer', 'DevOps Engineer',
+                   'Frontend Developer', 'Backend Developer', 'Full-Stack Developer'])
+VERBS = np.array(['Add', 'Fix', 'Refactor', 'Update', 'Remove', 'Improve', 'Document', 'Test', 'Optimize', 'Rename'])
+SUBJECTS = np.array(['login flow', 'pipeline cache', 'API pagination', 'dashboard charts', 'user settings',
+                     'error handling', 'database indexes', 'search results', 'build scripts', 'webhook handler',
+                     'telemetry ingestion', 'rate limiting', 'session storage', 'email templates', 'feature flags'])
+ISSUE_KINDS = np.array(['Bug', 'Feature', 'Chore', 'Investigate'])
+BRANCHES = np.array(['main', 'develop', 'feature', 'fix', 'chore'])
+DESKTOP_APPS = ('VS Code', 'Terminal', 'Chrome', 'Slack', 'GitLab', 'Zoom', 'Postman', 'Figma')
+# Mean share of desktop time per app, before per-sample noise
+DESKTOP_APP_WEIGHTS = np.array([0.34, 0.14, 0.16, 0.12, 0.08, 0.08, 0.04, 0.04])
+
+def _iso(epoch_seconds: np.ndarray) -> List[str]:
+    """ISO-8601 UTC strings for an array of epoch seconds, formatted in one call"""
+    return np.char.add(np.datetime_as_string(epoch_seconds.astype('datetime64[s]'), unit='s'), 'Z').tolist()
+
+def _nested(array: np.ndarray, digits: int = 0) -> list:
+    """Rounded nested lists for JSON, with NaN as None"""
+    array = np.round(array, digits)
+    missing = np.isnan(array)
+    if missing.any():
+        array = array.astype(object)
+        array[missing] = None
+    return array.tolist()
+
+def _titles(rng: np.random.Generator, count: int, prefix: Optional[np.ndarray] = None) -> np.ndarray:
+    titles = np.char.add(np.char.add(VERBS[rng.integers(0, len(VERBS), count)], ' '),
+                         SUBJECTS[rng.integers(0, len(SUBJECTS), count)])
+    if prefix is not None:
+        titles = np.char.add(np.char.add(prefix[rng.integers(0, len(prefix), count)], ': '), titles)
+    return titles
+
+def _shas(rng: np.random.Generator, count: int) -> List[str]:
+    """Random 40-hex-digit commit SHAs"""
+    digits = rng.bytes(20 * count).hex()
+    return [digits[i:i + 40] for i in range(0, 40 * count, 40)]
+
+class SyntheticDataGenerator:
+    """Populations of developers with GitLab histories and device telemetry
+
+    Each user gets a log-normal activity level, a working-hours UTC offset, a
+    pipeline reliability and a set of projects. Pushes, merge requests and
+    issues are Poisson counts over the span, placed on weekdays (weekends at
+    a low rate) around the user's working hours; merge requests are merged or
+    closed after log-normal delays and each push runs a pipeline. Telemetry
+    covers the last telemetry_days as one desktop and one watch batch per user
+    per day, in the telemetry_samples format of utils.telemetry_ingest.
+    """
+
+    def __init__(self, users: int = 10000, days: int = 365, seed: int = 0,
+                 end: Optional[datetime] = None, projects: Optional[int] = None,
+                 telemetry_days: int = DEFAULT_TELEMETRY_DAYS,
+                 block_users: int = DEFAULT_BLOCK_USERS,
+                 web_url: str = 'https://gitlab.example.com'):
+        self.users = users
+        self.days = days
+        self.seed = seed
+        end = end or datetime.now(timezone.utc)
+        # Align the span to whole days so reruns on the same day match exactly
+        self.end = int(end.timestamp()) // SECONDS_PER_DAY * SECONDS_PER_DAY
+        self.start = self.end - days * SECONDS_PER_DAY
+        self.projects = projects or max(10, users // 8)
+        self.telemetry_days = min(telemetry_days, days)
+        self.block_users = block_users
+        self.web_url = web_url.rstrip('/')
+
+    def blocks(self) -> Iterator[Dict[str, List[Dict[str, Any]]]]:
+        """Documents for each block of users, by collection"""
+        ids = {'event': 0, 'merge_request': 0, 'issue': 0, 'pipeline': 0}
+        for block, first in enumerate(range(0, self.users, self.block_users)):
+            rng = np.random.default_rng([self.seed, block])
+            count = min(self.block_users, self.users - first)
+            profile = self._profiles(rng, first, count)
+            pushes = self._pushes(rng, profile, ids)
+            yield {
+                'users': self._user_documents(profile),
+                'gitlab_events': pushes['events'],
+                'gitlab_merge_requests': self._merge_requests(rng, profile, ids),
+                'gitlab_issues': self._issues(rng, profile, ids),
+                'gitlab_pipelines': pushes['pipelines'],
+                'telemetry_samples': self._telemetry(rng, profile)
+            }
+
+    def generate(self, sink) -> Dict[str, int]:
+        """Write every block to sink; returns document counts per collection"""
+        counts = {collection: 0 for collection in COLLECTIONS}
+        started = time.time()
+        for block in self.blocks():
+            for collection in COLLECTIONS:
+                documents = block[collection]
+                if documents:
+                    sink.write(collection, documents)
+                    counts[collection] += len(documents)
+        sink.close()
+        logger.info(f"Generated {self.users} users over {self.days} days in {time.time() - started:.1f}s: {counts}")
+        return counts
+
+    def _profiles(self, rng: np.random.Generator, first: int, count: int) -> Dict[str, np.ndarray]:
+        """Per-user parameters for one block"""
+        index = np.arange(first, first + count)
+        return {
+            'index': index,
+            'user_id': np.char.add('user', np.char.zfill(index.astype(str), 5)),
+            'gitlab_id': index + 1000,
+            'first_name': FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), count)],
+            'last_name': LAST_NAMES[rng.integers(0, len(LAST_NAMES), count)],
+            'team': TEAMS[rng.integers(0, len(TEAMS), count)],
+            'title': TITLES[rng.integers(0, len(TITLES), count)],
+            'join_days': rng.integers(30, 6 * 365, count),
+            # Pushes per working day; heavy-tailed, as real contribution counts are
+            'activity': rng.lognormal(np.log(1.2), 0.6, count),
+            # Whole-hour UTC offsets between UTC-8 and UTC+9
+            'utc_offset': rng.integers(-8, 10, count) * 3600,
+            'pipeline_success': rng.beta(18, 2, count),
+            'merge_hours': rng.lognormal(np.log(18), 0.5, count),
+            'projects': rng.integers(0, self.projects, (count, 4)) + 1,
+            'focus': np.clip(rng.normal(82, 8, count), 40, 98),
+            'sleep_hours': np.clip(rng.normal(7.3, 0.6, count), 5, 9.5)
+        }
+
+    def _times(self, rng: np.random.Generator, owners: np.ndarray,
+               profile: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Epoch seconds for items owned by owners (block-local user indexes), oldest first
+
+        Days are uniform over the span but weekend days are moved to the
+        preceding Friday 85% of the time; times cluster around 14:00 local.
+        Returns the sorted times and the owners reordered to match.
+        """
+        count = len(owners)
+        day = rng.integers(0, self.days, count)
+        start_day = self.start // SECONDS_PER_DAY
+        # 1970-01-01 was a Thursday, so (day + 3) % 7 is 0 on Mondays
+        weekday = (start_day + day + 3) % 7
+        moved = (weekday >= 5) & (rng.random(count) < 0.85)
+        day = np.where(moved, day - (weekday - 4), day).clip(0, self.days - 1)
+        local_seconds = np.clip(rng.normal(14 * 3600, 2.5 * 3600, count), 7 * 3600, 23 * 3600)
+        times = self.start + day * SECONDS_PER_DAY + local_seconds.astype(np.int64) - profile['utc_offset'][owners]
+        times = np.clip(times, self.start, self.end - 1)
+        order = np.argsort(times, kind='stable')
+        return times[order], owners[order]
+
+    def _owners(self, rng: np.random.Generator, rates: np.ndarray) -> np.ndarray:
+        """Block-local user index per item for Poisson counts with the given per-user means"""
+        counts = rng.poisson(rates)
+        return np.repeat(np.arange(len(rates)), counts)
+
+    def _next_ids(self, ids: Dict[str, int], kind: str, count: int) -> np.ndarray:
+        first = ids[kind] + 1
+        ids[kind] += count
+        return np.arange(first, first + count)
+
+    def _user_documents(self, profile: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        join_dates = np.datetime_as_string(
+            (self.end - profile['join_days'] * SECONDS_PER_DAY).astype('datetime64[s]'), unit='D')
+        names = np.char.add(np.char.add(profile['first_name'], ' '), profile['last_name'])
+        emails = np.char.add(np.char.lower(profile['user_id']), '@example.com')
+        return [
+            {
+                'user_id': user_id,
+                'gitlab_id': gitlab_id,
+                'name': name,
+                'role': 'developer',
+                'title': title,
+                'team': team,
+                'email': email,
+                'join_date': join_date,
+                'utc_offset_seconds': utc_offset,
+                'synthetic': True
+            }
+            for user_id, gitlab_id, name, title, team, email, join_date, utc_offset in zip(
+                profile['user_id'].tolist(), profile['gitlab_id'].tolist(), names.tolist(),
+                profile['title'].tolist(), profile['team'].tolist(), emails.tolist(),
+                join_dates.tolist(), profile['utc_offset'].tolist())
+        ]
+
+    def _pushes(self, rng: np.random.Generator, profile: Dict[str, np.ndarray],
+                ids: Dict[str, int]) -> Dict[str, List[Dict[str, Any]]]:
+        """Push events (GitLab /users/:id/events shape) and the pipeline each push ran"""
+        owners = self._owners(rng, profile['activity'] * self.days * 5 / 7)
+        count = len(owners)
+        times, owners = self._times(rng, owners, profile)
+        event_ids = self._next_ids(ids, 'event', count)
+        project_ids = profile['projects'][owners, rng.integers(0, 4, count)]
+        commit_counts = rng.geometric(0.55, count).tolist()
+        titles = _titles(rng, count)
+        shas = _shas(rng, count)
+        branches = BRANCHES[rng.integers(0, len(BRANCHES), count)]
+        created = _iso(times)
+
+        ran = rng.random(count) < 0.9
+        pipeline_count = int(ran.sum())
+        ran = ran.tolist()
+        pipeline_ids = self._next_ids(ids, 'pipeline', pipeline_count)
+        succeeded = rng.random(count) < profile['pipeline_success'][owners]
+        statuses = np.where(succeeded, 'success', np.where(rng.random(count) < 0.8, 'failed', 'canceled')).tolist()
+        durations = rng.lognormal(np.log(420), 0.4, count).astype(np.int64)
+        finished = _iso(times + durations)
+        durations = durations.tolist()
+
+        user_ids = profile['user_id'][owners].tolist()
+        gitlab_ids = profile['gitlab_id'][owners].tolist()
+        events, pipelines = [], []
+        pipeline_number = iter(pipeline_ids.tolist())
+        for i, (event_id, user_id, gitlab_id, project_id, title, sha, branch) in enumerate(zip(
+                event_ids.tolist(), user_ids, gitlab_ids, project_ids.tolist(), titles.tolist(), shas,
+                branches.tolist())):
+            events.append({
+                'id': event_id,
+                'project_id': project_id,
+                'action_name': 'pushed to',
+                'author_id': gitlab_id,
+                'author_username': user_id,
+                'created_at': created[i],
+                'title': title,
+                'push_data': {
+                    'commit_count': commit_counts[i],
+                    'action': 'pushed',
+                    'ref_type': 'branch',
+                    'ref': branch,
+                    'commit_to': sha,
+                    'commit_title': title
+                }
+            })
+            if ran[i]:
+                pipelines.append({
+                    'id': next(pipeline_number),
+                    'project_id': project_id,
+                    'sha': sha,
+                    'ref': branch,
+                    'status': statuses[i],
+                    'source': 'push',
+                    'created_at': created[i],
+                    'updated_at': finished[i],
+                    'duration': durations[i],
+                    'user': {'id': gitlab_id, 'username': user_id}
+                })
+        return {'events': events, 'pipelines': pipelines}
+
+    def _merge_requests(self, rng: np.random.Generator, profile: Dict[str, np.ndarray],
+                        ids: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Merge requests (GitLab /merge_requests shape), with reviewers from the same block"""
+        owners = self._owners(rng, profile['activity'] * self.days / 7 * 0.9)
+        count = len(owners)
+        times, owners = self._times(rng, owners, profile)
+        mr_ids = self._next_ids(ids, 'merge_request', count)
+        project_ids = profile['projects'][owners, rng.integers(0, 4, count)]
+        titles = _titles(rng, count)
+        lifetimes = (rng.lognormal(0, 0.8, count) * profile['merge_hours'][owners] * 3600).astype(np.int64)
+        closed_at = times + lifetimes
+        outcome = rng.random(count)
+        state = np.where(closed_at >= self.end, 'opened', np.where(outcome < 0.9, 'merged', 'closed'))
+        closed_iso = _iso(np.minimum(closed_at, self.end - 1))
+        created = _iso(times)
+        notes = rng.poisson(3, count).tolist()
+        reviewer_offsets = rng.integers(1, max(2, len(profile['index'])), count)
+        reviewers = (owners + reviewer_offsets) % len(profile['index'])
+
+        user_ids = profile['user_id'].tolist()
+        gitlab_ids = profile['gitlab_id'].tolist()
+        documents = []
+        for i, (mr_id, owner, project_id, title, mr_state, reviewer) in enumerate(zip(
+                mr_ids.tolist(), owners.tolist(), project_ids.tolist(), titles.tolist(), state.tolist(),
+                reviewers.tolist())):
+            documents.append({
+                'id': mr_id,
+                'iid': mr_id,
+                'project_id': project_id,
+                'title': title,
+                'description': f"{title}. Generated merge request {mr_id}.",
+                'state': mr_state,
+                'created_at': created[i],
+                'updated_at': closed_iso[i] if mr_state != 'opened' else created[i],
+                'merged_at': closed_iso[i] if mr_state == 'merged' else None,
+                'closed_at': closed_iso[i] if mr_state == 'closed' else None,
+                'author': {'id': gitlab_ids[owner], 'username': user_ids[owner]},
+                'reviewers': [{'id': gitlab_ids[reviewer], 'username': user_ids[reviewer]}] if reviewer != owner else [],
+                'user_notes_count': notes[i],
+                'web_url': f"{self.web_url}/projects/{project_id}/-/merge_requests/{mr_id}"
+            })
+        return documents
+
+    def _issues(self, rng: np.random.Generator, profile: Dict[str, np.ndarray],
+                ids: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Issues assigned to each user (GitLab /issues shape)"""
+        owners = self._owners(rng, profile['activity'] * self.days / 7 * 0.6)
+        count = len(owners)
+        times, owners = self._times(rng, owners, profile)
+        issue_ids = self._next_ids(ids, 'issue', count)
+        project_ids = profile['projects'][owners, rng.integers(0, 4, count)]
+        titles = _titles(rng, count, ISSUE_KINDS)
+        closed_at = times + (rng.lognormal(np.log(4), 1.0, count) * SECONDS_PER_DAY).astype(np.int64)
+        state = np.where(closed_at >= self.end, 'opened', 'closed')
+        closed_iso = _iso(np.minimum(closed_at, self.end - 1))
+        created = _iso(times)
+
+        user_ids = profile['user_id'].tolist()
+        gitlab_ids = profile['gitlab_id'].tolist()
+        return [
+            {
+                'id': issue_id,
+                'iid': issue_id,
+                'project_id': project_id,
+                'title': title,
+                'description': f"{title}. Generated issue {issue_id}.",
+                'state': issue_state,
+                'created_at': created[i],
+                'updated_at': closed_iso[i] if issue_state == 'closed' else created[i],
+                'closed_at': closed_iso[i] if issue_state == 'closed' else None,
+                'assignee': {'id': gitlab_ids[owner], 'username': user_ids[owner]},
+                'web_url': f"{self.web_url}/projects/{project_id}/-/issues/{issue_id}"
+            }
+            for i, (issue_id, owner, project_id, title, issue_state) in enumerate(zip(
+                issue_ids.tolist(), owners.tolist(), project_ids.tolist(), titles.tolist(), state.tolist()))
+        ]
+
+    def _telemetry(self, rng: np.random.Generator, profile: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """One desktop and one watch batch per user per day over the last telemetry_days"""
+        users, days = len(profile['index']), self.telemetry_days
+        if not days:
+            return []
+        first_day = self.end - days * SECONDS_PER_DAY
+        day_starts = first_day + np.arange(days) * SECONDS_PER_DAY
+        received_at = datetime.fromtimestamp(self.end, timezone.utc).isoformat()
+        documents = []
+
+        # Desktop: every interval of the local working day, (users, days, samples) arrays
+        desktop_samples = WORKDAY_HOURS * 3600 // TELEMETRY_INTERVAL_SECONDS
+        desktop_offsets = WORKDAY_START_HOUR * 3600 + np.arange(desktop_samples) * TELEMETRY_INTERVAL_SECONDS
+        desktop_times = (day_starts[None, :, None] + desktop_offsets[None, None, :]
+                         - profile['utc_offset'][:, None, None])
+        shape = (users, days, desktop_samples)
+        screen = np.clip(rng.normal(0.85, 0.15, shape), 0, 1) * TELEMETRY_INTERVAL_SECONDS
+        focus = np.clip(rng.normal(profile['focus'][:, None, None], 10, shape), 0, 100)
+        deep_work = np.where(focus > 80, screen, 0.0)
+        breaks = (rng.random(shape) < 0.12).astype(np.float64)
+        app_shares = rng.dirichlet(DESKTOP_APP_WEIGHTS * 40, shape)
+        app_seconds = app_shares * screen[..., None]
+
+        # Watch: around the clock; sleep fills the local night
+        watch_samples = SECONDS_PER_DAY // TELEMETRY_INTERVAL_SECONDS
+        watch_offsets = np.arange(watch_samples) * TELEMETRY_INTERVAL_SECONDS
+        watch_times = (day_starts[None, :, None] + watch_offsets[None, None, :]
+                       - profile['utc_offset'][:, None, None])
+        watch_shape = (users, days, watch_samples)
+        local_hour = watch_offsets / 3600.0
+        sleep_hours = profile['sleep_hours'][:, None, None]
+        asleep = np.broadcast_to(local_hour[None, None, :] < sleep_hours, watch_shape)
+        awake_steps = rng.poisson(120, watch_shape)
+        steps = np.where(asleep, 0, awake_steps)
+        active = np.where(asleep, 0, np.minimum(steps * 2, TELEMETRY_INTERVAL_SECONDS))
+        heart_rate = np.where(asleep, rng.normal(56, 4, watch_shape), rng.normal(74, 9, watch_shape))
+        stress = np.where(asleep, np.nan, np.clip(rng.normal(45, 15, watch_shape), 0, 100))
+        sleep_seconds = np.where(asleep, TELEMETRY_INTERVAL_SECONDS, 0)
+        sleep_quality = np.where(asleep, np.clip(rng.normal(78, 10, watch_shape), 0, 100), np.nan)
+        calories = 18 + steps * 0.04
+
+        # Whole (users, days, samples) arrays become nested lists once
+        desktop = {
+            'screen_seconds': _nested(screen),
+            'focus_score': _nested(focus),
+            'deep_work_seconds': _nested(deep_work),
+            'breaks': _nested(breaks)
+        }
+        apps = _nested(np.moveaxis(app_seconds, -1, 2))
+        watch = {
+            'heart_rate': _nested(heart_rate),
+            'stress_level': _nested(stress),
+            'steps': steps.tolist(),
+            'calories': _nested(calories, 1),
+            'active_seconds': active.tolist(),
+            'sleep_seconds': sleep_seconds.tolist(),
+            'sleep_quality': _nested(sleep_quality)
+        }
+        desktop_times = desktop_times.tolist()
+        watch_times = watch_times.tolist()
+
+        dates = np.datetime_as_string(day_starts.astype('datetime64[s]'), unit='D').tolist()
+        for u, user_id in enumerate(profile['user_id'].tolist()):
+            for d, date in enumerate(dates):
+                series = {name: values[u][d] for name, values in desktop.items()}
+                for a, app in enumerate(DESKTOP_APPS):
+                    series[f"{APP_PREFIX}{app}"] = apps[u][d][a]
+                documents.append(self._batch(user_id, 'desktop', date, desktop_times[u][d], series, received_at))
+
+                series = {name: values[u][d] for name, values in watch.items()}
+                documents.append(self._batch(user_id, 'watch', date, watch_times[u][d], series, received_at))
+        return documents
+
+    @staticmethod
+    def _batch(user_id: str, device_type: str, date: str, timestamps: List[int],
+               series: Dict[str, List], received_at: str) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'device_id': f"{user_id}-{device_type}",
+            'device_type': device_type,
+            'batch_id': f"synthetic-{date}",
+            'start': timestamps[0],
+            'end': timestamps[-1],
+            'count': len(timestamps),
+            'timestamps': timestamps,
+            'series': series,
+            'received_at': received_at
+        }
+
+class JsonlSink:
+    """Writes each collection to <directory>/<collection>.jsonl"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+
+    def write(self, collection: str, documents: List[Dict[str, Any]]):
+        if collection not in self._files:
+            self._files[collection] = open(os.path.join(self.directory, f"{collection}.jsonl"), 'w', encoding='utf-8')
+        self._files[collection].write(''.join(json.dumps(document, separators=(',', ':')) + '\n'
+                                              for document in documents))
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+class MongoSink:
+    """Bulk inserts into the app's MongoDB collections, batch_size documents per insert_many"""
+
+    def __init__(self, mongo_manager, batch_size: int = 5000):
+        self.mongo_manager = mongo_manager
+        self.batch_size = batch_size
+        self.failed_batches = 0
+
+    def write(self, collection: str, documents: List[Dict[str, Any]]):
+        for i in range(0, len(documents), self.batch_size):
+            if not self.mongo_manager.insert_documents(collection, documents[i:i + self.batch_size]):
+                self.failed_batches += 1
+
+    def close(self):
+        if self.failed_batches:
+            logger.error(f"{self.failed_batches} synthetic data batches failed to insert")
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point, e.g.
+
+    python -m utils.synthetic_data --users 10000 --days 365 --jsonl data/synthetic
+    python -m utils.synthetic_data --users 10000 --days 365 --mongo
+    """
+    parser = argparse.ArgumentParser(description='Generate synthetic GitLab and telemetry data for load tests')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365, help='GitLab history span in days')
+    parser.add_argument('--telemetry-days', type=int, default=DEFAULT_TELEMETRY_DAYS)
+    parser.add_argument('--projects', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--end', default=None, help='End date (YYYY-MM-DD, UTC); defaults to today')
+    parser.add_argument('--block-users', type=int, default=DEFAULT_BLOCK_USERS)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--jsonl', metavar='DIRECTORY', help='Write one JSONL file per collection')
+    output.add_argument('--mongo', action='store_true', help='Insert into MongoDB (MONGODB_URI)')
+    args = parser.parse_args(argv)
+
+    end = datetime.strptime(args.end, '%Y-%m-%d').replace(tzinfo=timezone.utc) if args.end else None
+    generator = SyntheticDataGenerator(
+        users=args.users, days=args.days, seed=args.seed, end=end, projects=args.projects,
+        telemetry_days=args.telemetry_days, block_users=args.block_users
+    )
+    if args.mongo:
+        from db.models import MongoDBManager
+        sink = MongoSink(MongoDBManager())
+    else:
+        sink = JsonlSink(args.jsonl)
+    counts = generator.generate(sink)
+    print(json.dumps(counts))
+
+if __name__ == '__main__':
+    main()
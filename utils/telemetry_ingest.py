@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest accepted request body after decompression
+MAX_PAYLOAD_BYTES = int(os.getenv('TELEMETRY_MAX_PAYLOAD_BYTES', str(8 * 1024 * 1024)))
+# Largest number of samples in one batch
+MAX_BATCH_SAMPLES = 20000
+
+class TelemetryPayloadError(ValueError):
+    """Raised for telemetry payloads that cannot be decoded or validated"""
+
+def decode_payload(raw: bytes, content_encoding: Optional[str] = None) -> Any:
+    """Decompress (gzip or deflate) and parse a JSON telemetry payload"""
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'deflate'):
+        # wbits 47 accepts both gzip and zlib headers
+        decompressor = zlib.decompressobj(47 if encoding == 'gzip' else zlib.MAX_WBITS)
+        try:
+            raw = decompressor.decompress(raw, MAX_PAYLOAD_BYTES + 1)
+        except zlib.error as e:
+            raise TelemetryPayloadError(f"Invalid {encoding} body: {str(e)}")
+        if decompressor.unconsumed_tail:
+            raise TelemetryPayloadError("Decompressed payload too large")
+    elif encoding not in ('', 'identity'):
+        raise TelemetryPayloadError(f"Unsupported Content-Encoding: {encoding}")
+    if len(raw) > MAX_PAYLOAD_BYTES:
+        raise TelemetryPayloadError("Payload too large")
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise TelemetryPayloadError(f"Invalid JSON: {str(e)}")
+
+def parse_batches(user_id: str, payload: Any) -> List[Dict[str, Any]]:
+    """Validate a payload into append-only batch documents
+
+    A payload is one batch or {'batches': [...]}. Each batch is columnar:
+    device_id, device_type, a client-chosen batch_id (the idempotency key for
+    retries), epoch-second 'timestamps' and a 'series' object mapping each
+    metric name to a value array of the same length.
+    """
+    if isinstance(payload, dict) and 'batches' in payload:
+        batches = payload['batches']
+    else:
+        batches = [payload]
+    if not isinstance(batches, list) or not batches:
+        raise TelemetryPayloadError("Expected at least one batch")
+
+    received_at = datetime.now(timezone.utc).isoformat()
+    documents = []
+    for batch in batches:
+        if not isinstance(batch, dict):
+            raise TelemetryPayloadError("Each batch must be an object")
+        for field in ('device_id', 'device_type', 'batch_id'):
+            if not isinstance(batch.get(field), str) or not batch[field]:
+                raise TelemetryPayloadError(f"Batch is missing {field}")
+        timestamps = batch.get('timestamps')
+        series = batch.get('series')
+        if not isinstance(timestamps, list) or not timestamps:
+            raise TelemetryPayloadError("Batch timestamps must be a non-empty array")
+        if len(timestamps) > MAX_BATCH_SAMPLES:
+            raise TelemetryPayloadError(f"Batch exceeds {MAX_BATCH_SAMPLES} samples")
+        if not all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in timestamps):
+            raise TelemetryPayloadError("Timestamps must be epoch seconds")
+        if not isinstance(series, dict) or not series:
+            raise TelemetryPayloadError("Batch series must map metric names to arrays")
+        for name, values in series.items():
+            if not isinstance(values, list) or len(values) != len(timestamps):
+                raise TelemetryPayloadError(f"Series {name} must have one value per timestamp")
+            if not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+                raise TelemetryPayloadError(f"Series {name} must contain numbers or nulls")
+        documents.append({
+            'user_id': user_id,
+            'device_id': batch['device_id'],
+            'device_type': batch['device_type'],
+            'batch_id': batch['batch_id'],
+            'start': min(timestamps),
+            'end': max(timestamps),
+            'count': len(timestamps),
+            'timestamps': timestamps,
+            'series': series,
+            'received_at': received_at
+        })
+    return documents
+
+class _PendingWrite:
+    """Batches from one request; done is set once they are durable (or failed)"""
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.documents = documents
+        self.samples = sum(doc['count'] for doc in documents)
+        self.done = threading.Event()
+        self.ok = False
+
+class TelemetryBuffer:
+    """In-memory write buffer flushed to MongoDB with group commit
+
+    Requests append their batches and wait; a flusher thread writes everything
+    buffered in one unordered bulk insert once max_samples are waiting or the
+    oldest write is max_delay_seconds old, then releases all waiters together.
+    A request is acknowledged only after its flush succeeded, and clients
+    retry unacknowledged batches; the unique (device_id, batch_id) index turns
+    those retries into no-ops, so delivery is at-least-once without duplicates.
+    """
+
+    def __init__(self, mongo_manager, max_samples: int = 5000, max_delay_seconds: float = 0.5):
+        self.mongo_manager = mongo_manager
+        self.max_samples = max_samples
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: List[_PendingWrite] = []
+        self._pending_samples = 0
+        self._oldest: Optional[float] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'flushes': 0, 'batches': 0, 'samples': 0, 'failed_flushes': 0}
+
+    def submit(self, documents: List[Dict[str, Any]], timeout: float = 5.0) -> bool:
+        """Buffer batch documents and wait until they are durable; False on failure or timeout"""
+        write = _PendingWrite(documents)
+        with self._condition:
+            self._ensure_flusher()
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.append(write)
+            self._pending_samples += write.samples
+            # Wake the flusher to start the delay timer, or to flush a full buffer
+            if first or self._pending_samples >= self.max_samples:
+                self._condition.notify_all()
+        return write.done.wait(timeout) and write.ok
+
+    def flush(self):
+        """Write everything buffered now"""
+        with self._condition:
+            writes = self._take()
+        self._write(writes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {**self._stats, 'buffered_samples': self._pending_samples}
+
+    def _ensure_flusher(self):
+        """Start the flusher thread on first use (caller holds the lock)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._flush_loop, name='telemetry-flush', daemon=True)
+            self._thread.start()
+
+    def _take(self) -> List[_PendingWrite]:
+        """Detach the buffered writes (caller holds the lock)"""
+        writes, self._pending = self._pending, []
+        self._pending_samples = 0
+        self._oldest = None
+        return writes
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._pending_samples >= self.max_samples:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.max_delay_seconds - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                writes = self._take()
+            self._write(writes)
+
+    def _write(self, writes: List[_PendingWrite]):
+        """One bulk insert for all buffered writes, then release their waiters"""
+        if not writes:
+            return
+        documents = [doc for write in writes for doc in write.documents]
+        ok = self.mongo_manager.insert_telemetry_batches(documents)
+        with self._condition:
+            if ok:
+                self._stats['flushes'] += 1
+                self._stats['batches'] += len(documents)
+                self._stats['samples'] += sum(write.samples for write in writes)
+            else:
+                self._stats['failed_flushes'] += 1
+        for write in writes:
+            write.ok = ok
+            write.done.set()
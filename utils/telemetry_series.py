@@ -0,0 +1,338 @@
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+# Scalar metrics, as sent by the desktop and watch agents
+METRICS = (
+    'screen_seconds',
+    'focus_score',
+    'deep_work_seconds',
+    'breaks',
+    'heart_rate',
+    'stress_level',
+    'steps',
+    'calories',
+    'active_seconds',
+    'sleep_seconds',
+    'sleep_quality'
+)
+
+# Per-app foreground time arrives as series named "app:<name>" (seconds per sample)
+APP_PREFIX = 'app:'
+
+APP_CATEGORIES = {
+    'VS Code': 'Development',
+    'GitLab': 'Development',
+    'Terminal': 'Development',
+    'Chrome': 'Research',
+    'Slack': 'Communication',
+    'Zoom': 'Communication',
+    'Teams': 'Communication',
+    'Figma': 'Design',
+    'Postman': 'Testing',
+    'Docker Desktop': 'DevOps'
+}
+
+# App categories counted as meeting time
+MEETING_CATEGORIES = ('Communication',)
+
+def _grouped_sum_mean(inverse: np.ndarray, groups: int, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-group sums and means of values, ignoring NaN (mean is NaN for empty groups)"""
+    present = ~np.isnan(values)
+    sums = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=groups)
+    counts = np.bincount(inverse, weights=present, minlength=groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    return sums, means
+
+def _nanmean(values: np.ndarray) -> float:
+    """Mean ignoring NaN, NaN (without a warning) when nothing was reported"""
+    present = values[~np.isnan(values)]
+    return float(present.mean()) if len(present) else np.nan
+
+def _round(value: float, digits: int = 1):
+    """Round a NumPy scalar for JSON output (None for NaN)"""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), digits) if digits else int(round(float(value)))
+
+class TelemetrySeries:
+    """Columnar telemetry for one user
+
+    Samples share one int64 array of epoch seconds, sorted ascending. Every
+    metric is a float32 column of the same length with NaN where a device did
+    not report it, and per-app foreground seconds form a float32 matrix with
+    one column per app. A month of minute samples is a few megabytes instead
+    of hundreds of thousands of dicts, and every rollup is a handful of
+    vectorized passes.
+    """
+
+    def __init__(self, timestamps: np.ndarray, metrics,
+                 app_names: Optional[List[str]] = None, app_seconds: Optional[np.ndarray] = None):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        if isinstance(metrics, np.ndarray):
+            self.values = np.asarray(metrics, dtype=np.float32)
+        else:
+            self.values = np.full((len(METRICS), len(self.timestamps)), np.nan, dtype=np.float32)
+            for i, name in enumerate(METRICS):
+                if name in metrics:
+                    self.values[i] = metrics[name]
+        # One contiguous row per metric; metrics are views of those rows
+        self.metrics = dict(zip(METRICS, self.values))
+        self.app_names = list(app_names or [])
+        if app_seconds is None:
+            app_seconds = np.zeros((len(self.timestamps), len(self.app_names)), dtype=np.float32)
+        self.app_seconds = np.asarray(app_seconds, dtype=np.float32).reshape(len(self.timestamps), len(self.app_names))
+        self._prefix: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the sample arrays"""
+        return self.timestamps.nbytes + self.values.nbytes + self.app_seconds.nbytes
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[Dict[str, Any]]) -> 'TelemetrySeries':
+        """Build from stored telemetry_samples batches (see utils.telemetry_ingest)"""
+        batches = list(batches)
+        app_names = sorted({name[len(APP_PREFIX):] for batch in batches
+                            for name in batch['series'] if name.startswith(APP_PREFIX)})
+        app_index = {name: i for i, name in enumerate(app_names)}
+        total = sum(len(batch['timestamps']) for batch in batches)
+
+        timestamps = np.empty(total, dtype=np.int64)
+        values = np.full((len(METRICS), total), np.nan, dtype=np.float32)
+        metric_index = {name: i for i, name in enumerate(METRICS)}
+        app_seconds = np.zeros((total, len(app_names)), dtype=np.float32)
+        offset = 0
+        for batch in batches:
+            count = len(batch['timestamps'])
+            rows = slice(offset, offset + count)
+            timestamps[rows] = batch['timestamps']
+            for name, series in batch['series'].items():
+                column = np.array(series, dtype=np.float32)
+                if name.startswith(APP_PREFIX):
+                    app_seconds[rows, app_index[name[len(APP_PREFIX):]]] = np.nan_to_num(column)
+                elif name in metric_index:
+                    values[metric_index[name], rows] = column
+            offset += count
+
+        order = np.argsort(timestamps, kind='stable')
+        return cls(timestamps[order], values[:, order], app_names, app_seconds[order])
+
+    def save(self, path_or_file):
+        """Write the arrays to a compressed .npz file"""
+        np.savez_compressed(
+            path_or_file,
+            timestamps=self.timestamps,
+            app_seconds=self.app_seconds,
+            app_names=np.array(json.dumps(self.app_names)),
+            **{f"metric_{name}": column for name, column in self.metrics.items()}
+        )
+
+    @classmethod
+    def load(cls, path_or_file) -> 'TelemetrySeries':
+        """Read arrays written by save()"""
+        with np.load(path_or_file, allow_pickle=False) as data:
+            metrics = {name: data[f"metric_{name}"] for name in METRICS if f"metric_{name}" in data.files}
+            return cls(data['timestamps'], metrics, json.loads(str(data['app_names'])), data['app_seconds'])
+
+    def to_bytes(self) -> bytes:
+        """Serialize to .npz bytes (for MongoDB or cache storage)"""
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TelemetrySeries':
+        return cls.load(io.BytesIO(data))
+
+    def since(self, start: int) -> 'TelemetrySeries':
+        """Samples at or after an epoch second, as views of these arrays"""
+        first = int(np.searchsorted(self.timestamps, start, side='left'))
+        return TelemetrySeries(self.timestamps[first:], self.values[:, first:], self.app_names, self.app_seconds[first:])
+
+    def _prefix_sums(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative sums of every metric and app column, and of reported samples
+
+        Built once on first use; afterwards the total over any sample range is
+        one subtraction, so rollups cost O(periods) rather than O(samples).
+        """
+        if self._prefix is None:
+            present = ~np.isnan(self.values)
+            columns = np.vstack([np.where(present, self.values, 0.0), self.app_seconds.T]).astype(np.float64)
+            sums = np.zeros((len(columns), len(self) + 1))
+            np.cumsum(columns, axis=1, out=sums[:, 1:])
+            counts = np.zeros((len(METRICS), len(self) + 1), dtype=np.int64)
+            np.cumsum(present, axis=1, out=counts[:, 1:])
+            self._prefix = (sums, counts)
+        return self._prefix
+
+    def _index_range(self, start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        """Sample index range for epoch seconds [start, end)"""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, start, side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, end, side='left'))
+        return lo, max(lo, hi)
+
+    def rollup(self, period_seconds: int, offset_seconds: int = 0,
+               start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Any]:
+        """Sums and means of every metric per period (e.g. SECONDS_PER_DAY)
+
+        Periods are aligned to the epoch, shifted by offset_seconds (a UTC
+        offset for local days, or 3 days to start weeks on Monday). Periods
+        without samples are omitted; start and end limit the samples used.
+        """
+        lo, hi = self._index_range(start, end)
+        if lo == hi:
+            empty = {name: np.zeros(0) for name in METRICS}
+            return {'start': np.zeros(0, dtype=np.int64), 'sum': empty, 'mean': empty}
+        sums, counts = self._prefix_sums()
+        first_key = (int(self.timestamps[lo]) + offset_seconds) // period_seconds
+        last_key = (int(self.timestamps[hi - 1]) + offset_seconds) // period_seconds
+        keys = np.arange(first_key, last_key + 2, dtype=np.int64)
+        edges = np.clip(np.searchsorted(self.timestamps, keys * period_seconds - offset_seconds, side='left'), lo, hi)
+        edges[0], edges[-1] = lo, hi
+        nonempty = edges[1:] > edges[:-1]
+        left, right = edges[:-1][nonempty], edges[1:][nonempty]
+        period_sums = sums[:len(METRICS), right] - sums[:len(METRICS), left]
+        period_counts = counts[:, right] - counts[:, left]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = period_sums / period_counts
+        return {
+            'start': keys[:-1][nonempty] * period_seconds - offset_seconds,
+            'sum': dict(zip(METRICS, period_sums)),
+            'mean': dict(zip(METRICS, means))
+        }
+
+    def daily(self, utc_offset_seconds: int = 0, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Any]:
+        return self.rollup(SECONDS_PER_DAY, utc_offset_seconds, start, end)
+
+    def weekly(self, utc_offset_seconds: int = 0, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Any]:
+        # The epoch fell on a Thursday; shifting by three days starts weeks on Monday
+        return self.rollup(7 * SECONDS_PER_DAY, utc_offset_seconds + 3 * SECONDS_PER_DAY, start, end)
+
+    def totals(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, float]:
+        """Sum of every metric over [start, end)"""
+        lo, hi = self._index_range(start, end)
+        sums, _ = self._prefix_sums()
+        return dict(zip(METRICS, (sums[:len(METRICS), hi] - sums[:len(METRICS), lo]).tolist()))
+
+    def app_totals(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, float]:
+        """Foreground seconds per app over [start, end)"""
+        lo, hi = self._index_range(start, end)
+        sums, _ = self._prefix_sums()
+        return dict(zip(self.app_names, (sums[len(METRICS):, hi] - sums[len(METRICS):, lo]).tolist()))
+
+    def hourly_focus(self, utc_offset_seconds: int = 0) -> np.ndarray:
+        """Mean focus score per hour of day (24 values, NaN for hours without samples)"""
+        hours = ((self.timestamps + utc_offset_seconds) // 3600) % 24
+        _, means = _grouped_sum_mean(hours, 24, self.metrics['focus_score'])
+        return means
+
+    def most_productive_hours(self, windows: int = 2, width: int = 2, utc_offset_seconds: int = 0) -> List[str]:
+        """Non-overlapping windows of width hours with the highest mean focus"""
+        focus = np.nan_to_num(self.hourly_focus(utc_offset_seconds), nan=-1.0)
+        scores = np.convolve(np.concatenate([focus, focus[:width - 1]]), np.ones(width), 'valid')[:24]
+        chosen = []
+        for start in np.argsort(-scores, kind='stable'):
+            if scores[start] < 0:
+                break
+            if all(min((start - other) % 24, (other - start) % 24) >= width for other in chosen):
+                chosen.append(int(start))
+            if len(chosen) == windows:
+                break
+        return [f"{start:02d}:00-{(start + width) % 24:02d}:00" for start in sorted(chosen)]
+
+    def app_switches_per_day(self, utc_offset_seconds: int = 0) -> float:
+        """Average number of foreground app changes per day"""
+        if not self.app_names or len(self) < 2:
+            return 0.0
+        active = self.app_seconds.sum(axis=1) > 0
+        foreground = np.where(active, self.app_seconds.argmax(axis=1), -1)[active]
+        days = ((self.timestamps[active] + utc_offset_seconds) // SECONDS_PER_DAY)
+        switches = np.count_nonzero(foreground[1:] != foreground[:-1])
+        return switches / max(1, len(np.unique(days)))
+
+    def to_dashboard(self, days: int = 7, utc_offset_seconds: int = 0) -> Dict[str, Any]:
+        """Aggregates in the shape of utils.data_generator.get_telemetry_data"""
+        if not len(self):
+            return {'daily_data': [], 'app_usage': [], 'health_data': {}, 'productivity_insights': {}, 'last_sync': None}
+        last_day = (int(self.timestamps[-1]) + utc_offset_seconds) // SECONDS_PER_DAY
+        window_start = (last_day - days + 1) * SECONDS_PER_DAY - utc_offset_seconds
+        today_start = last_day * SECONDS_PER_DAY - utc_offset_seconds
+        recent = self.since(window_start)
+        daily = self.daily(utc_offset_seconds, start=window_start)
+        sums, means = daily['sum'], daily['mean']
+
+        daily_data = []
+        for i in range(len(daily['start']) - 1, -1, -1):
+            daily_data.append({
+                'date': datetime.fromtimestamp(int(daily['start'][i]) + utc_offset_seconds, timezone.utc).strftime('%Y-%m-%d'),
+                'screen_time_hours': _round(sums['screen_seconds'][i] / 3600),
+                'focus_score': _round(means['focus_score'][i], 0),
+                'break_count': _round(sums['breaks'][i], 0),
+                'deep_work_hours': _round(sums['deep_work_seconds'][i] / 3600)
+            })
+
+        app_totals = self.app_totals(start=window_start)
+        app_usage = sorted((
+            {'app': app, 'hours': _round(seconds / 3600 / max(1, len(daily['start']))),
+             'category': APP_CATEGORIES.get(app, 'Other')}
+            for app, seconds in app_totals.items() if seconds > 0
+        ), key=lambda app: -app['hours'])
+
+        # Health figures describe the latest day, as the watch app shows them
+        today = self.since(today_start)
+        today_totals = self.totals(start=today_start)
+        heart_rate = today.metrics['heart_rate']
+        has_heart_rate = bool(np.any(~np.isnan(heart_rate)))
+        health_data = {
+            'heart_rate': {
+                'avg': _round(_nanmean(heart_rate), 0),
+                'max': _round(np.nanmax(heart_rate), 0) if has_heart_rate else None,
+                'min': _round(np.nanmin(heart_rate), 0) if has_heart_rate else None
+            },
+            'stress_level': _round(_nanmean(today.metrics['stress_level']), 0),
+            'sleep_hours': _round(today_totals['sleep_seconds'] / 3600),
+            'sleep_quality': _round(_nanmean(today.metrics['sleep_quality']), 0),
+            'steps': int(today_totals['steps']),
+            'calories': int(today_totals['calories']),
+            'active_minutes': int(today_totals['active_seconds'] // 60)
+        }
+
+        window_totals = self.totals(start=window_start)
+        screen_seconds = window_totals['screen_seconds']
+        meeting_seconds = sum(seconds for app, seconds in app_totals.items()
+                              if APP_CATEGORIES.get(app) in MEETING_CATEGORIES)
+        mean_focus = _nanmean(recent.metrics['focus_score'])
+        productivity_insights = {
+            'most_productive_hours': recent.most_productive_hours(utc_offset_seconds=utc_offset_seconds),
+            'distraction_score': _round(100 - mean_focus, 0),
+            'multitasking_frequency': _round(recent.app_switches_per_day(utc_offset_seconds), 0),
+            'meeting_time_percentage': _round(100 * meeting_seconds / screen_seconds, 0) if screen_seconds else 0,
+            'deep_work_percentage': _round(100 * window_totals['deep_work_seconds'] / screen_seconds, 0) if screen_seconds else 0
+        }
+
+        return {
+            'daily_data': daily_data,
+            'app_usage': app_usage,
+            'health_data': health_data,
+            'productivity_insights': productivity_insights,
+            'last_sync': datetime.fromtimestamp(int(self.timestamps[-1]), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+def load_recent_telemetry(mongo_manager, user_id: str, days: int = 7,
+                          utc_offset_seconds: int = 0) -> Optional[Dict[str, Any]]:
+    """Dashboard telemetry from samples pushed by the user's devices, or None if there are none"""
+    since = int(datetime.now(timezone.utc).timestamp()) - (days + 1) * SECONDS_PER_DAY
+    batches = mongo_manager.get_telemetry_samples(user_id, since=since)
+    if not batches:
+        return None
+    return TelemetrySeries.from_batches(batches).to_dashboard(days, utc_offset_seconds)